@@ -10,11 +10,23 @@ Esempio:
     python esplora_articoli.py articoli.db
 """
 
+import copy
 import sqlite3
 import sys
 import os
 import argparse
 import logging
+import multiprocessing
+import socket
+from lib import blocks, docx_bundle, docx_export, export_jobs, fulltext, migrations
+from lib import preview, query
+from lib.body import decode_body
+from lib.connection import open_readonly, open_readwrite
+from lib.dates import period_bounds
+from lib.docx_export import BS4_AVAILABLE, DOCX_AVAILABLE, HTMLDOCX_AVAILABLE
+from lib.export_journal import ExportJournal
+from lib.export_manifest import ExportManifest
+from lib.prefetch import PageCache, Prefetcher
 from lib.console import setup_console, set_emoji_mode
 
 
@@ -26,27 +38,47 @@ def setup_logging(verbose=False, no_emoji=False):
         set_emoji_mode(False)
 
 
-try:
-    from docx import Document
-    from docx.enum.text import WD_ALIGN_PARAGRAPH
+EXPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "export")
 
-    DOCX_AVAILABLE = True
-except ImportError:
-    DOCX_AVAILABLE = False
 
-try:
-    from htmldocx import HtmlToDocx
+# Full rows (bodies included) read per fetchmany() during a bulk export
+EXPORT_BATCH = 50
 
-    HTMLDOCX_AVAILABLE = True
-except ImportError:
-    HTMLDOCX_AVAILABLE = False
+# Below this many articles a process pool costs more than it saves
+PARALLEL_MIN_ARTICLES = 20
 
-try:
-    from bs4 import BeautifulSoup
+# Exported articles marked per write transaction
+MARK_BATCH = 100
 
-    BS4_AVAILABLE = True
-except ImportError:
-    BS4_AVAILABLE = False
+
+def prepare_database(db_path):
+    """Aggiorna schema, indice full-text e anteprime del database.
+
+    These passes write, so they run on a short read-write connection:
+    browsing and queries then use read-only connections. If an import holds
+    the write lock the two syncs are skipped, since the import runs them at
+    its end.
+    """
+    maintenance = open_readwrite(db_path)
+    try:
+        migrations.apply_migrations(maintenance)
+        try:
+            fulltext.sync_fulltext(maintenance)
+            preview.sync_previews(maintenance)
+        except sqlite3.OperationalError as e:
+            logging.debug(f"Sincronizzazione rimandata: {e}")
+    finally:
+        maintenance.close()
+
+
+def _progress(iterable, total):
+    """`iterable` con la barra di avanzamento di tqdm, se installato"""
+    try:
+        from tqdm import tqdm
+
+        return tqdm(iterable, total=total, unit="articolo", ncols=80)
+    except Exception:
+        return iterable
 
 
 class ArticoliExplorer:
@@ -54,80 +86,499 @@ class ArticoliExplorer:
 
     def __init__(self, db_path):
         self.db_path = db_path
-        self.conn = None
+        self.conn = None  # read-only: browsing never blocks an import
         self.cursor = None
+        self._write_conn = None
         self.page_size = 10
         self.current_page = 0
         self.current_filter = None
         self.current_search = None
+        self.current_period = None  # AAAA, AAAA-MM, AAAA-MM-GG or DA..A
+        self.fts_enabled = False
+
+        self.export_dir = EXPORT_DIR
+        self.export_workers = None  # None = one per CPU, 1 = serial
+        self.export_template = None  # house-style .docx; None = python-docx default
+        self.export_renderer = "htmldocx"  # see docx_export.RENDERERS
+        self.export_force = False  # render again articles that did not change
+        self.export_layout = "flat"  # see docx_export.LAYOUTS
+
+        # Keyset pagination: (data_epoch, id_articolo, op) of the page start
+        self._page_anchor = None
+        self._last_page = []
+        self._has_next = False
+
+        # COUNT(*) results by query, valid while PRAGMA data_version is unchanged
+        self._count_cache = {}
+        self._data_version = None
+
+        # Pages and full articles, filled on demand and by the prefetch thread
+        self.prefetch = True
+        self._page_cache = PageCache()
+        self._prefetcher = None
 
     def connect(self):
         """Connette al database"""
         if not os.path.exists(self.db_path):
             print(f"Errore: Database '{self.db_path}' non trovato!")
             return False
-        self.conn = sqlite3.connect(self.db_path)
-        self.conn.row_factory = sqlite3.Row
+        prepare_database(self.db_path)
+        self.conn = open_readonly(self.db_path)
+        self.fts_enabled = fulltext.fulltext_available(self.conn)
         self.cursor = self.conn.cursor()
         return True
 
     def close(self):
         """Chiude la connessione"""
+        if self._prefetcher:
+            self._prefetcher.close()
+            self._prefetcher = None
+        if self._write_conn:
+            self._write_conn.close()
+            self._write_conn = None
         if self.conn:
             self.conn.close()
 
+    def _writer(self):
+        """Connessione in scrittura, aperta alla prima marcatura di export"""
+        if self._write_conn is None:
+            self._write_conn = open_readwrite(self.db_path)
+        return self._write_conn
+
+    def start_prefetch(self):
+        """Avvia il thread che precarica pagine vicine e articoli visibili"""
+        if self._prefetcher is None:
+            self._prefetcher = Prefetcher(self.db_path)
+            self._prefetcher.start()
+
+    def _match_query(self):
+        """Query FTS5 per la ricerca corrente (None se non applicabile)"""
+        if not (self.current_search and self.fts_enabled):
+            return None
+        return fulltext.build_match_query(self.current_search)
+
+    def _filter_conditions(self, alias=""):
+        """Ritorna (condizioni, params) per argomento, periodo e ricerca LIKE.
+
+        The filters combine (AND). The full-text match, when available, is
+        applied by the callers on top of these conditions.
+        """
+        return query.filter_conditions(
+            argomento=self.current_filter,
+            period=self.current_period,
+            like=None if self._match_query() else self.current_search,
+            alias=alias,
+        )
+
+    def _query_key(self):
+        """Chiave dei risultati correnti (filtro + ricerca) per le cache"""
+        return (
+            self.current_filter,
+            self.current_search,
+            self.current_period,
+            self.fts_enabled,
+        )
+
+    def _check_data_version(self):
+        """Svuota le cache se un'altra connessione ha modificato il database.
+
+        PRAGMA data_version changes on commits from other connections only:
+        writes made through this explorer call invalidate_caches() instead.
+        """
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._data_version = version
+            self.invalidate_caches()
+
+    def invalidate_caches(self):
+        """Svuota le cache dei risultati (dopo una scrittura)"""
+        self._count_cache.clear()
+        self._page_cache.clear()
+
     def get_total_count(self):
         """Ritorna il numero totale di articoli (con filtri applicati)"""
-        query = "SELECT COUNT(*) FROM t_articoli"
-        params = []
+        self._check_data_version()
+        key = self._query_key()
+        if key not in self._count_cache:
+            self._count_cache[key] = self._count_results()
+        return self._count_cache[key]
+
+    def _count_results(self):
+        match = self._match_query()
+        conds, params = self._filter_conditions(alias="a" if match else "")
+        if match:
+            fts = fulltext.FTS_TABLE
+            if not conds:
+                self.cursor.execute(
+                    f"SELECT COUNT(*) FROM {fts} WHERE {fts} MATCH ?", (match,)
+                )
+            else:
+                self.cursor.execute(
+                    f"SELECT COUNT(*) FROM {fts} "
+                    f"JOIN t_articoli a ON a.id_articolo = {fts}.rowid "
+                    f"WHERE {fts} MATCH ? AND " + " AND ".join(conds),
+                    [match] + params,
+                )
+            return self.cursor.fetchone()[0]
 
-        if self.current_filter:
-            query += " WHERE argomento = ?"
-            params.append(self.current_filter)
-        elif self.current_search:
-            query += " WHERE titolo_articolo LIKE ? OR sotto_titolo LIKE ?"
-            params.extend([f"%{self.current_search}%", f"%{self.current_search}%"])
+        where = " WHERE " + " AND ".join(conds) if conds else ""
+        self.cursor.execute("SELECT COUNT(*) FROM t_articoli" + where, params)
+        return self.cursor.fetchone()[0]
+
+    def _seek_query(self, null_data=False, seek=None, backwards=False, limit=1):
+        """Costruisce (sql, params) di una lettura keyset della lista.
+
+        The list is ordered by data_epoch DESC, id_articolo DESC, with
+        undated rows (NULL or zero dates) last. The two parts are read
+        separately so each one is a plain index range scan: `seek` is
+        (op, data_epoch, id_articolo) and `backwards` walks towards the top
+        of the list.
+        """
+        conds, params = self._filter_conditions()
+        conds.append("data_epoch IS NULL" if null_data else "data_epoch IS NOT NULL")
+        if seek is not None:
+            op, epoch, article_id = seek
+            if null_data:
+                conds.append(f"id_articolo {op} ?")
+                params.append(article_id)
+            else:
+                conds.append(f"(data_epoch, id_articolo) {op} (?, ?)")
+                params.extend([epoch, article_id])
+
+        direction = "ASC" if backwards else "DESC"
+        order = f"id_articolo {direction}"
+        if not null_data:
+            order = f"data_epoch {direction}, " + order
 
+        query = (
+            "SELECT id_articolo, data, data_epoch, argomento, "
+            "titolo_articolo, sotto_titolo, esportato "
+            "FROM t_articoli WHERE "
+            + " AND ".join(conds)
+            + f" ORDER BY {order} LIMIT ?"
+        )
+        params.append(limit)
+        return query, params
+
+    def _seek(self, **kwargs):
+        query, params = self._seek_query(**kwargs)
         self.cursor.execute(query, params)
+        return self.cursor.fetchall()
+
+    def _fetch_forward(self, anchor, limit):
+        """Legge `limit` righe a partire da `anchor` (None = inizio lista)"""
+        rows = []
+        seek = None
+        if anchor is not None:
+            epoch, article_id, op = anchor
+            seek = (op, epoch, article_id)
+
+        if anchor is None or anchor[0] is not None:
+            rows += self._seek(seek=seek, limit=limit)
+            seek = None  # undated rows all come after the dated ones
+        if len(rows) < limit:
+            rows += self._seek(null_data=True, seek=seek, limit=limit - len(rows))
+        return rows
+
+    def _fetch_backward(self, epoch, article_id, limit):
+        """Legge fino a `limit` righe prima di (data_epoch, id), dalla più vicina"""
+        if epoch is not None:
+            return self._seek(
+                seek=(">", epoch, article_id), backwards=True, limit=limit
+            )
+
+        rows = self._seek(
+            null_data=True, seek=(">", None, article_id), backwards=True, limit=limit
+        )
+        if len(rows) < limit:
+            rows += self._seek(backwards=True, limit=limit - len(rows))
+        return rows
+
+    def _count_before(self, epoch, article_id):
+        """Numero di righe che precedono (data_epoch, id) nella lista filtrata"""
+        conds, params = self._filter_conditions()
+        if epoch is None:
+            conds.append("(data_epoch IS NOT NULL OR id_articolo > ?)")
+            params.append(article_id)
+        else:
+            conds.append("(data_epoch, id_articolo) > (?, ?)")
+            params.extend([epoch, article_id])
+        self.cursor.execute(
+            "SELECT COUNT(*) FROM t_articoli WHERE " + " AND ".join(conds), params
+        )
         return self.cursor.fetchone()[0]
 
+    def _page_key(self, anchor, page):
+        """Chiave di cache di una pagina: keyset pages by anchor, others by number"""
+        position = page if anchor is None else anchor
+        return ("page", self._query_key(), self.page_size, position)
+
     def get_articles_page(self):
         """Ritorna una pagina di articoli"""
-        query = (
-            "SELECT id_articolo, data, argomento, "
-            "titolo_articolo, sotto_titolo, esportato "
-            "FROM t_articoli"
+        self._check_data_version()
+        key = self._page_key(self._page_anchor, self.current_page)
+        rows = self._page_cache.get(key)
+        if rows is None:
+            rows = self._read_page(self._page_anchor, self.current_page)
+            self._page_cache.put(key, rows)
+
+        self._has_next = len(rows) > self.page_size
+        self._last_page = rows[: self.page_size]
+        if self._prefetcher:
+            self._schedule_prefetch()
+        return self._last_page
+
+    def _read_page(self, anchor, page):
+        """Legge una pagina, più una riga che indica se ne segue un'altra"""
+        match = self._match_query()
+        limit = self.page_size + 1
+        if match:
+            rows = self._search_page(match, limit, page * self.page_size)
+        elif anchor is None and page > 0:
+            # Page set directly by number: no anchor to seek from yet
+            conds, params = self._filter_conditions()
+            where = " WHERE " + " AND ".join(conds) if conds else ""
+            self.cursor.execute(
+                "SELECT id_articolo, data, data_epoch, argomento, "
+                "titolo_articolo, sotto_titolo, esportato "
+                f"FROM t_articoli{where} "
+                "ORDER BY data_epoch DESC, id_articolo DESC LIMIT ? OFFSET ?",
+                params + [limit, page * self.page_size],
+            )
+            rows = self.cursor.fetchall()
+        else:
+            rows = self._fetch_forward(anchor, limit)
+        return rows
+
+    def _schedule_prefetch(self):
+        """Accoda la lettura di pagina successiva, precedente e articoli visibili.
+
+        Each job reads through a shallow copy of the explorer taken now, so
+        it sees the current filters even if the user changes them meanwhile.
+        """
+        cache = self._page_cache
+        generation = cache.generation
+        jobs = []
+
+        ids = [row["id_articolo"] for row in self._last_page]
+        missing = [i for i in ids if ("article", i) not in cache]
+        if missing:
+            jobs.append(lambda reader: reader._load_articles(missing, generation))
+
+        if self._has_next:
+            anchor, page = self._next_position()
+            if self._page_key(anchor, page) not in cache:
+                jobs.append(
+                    lambda reader: reader._prefetch_page(anchor, page, generation)
+                )
+
+        current = self._page_key(self._page_anchor, self.current_page)
+        if self._has_prev() and ("prev", current) not in cache:
+
+            def prev_job(reader):
+                anchor, page = reader._prev_position()
+                cache.put(("prev", current), (anchor, page), generation)
+                reader._prefetch_page(anchor, page, generation)
+
+            jobs.append(prev_job)
+
+        snapshot = copy.copy(self)
+        snapshot._prefetcher = None
+        self._prefetcher.submit(
+            *(lambda conn, job=job: job(snapshot._on(conn)) for job in jobs)
         )
-        params = []
 
-        if self.current_filter:
-            query += " WHERE argomento = ?"
-            params.append(self.current_filter)
-        elif self.current_search:
-            query += " WHERE titolo_articolo LIKE ? OR sotto_titolo LIKE ?"
-            params.extend([f"%{self.current_search}%", f"%{self.current_search}%"])
+    def _on(self, conn):
+        """Copia che legge da `conn` (la connessione del thread di prefetch)"""
+        reader = copy.copy(self)
+        reader.conn = conn
+        reader.cursor = conn.cursor()
+        return reader
+
+    def _prefetch_page(self, anchor, page, generation):
+        key = self._page_key(anchor, page)
+        if key not in self._page_cache:
+            self._page_cache.put(key, self._read_page(anchor, page), generation)
+
+    def _load_articles(self, article_ids, generation):
+        """Mette in cache gli articoli completi (testo e anteprima)"""
+        placeholders = ", ".join("?" * len(article_ids))
+        self.cursor.execute(
+            "SELECT a.*, p.anteprima, p.caratteri, p.parole FROM t_articoli a "
+            "LEFT JOIN t_articoli_preview p ON p.id_articolo = a.id_articolo "
+            f"WHERE a.id_articolo IN ({placeholders})",
+            list(article_ids),
+        )
+        for row in self.cursor.fetchall():
+            article = dict(row)
+            article["testo_articolo"] = decode_body(article["testo_articolo"])
+            self._page_cache.put(
+                ("article", article["id_articolo"]), article, generation
+            )
 
-        query += " ORDER BY data DESC LIMIT ? OFFSET ?"
-        params.extend([self.page_size, self.current_page * self.page_size])
+    def _cached_article(self, article_id):
+        key = ("article", article_id)
+        if key not in self._page_cache:
+            return None
+        self._check_data_version()  # may clear the cache
+        article = self._page_cache.get(key)
+        return dict(article) if article is not None else None
 
-        self.cursor.execute(query, params)
+    def _search_page(self, match, limit, offset):
+        """Pagina di risultati full-text, ordinati per rilevanza (bm25).
+
+        Ranked results have no stable sort key to seek on, so this path keeps
+        LIMIT/OFFSET; search result sets are small compared to the archive.
+        """
+        fts = fulltext.FTS_TABLE
+        weights = ", ".join(str(w) for w in fulltext.BM25_WEIGHTS)
+        conds, params = self._filter_conditions(alias="a")
+        where = "".join(f" AND {cond}" for cond in conds)
+        self.cursor.execute(
+            "SELECT a.id_articolo, a.data, a.data_epoch, a.argomento, "
+            "a.titolo_articolo, a.sotto_titolo, a.esportato, "
+            f"snippet({fts}, -1, '[', ']', '...', 12) AS snippet "
+            f"FROM {fts} JOIN t_articoli a ON a.id_articolo = {fts}.rowid "
+            f"WHERE {fts} MATCH ?{where} "
+            f"ORDER BY bm25({fts}, {weights}), a.data_epoch DESC LIMIT ? OFFSET ?",
+            [match] + params + [limit, offset],
+        )
         return self.cursor.fetchall()
 
+    def reset_position(self):
+        """Torna alla prima pagina (dopo un cambio di filtro o ricerca)"""
+        self.current_page = 0
+        self._page_anchor = None
+        self._last_page = []
+        self._has_next = False
+
+    def _next_position(self):
+        """(anchor, pagina) della pagina successiva a quella mostrata"""
+        if self._match_query():
+            return None, self.current_page + 1
+        last = self._last_page[-1]
+        return (last["data_epoch"], last["id_articolo"], "<"), self.current_page + 1
+
+    def _has_prev(self):
+        return self.current_page > 0 or self._page_anchor is not None
+
+    def _prev_position(self):
+        """(anchor, pagina) della pagina precedente (seek all'indietro)"""
+        if self._match_query() or not self._last_page:
+            return None, max(0, self.current_page - 1)
+
+        first = self._last_page[0]
+        rows = self._fetch_backward(
+            first["data_epoch"], first["id_articolo"], self.page_size + 1
+        )
+        if len(rows) <= self.page_size:
+            return None, 0
+        start = rows[self.page_size - 1]
+        return (start["data_epoch"], start["id_articolo"], "<="), max(
+            1, self.current_page - 1
+        )
+
+    def next_page(self):
+        """Passa alla pagina successiva (seek dall'ultima riga mostrata)"""
+        if not self._has_next or not self._last_page:
+            return False
+        self._page_anchor, self.current_page = self._next_position()
+        return True
+
+    def prev_page(self):
+        """Torna alla pagina precedente (seek all'indietro dalla prima riga)"""
+        if not self._has_prev():
+            return False
+        self._check_data_version()
+        current = self._page_key(self._page_anchor, self.current_page)
+        position = self._page_cache.get(("prev", current))
+        if position is None:
+            position = self._prev_position()
+        self._page_anchor, self.current_page = position
+        return True
+
+    def _jump_to_row(self, row):
+        self._page_anchor = (row["data_epoch"], row["id_articolo"], "<=")
+        position = self._count_before(row["data_epoch"], row["id_articolo"])
+        self.current_page = position // self.page_size
+        if self.current_page == 0 and position == 0:
+            self._page_anchor = None
+
+    def jump_to_date(self, date_text):
+        """Posiziona la lista sul primo articolo con data <= `date_text`.
+
+        Accepts YYYY, YYYY-MM or YYYY-MM-DD. Returns False if nothing matches.
+        """
+        date_text = date_text.strip()
+        bounds = period_bounds(date_text)
+        if not bounds or ".." in date_text:
+            return False
+        # The end of the period is exclusive: the whole day/month/year counts
+        rows = self._seek(seek=("<", bounds[1], 0), limit=1)
+        if not rows:
+            return False
+        self._jump_to_row(rows[0])
+        return True
+
+    def jump_to_id(self, article_id):
+        """Posiziona la lista sull'articolo `article_id` (se visibile col filtro)"""
+        conds, params = self._filter_conditions()
+        conds.append("id_articolo = ?")
+        params.append(article_id)
+        self.cursor.execute(
+            "SELECT id_articolo, data_epoch FROM t_articoli WHERE "
+            + " AND ".join(conds),
+            params,
+        )
+        row = self.cursor.fetchone()
+        if not row:
+            return False
+        self._jump_to_row(row)
+        return True
+
     def get_article_by_id(self, article_id):
-        """Ritorna un articolo completo per ID"""
+        """Ritorna un articolo completo per ID (testo decompresso)"""
+        article = self._cached_article(article_id)
+        if article is not None:
+            return article
+        self.cursor.execute(
+            "SELECT a.*, x.blocchi FROM t_articoli a "
+            "LEFT JOIN t_articoli_preview p ON p.id_articolo = a.id_articolo"
+            f"{query.BLOCKS_JOIN} WHERE a.id_articolo = ?",
+            (article_id,),
+        )
+        row = self.cursor.fetchone()
+        if row is None:
+            return None
+        article = dict(row)
+        article["testo_articolo"] = decode_body(article["testo_articolo"])
+        return article
+
+    def get_article_detail(self, article_id):
+        """Ritorna metadati e anteprima di un articolo, senza leggerne il testo"""
+        article = self._cached_article(article_id)
+        if article is not None:
+            return article  # prefetched with the page: body already in memory
         self.cursor.execute(
-            "SELECT * FROM t_articoli WHERE id_articolo = ?", (article_id,)
+            "SELECT a.id_articolo, a.data, a.argomento, a.titolo_articolo, "
+            "a.sotto_titolo, a.contatore_visite, a.esportato, "
+            "p.anteprima, p.caratteri, p.parole "
+            "FROM t_articoli a "
+            "LEFT JOIN t_articoli_preview p ON p.id_articolo = a.id_articolo "
+            "WHERE a.id_articolo = ?",
+            (article_id,),
         )
         return self.cursor.fetchone()
 
     def get_argomenti(self):
         """Ritorna la lista degli argomenti con conteggio"""
+        # Kept current by triggers (migration v4): no scan of t_articoli
         self.cursor.execute(
             """
-            SELECT argomento, COUNT(*) as cnt
-            FROM t_articoli
-            GROUP BY argomento
-            ORDER BY cnt DESC
+            SELECT t.nome AS argomento, s.articoli AS cnt, s.esportati
+            FROM argomento_stats s
+            LEFT JOIN topics t USING (id_topic)
+            ORDER BY s.articoli DESC, t.nome
         """
         )
         return self.cursor.fetchall()
@@ -144,6 +595,8 @@ class ArticoliExplorer:
 
         if self.current_filter:
             print(f"  🏷️  Filtro attivo: {self.current_filter}")
+        if self.current_period:
+            print(f"  📅 Periodo: {self.current_period}")
         if self.current_search:
             print(f"  🔍 Ricerca: '{self.current_search}'")
         print()
@@ -190,6 +643,12 @@ class ArticoliExplorer:
                     # subsequent lines aligned with label
                     print(f"          {line}")
 
+            # Search results: matching excerpt with [highlighted] terms
+            snippet = art["snippet"] if "snippet" in art.keys() else None
+            if snippet:
+                for line in textwrap.wrap(" ".join(snippet.split()), width=68):
+                    print(f"          {line}")
+
             print("-" * 70)
 
         print("-" * 70)
@@ -200,14 +659,28 @@ class ArticoliExplorer:
         print("    [numero]  - Seleziona articolo (1-10)")
         print("    [n]ext    - Pagina successiva")
         print("    [p]rev    - Pagina precedente")
+        print("    [d]ata    - Vai a una data (AAAA[-MM[-GG]])")
+        print("    [i]d      - Vai a un articolo per ID")
         print("    [f]iltra  - Filtra per argomento")
-        print("    [s]earch  - Cerca per titolo")
+        print("    [t]empo   - Filtra per periodo (AAAA[-MM[-GG]] o DA..A)")
+        print("    [s]earch  - Cerca nel titolo e nel testo")
         print("    [e]xport  - Esporta pagina corrente")
-        print("    [a]ll     - Esporta risultati della ricerca (max 50)")
+        print("    [a]ll     - Esporta tutti i risultati (filtri e ricerca attivi)")
         print("    [r]eset   - Rimuovi filtri")
         print("    [q]uit    - Esci")
         print()
 
+    def _article_preview(self, article):
+        """Ritorna (anteprima, caratteri, parole), calcolata all'import"""
+        if "anteprima" in article.keys() and article["anteprima"] is not None:
+            return article["anteprima"], article["caratteri"], article["parole"]
+        # No stored preview: article without body, or written by another tool
+        if "testo_articolo" not in article.keys():
+            article = self.get_article_by_id(article["id_articolo"])
+        return preview.make_preview(
+            decode_body(article["testo_articolo"]) if article else None
+        )
+
     def show_article_detail(self, article):
         """Mostra i dettagli di un articolo"""
         self.clear_screen()
@@ -222,28 +695,14 @@ class ArticoliExplorer:
         print(f"  Sottotitolo: {article['sotto_titolo']}")
         print(f"  Visite:      {article['contatore_visite']}")
 
-        # Anteprima testo (senza HTML)
-        testo = article["testo_articolo"] or ""
-        # Pulisci escape sequences
-        testo = testo.replace("\\r\\n", "\n").replace("\\n", "\n").replace("\\r", "\n")
-        testo = testo.replace("\r\n", "\n").replace("\r", "\n")
-
-        if BS4_AVAILABLE:
-            soup = BeautifulSoup(testo, "html.parser")
-            testo_plain = soup.get_text(" ", strip=True)[:500]
-        else:
-            # Rimozione base dei tag HTML
-            import re
-
-            testo_plain = re.sub(r"<[^>]+>", " ", testo)
-            testo_plain = re.sub(r"\s+", " ", testo_plain)[:500]
-
+        anteprima, caratteri, parole = self._article_preview(article)
+        print(f"  Lunghezza:   {caratteri} caratteri, {parole} parole")
         print("\n  Anteprima testo:")
         print("-" * 70)
         # Dividi in righe da 68 caratteri
-        for i in range(0, len(testo_plain), 68):
-            print(f"  {testo_plain[i:i+68]}")
-        if len(testo) > 500:
+        for i in range(0, len(anteprima), 68):
+            print(f"  {anteprima[i:i+68]}")
+        if caratteri > len(anteprima):
             print("  [...]")
         print("-" * 70)
 
@@ -257,6 +716,8 @@ class ArticoliExplorer:
 
             if choice == "e":
                 # Export and mark as exported (non-blocking), then return to list
+                if "testo_articolo" not in article.keys():
+                    article = self.get_article_by_id(article["id_articolo"])
                 out = self.export_article(
                     article, interactive=False, mark_exported=True
                 )
@@ -272,85 +733,6 @@ class ArticoliExplorer:
             else:
                 print("  Comando non valido")
 
-    def _clean_text_content(self, text):
-        """Pulisce il testo convertendo escape sequences e normalizzando"""
-        if not text:
-            return ""
-
-        # Converti sequenze di escape letterali in caratteri reali
-        text = text.replace("\\r\\n", "\n")
-        text = text.replace("\\n", "\n")
-        text = text.replace("\\r", "\n")
-        text = text.replace("\r\n", "\n")
-        text = text.replace("\r", "\n")
-
-        # Rimuovi righe vuote multiple
-        import re
-
-        text = re.sub(r"\n{3,}", "\n\n", text)
-
-        return text.strip()
-
-    def _clean_html_for_docx(self, html):
-        """Pulisce l'HTML per renderlo compatibile con htmldocx"""
-        if not html:
-            return ""
-
-        import re
-
-        # Pulisci escape sequences
-        html = self._clean_text_content(html)
-
-        # Rimuovi tag non supportati da htmldocx
-        unsupported_tags = [
-            "INPUT",
-            "TEXTAREA",
-            "SELECT",
-            "FORM",
-            "SCRIPT",
-            "STYLE",
-            "IFRAME",
-            "OBJECT",
-            "EMBED",
-        ]
-        for tag in unsupported_tags:
-            html = re.sub(
-                rf"<{tag}[^>]*>.*?</{tag}>", "", html, flags=re.IGNORECASE | re.DOTALL
-            )
-            html = re.sub(rf"<{tag}[^>]*/?\s*>", "", html, flags=re.IGNORECASE)
-
-        # Rimuovi attributi problematici (namespace XML, eventi JS)
-        html = re.sub(r"<\?xml[^>]*\?>", "", html)
-        html = re.sub(r'xmlns\s*=\s*["\'][^"\']*["\']', "", html)
-        html = re.sub(r'on\w+\s*=\s*["\'][^"\']*["\']', "", html, flags=re.IGNORECASE)
-
-        # Converti tag obsoleti
-        html = re.sub(r"<FONT[^>]*>", "", html, flags=re.IGNORECASE)
-        html = re.sub(r"</FONT>", "", html, flags=re.IGNORECASE)
-
-        # Sistema tag vuoti che possono causare problemi
-        html = re.sub(r"<([a-zA-Z]+)[^>]*>\s*</\1>", "", html)
-
-        # Assicura che l'HTML sia wrappato in un tag root
-        if not html.strip().startswith("<"):
-            html = f"<p>{html}</p>"
-
-        return html
-
-    def _is_html_content(self, text):
-        """Verifica se il testo contiene HTML significativo"""
-        if not text:
-            return False
-        # Cerca tag HTML comuni (non solo <br> o &nbsp;)
-        import re
-
-        html_tags = re.findall(
-            r"<(?:p|div|table|tr|td|h[1-6]|ul|ol|li|strong|em|b|i|a|span|font)[^>]*>",
-            text,
-            re.IGNORECASE,
-        )
-        return len(html_tags) > 0
-
     def export_article(self, article, interactive=True, mark_exported: bool = False):
         """Esporta l'articolo in formato DOCX.
 
@@ -366,103 +748,44 @@ class ArticoliExplorer:
                 logging.error("python-docx non installato; impossibile esportare")
             return None
 
-        # Crea il documento
-        doc = Document()
-
-        # Titolo
-        title = doc.add_heading(article["titolo_articolo"] or "Senza titolo", 0)
-        title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-
-        # Sottotitolo
-        try:
-            sotto = article["sotto_titolo"]
-        except Exception:
-            sotto = None
-        if sotto:
-            subtitle = doc.add_paragraph(sotto)
-            subtitle.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            for run in subtitle.runs:
-                run.italic = True
-
-        # Metadati
-        doc.add_paragraph()
-        meta = doc.add_paragraph()
-        meta.add_run("Data: ").bold = True
-        try:
-            data_val = article["data"]
-        except Exception:
-            data_val = None
-        meta.add_run(str(data_val or "N/D"))
-        meta.add_run("  |  ")
-        meta.add_run("Argomento: ").bold = True
-        try:
-            arg_val = article["argomento"]
-        except Exception:
-            arg_val = None
-        meta.add_run(str(arg_val or "N/D"))
-
-        doc.add_paragraph()
-        doc.add_paragraph("─" * 50)
-        doc.add_paragraph()
-
-        # Contenuto - pulisci prima il testo
-        try:
-            testo_raw = article["testo_articolo"]
-        except Exception:
-            testo_raw = ""
-        testo_pulito = self._clean_text_content(testo_raw)
-
-        # Verifica se è HTML vero o testo semplice
-        if self._is_html_content(testo_pulito) and HTMLDOCX_AVAILABLE:
-            try:
-                testo_html = self._clean_html_for_docx(testo_pulito)
-                parser = HtmlToDocx()
-                parser.add_html_to_document(testo_html, doc)
-            except Exception:
-                self._add_plain_text(doc, testo_pulito)
-        else:
-            self._add_plain_text(doc, testo_pulito)
-
-        # Salva il documento nella cartella export
-        try:
-            raw_title = article["titolo_articolo"]
-        except Exception:
-            raw_title = "articolo"
-        safe_title = "".join(
-            c for c in (raw_title or "articolo") if c.isalnum() or c in (" ", "-", "_")
-        )[:50]
-        filename = f"articolo_{article['id_articolo']}_{safe_title}.docx"
-
-        # Crea la cartella export se non esiste
-        export_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "export")
-        os.makedirs(export_dir, exist_ok=True)
-        filepath = os.path.join(export_dir, filename)
-
-        try:
-            doc.save(filepath)
+        filename = docx_export.export_path(article, self.export_layout)
+        manifest = self._manifest()
+        filepath = manifest.unchanged(article)
+        if filepath:
             if interactive:
-                print(f"\n  ✅ Articolo esportato: export/{filename}")
+                print(f"\n  ✅ Articolo invariato, già esportato: export/{filename}")
             else:
-                logging.info(f"Esportato: export/{filename}")
-        except Exception as e:
-            if interactive:
-                print(f"\n  ❌ Errore salvataggio: {e}")
-            else:
-                logging.error(f"Errore salvataggio: {e}")
-            return None
-
-        # Mark the article as exported in the DB if requested
-        if mark_exported:
+                logging.info(f"Invariato: export/{filename}")
+        else:
             try:
-                self.cursor.execute(
-                    ("UPDATE t_articoli SET esportato = 1 " "WHERE id_articolo = ?"),
-                    (article["id_articolo"],),
+                filepath = docx_export.write_article(
+                    article,
+                    self.export_dir,
+                    self.export_template,
+                    self.export_renderer,
+                    self.export_layout,
                 )
-                self.conn.commit()
+                if interactive:
+                    print(f"\n  ✅ Articolo esportato: export/{filename}")
+                else:
+                    logging.info(f"Esportato: export/{filename}")
             except Exception as e:
-                logging.error(
-                    f"Errore marcatura esportato per {article['id_articolo']}: {e}"
-                )
+                if interactive:
+                    print(f"\n  ❌ Errore salvataggio: {e}")
+                else:
+                    logging.error(f"Errore salvataggio: {e}")
+                manifest.discard(article["id_articolo"])
+                manifest.save()
+                return None
+            manifest.record(article["id_articolo"], filepath)
+            manifest.save()
+
+        # Mark the article as exported in the DB if requested
+        if mark_exported:
+            self.reconcile_exports()
+            journal = ExportJournal(self.export_dir)
+            journal.record(article["id_articolo"])
+            self._mark_journaled(journal)
 
         if interactive:
             input("\n  Premi INVIO per continuare...")
@@ -487,86 +810,399 @@ class ArticoliExplorer:
             articles = articles[:limit]
             total = limit
 
-        # Use tqdm if available
-        try:
-            from tqdm import tqdm
+        # Resolve every full record first: marking an article as exported
+        # clears the caches, including articles prefetched with the page
+        full_articles = [self._full_article(art) for art in articles]
+        full_articles = [dict(a) for a in full_articles if a is not None]
 
-            iterator = tqdm(articles, total=total, unit="articolo", ncols=80)
-        except Exception:
-            iterator = articles
+        exported_count = self._export_stream(full_articles, total, mark_exported)
+        logging.info(f"Esportati: {exported_count}/{total} articoli")
+        return exported_count
 
-        exported_count = 0
-        for art in iterator:
-            # art can be a sqlite Row with limited columns (summary view)
-            # Ensure we always have a full article record before exporting
-            article = art
+    def _full_article(self, art):
+        """Ritorna l'articolo completo per una riga di elenco (None se assente)"""
+        # art can be a sqlite Row with limited columns (summary view)
+        # Ensure we always have a full article record before exporting
+        article = art
+        try:
+            has_text = "testo_articolo" in article.keys()
+        except Exception:
+            # If it's not a mapping-like object, attempt to fetch by id positionally
             try:
-                has_text = "testo_articolo" in article.keys()
+                article_id = article[0]
             except Exception:
-                # If it's not a mapping-like object, attempt to fetch by id positionally
-                try:
-                    article_id = article[0]
-                except Exception:
-                    logging.error("Articolo con formato inatteso, salto")
-                    continue
-                article = self.get_article_by_id(article_id)
-                if not article:
-                    logging.error(f"Articolo {article_id} non trovato, salto")
-                    continue
-                has_text = True
+                logging.error("Articolo con formato inatteso, salto")
+                return None
+            article = self.get_article_by_id(article_id)
+            if not article:
+                logging.error(f"Articolo {article_id} non trovato, salto")
+                return None
+            has_text = True
+
+        if not has_text:
+            article_id = article["id_articolo"]
+            full = self.get_article_by_id(article_id)
+            if not full:
+                logging.error(f"Articolo {article_id} non trovato, salto")
+                return None
+            article = full
+        return article
+
+    def iter_results(self, limit=None, exported=None, batch_size=EXPORT_BATCH):
+        """Articoli completi dei risultati correnti, letti a blocchi.
+
+        Same filters and search as the list (search results by relevance);
+        `exported` optionally keeps only exported (True) or new (False)
+        articles. Yields dicts with the body decoded.
+        """
+        # Only the native renderer reads the cached blocks of the bodies
+        with_blocks = self.export_renderer == "native"
+        sql, params = self._results_query(
+            query.ARTICLE_COLUMNS, limit, exported, with_blocks
+        )
+        columns = query.ARTICLE_COLUMNS + (
+            (blocks.BLOCKS_FIELD,) if with_blocks else ()
+        )
+        rows = query.iter_rows(self.conn, sql, params, columns, batch_size)
+        try:
+            for row in rows:
+                yield dict(zip(columns, row))
+        finally:
+            rows.close()
+
+    def _results_query(self, columns, limit=None, exported=None, with_blocks=False):
+        """(sql, params) dei risultati correnti, come l'elenco"""
+        match = self._match_query()
+        return query.build_query(
+            columns,
+            match=match,
+            order="rilevanza" if match else "data",
+            limit=limit,
+            with_blocks=with_blocks,
+            argomento=self.current_filter,
+            period=self.current_period,
+            like=None if match else self.current_search,
+            exported=exported,
+        )
 
-            if not has_text:
-                article_id = article["id_articolo"]
-                full = self.get_article_by_id(article_id)
-                if not full:
-                    logging.error(f"Articolo {article_id} non trovato, salto")
+    def export_results(
+        self, limit=None, only_new=False, mark_exported=True, bundle=None
+    ):
+        """Esporta tutti i risultati correnti (filtri e ricerca attivi).
+
+        Articles are streamed in chunks of EXPORT_BATCH, so memory use does
+        not grow with the result set; `limit` optionally caps the count.
+        `bundle` ("docx" or "zip", see lib/docx_bundle.py) writes a single
+        file instead of one DOCX per article. Returns the number of
+        articles exported.
+        """
+        total = None if only_new else self.get_total_count()
+        if total is not None and limit is not None:
+            total = min(total, limit)
+        articles = self.iter_results(limit=limit, exported=False if only_new else None)
+        try:
+            if bundle:
+                exported_count = self._export_bundle(
+                    articles, total, mark_exported, bundle
+                )
+            else:
+                exported_count = self._export_stream(articles, total, mark_exported)
+        finally:
+            articles.close()
+        logging.info(f"Esportati: {exported_count} articoli")
+        return exported_count
+
+    def _export_stream(self, articles, total, mark_exported):
+        """Scrive i DOCX di `articles` (dict completi) e marca gli esportati.
+
+        Large exports are rendered by a process pool (lib/docx_export.py);
+        the IDs written are journaled and marked in batches of MARK_BATCH,
+        also when the export is interrupted. Returns the number of files
+        written.
+        """
+        if not DOCX_AVAILABLE:
+            logging.error("python-docx non installato; impossibile esportare")
+            return 0
+        if mark_exported:
+            self.reconcile_exports()
+        journal = ExportJournal(self.export_dir)
+        manifest = self._manifest()
+
+        workers = self.export_workers or os.cpu_count() or 1
+        if workers > 1 and (total is None or total >= PARALLEL_MIN_ARTICLES):
+            results = docx_export.export_parallel(
+                articles,
+                self.export_dir,
+                workers,
+                self.export_template,
+                self.export_renderer,
+                manifest.unchanged,
+                self.export_layout,
+            )
+        else:
+            results = docx_export.export_serial(
+                articles,
+                self.export_dir,
+                self.export_template,
+                self.export_renderer,
+                manifest.unchanged,
+                self.export_layout,
+            )
+
+        iterator = _progress(results, total)
+        exported_count = 0
+        unmarked = 0
+        try:
+            for article_id, filepath, error in iterator:
+                if filepath is None:
+                    logging.error(f"Errore salvataggio articolo {article_id}: {error}")
+                    manifest.discard(article_id)
                     continue
-                article = full
+                relpath = os.path.relpath(filepath, self.export_dir)
+                logging.info(f"Esportato: export/{relpath}")
+                manifest.record(article_id, filepath)
+                exported_count += 1
+                unmarked += 1
+                if mark_exported:
+                    journal.record(article_id)
+                if unmarked >= MARK_BATCH:
+                    manifest.save()
+                    if mark_exported:
+                        self._mark_journaled(journal)
+                    unmarked = 0
+        finally:
+            results.close()
+            manifest.save()
+            if unmarked and mark_exported:
+                self._mark_journaled(journal)
+            journal.close()
+        if manifest.skipped:
+            logging.info(
+                f"{manifest.skipped} articoli invariati non rigenerati "
+                "(--force per rigenerarli)"
+            )
+        return exported_count
+
+    def export_queue(self, limit=None, only_new=False, mark_exported=True):
+        """Accoda i risultati correnti in export_jobs e svuota la coda.
+
+        The queue (lib/export_jobs.py) lives in the database: an interrupted
+        export resumes from the jobs left, and other processes running the
+        same export claim different articles. Returns the number of
+        articles exported by this process.
+        """
+        sql, params = self._results_query(
+            ("id_articolo",), limit, exported=False if only_new else None
+        )
+        added = export_jobs.enqueue(self._writer(), sql, params)
+        logging.info(f"Coda di export: {added} articoli aggiunti")
+        return self.drain_export_queue(mark_exported)
+
+    def drain_export_queue(self, mark_exported=True):
+        """Esporta i job di export_jobs finché ce ne sono da prendere.
 
-            out = self.export_article(
-                article, interactive=False, mark_exported=mark_exported
+        Jobs are claimed EXPORT_BATCH at a time, as the renderers need them,
+        and completed (marked `esportato` in the same transaction) in
+        batches of MARK_BATCH. Failed jobs are left to a later run, after
+        their retry delay. Returns the number of articles exported.
+        """
+        if not DOCX_AVAILABLE:
+            logging.error("python-docx non installato; impossibile esportare")
+            return 0
+        writer = self._writer()
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        manifest = self._manifest()
+
+        def claimed_articles():
+            while True:
+                article_ids = export_jobs.claim(writer, worker, EXPORT_BATCH)
+                if not article_ids:
+                    return
+                for article_id in article_ids:
+                    article = self.get_article_by_id(article_id)
+                    if article is None:
+                        export_jobs.fail(writer, worker, article_id, "non trovato")
+                        continue
+                    yield dict(article)
+
+        total = export_jobs.counts(writer)["claimable"]
+        workers = self.export_workers or os.cpu_count() or 1
+        if workers > 1 and total >= PARALLEL_MIN_ARTICLES:
+            results = docx_export.export_parallel(
+                claimed_articles(),
+                self.export_dir,
+                workers,
+                self.export_template,
+                self.export_renderer,
+                manifest.unchanged,
+                self.export_layout,
+            )
+        else:
+            results = docx_export.export_serial(
+                claimed_articles(),
+                self.export_dir,
+                self.export_template,
+                self.export_renderer,
+                manifest.unchanged,
+                self.export_layout,
             )
-            if out:
+
+        def complete(done):
+            completed = export_jobs.complete(writer, worker, done, mark_exported)
+            if completed < len(done):
+                logging.warning(
+                    f"{len(done) - completed} articoli ripresi da un altro processo "
+                    "dopo la scadenza della presa in carico"
+                )
+
+        exported_count = 0
+        done = []
+        try:
+            for article_id, filepath, error in _progress(results, total):
+                if filepath is None:
+                    logging.error(f"Errore salvataggio articolo {article_id}: {error}")
+                    manifest.discard(article_id)
+                    export_jobs.fail(writer, worker, article_id, error)
+                    continue
+                relpath = os.path.relpath(filepath, self.export_dir)
+                logging.info(f"Esportato: export/{relpath}")
+                manifest.record(article_id, filepath)
                 exported_count += 1
-        logging.info(f"Esportati: {exported_count}/{total} articoli")
+                done.append((article_id, relpath))
+                if len(done) >= MARK_BATCH:
+                    manifest.save()
+                    complete(done)
+                    done = []
+        finally:
+            results.close()
+            manifest.save()
+            if done:
+                complete(done)
+            # Articles claimed but never rendered (interrupted export)
+            export_jobs.release(writer, worker)
+            if mark_exported:
+                self.invalidate_caches()
+
+        export_jobs.purge_done(writer)
+        left = export_jobs.counts(writer)
+        if left[export_jobs.FAILED]:
+            logging.warning(
+                f"Coda di export: {left[export_jobs.FAILED]} articoli non esportati "
+                f"(nuovo tentativo dopo l'attesa, al massimo "
+                f"{export_jobs.MAX_ATTEMPTS} tentativi)"
+            )
         return exported_count
 
-    def _add_plain_text(self, doc, text_content):
-        """Aggiunge testo semplice al documento come paragrafi"""
-        # Pulisci il contenuto
-        text = self._clean_text_content(text_content)
+    def _export_bundle(self, articles, total, mark_exported, fmt):
+        """Scrive `articles` in un'unica raccolta DOCX o ZIP in export_dir.
 
-        # Se contiene tag HTML, rimuovili
-        if "<" in text:
-            if BS4_AVAILABLE:
-                soup = BeautifulSoup(text, "html.parser")
-                text = soup.get_text("\n", strip=True)
+        ZIP entries are rendered like loose files (in the process pool for
+        large exports); the combined DOCX needs each rendered document in
+        this process and is built serially. The articles are marked as
+        exported once the bundle is complete. Returns the number of
+        articles in the bundle.
+        """
+        if not DOCX_AVAILABLE:
+            logging.error("python-docx non installato; impossibile esportare")
+            return 0
+        if mark_exported:
+            self.reconcile_exports()
+        filename = docx_bundle.bundle_filename(self.current_filter, fmt)
+        path = os.path.join(self.export_dir, filename)
+        template, renderer = self.export_template, self.export_renderer
+        written = []
+        try:
+            if fmt == "zip":
+                workers = self.export_workers or os.cpu_count() or 1
+                if workers > 1 and (total is None or total >= PARALLEL_MIN_ARTICLES):
+                    results = docx_export.render_parallel(
+                        articles, workers, template, renderer
+                    )
+                else:
+                    results = docx_export.render_serial(articles, template, renderer)
+                with docx_bundle.ZipBundle(path) as bundle:
+                    try:
+                        for article_id, name, data, error in _progress(results, total):
+                            if data is None:
+                                logging.error(f"Errore articolo {article_id}: {error}")
+                                continue
+                            bundle.add(name, data)
+                            written.append(article_id)
+                    finally:
+                        results.close()
             else:
-                import re
+                with docx_bundle.DocxBundle(path, template) as bundle:
+                    for article in _progress(articles, total):
+                        try:
+                            with docx_export.base_document(template) as doc:
+                                docx_export.render_article(article, doc, renderer)
+                                bundle.add(article, doc)
+                        except Exception as e:
+                            logging.error(
+                                f"Errore articolo {article['id_articolo']}: {e}"
+                            )
+                            continue
+                        written.append(article["id_articolo"])
+        except Exception as e:
+            logging.error(f"Errore scrittura raccolta export/{filename}: {e}")
+            return 0
+        logging.info(f"Raccolta esportata: export/{filename} ({len(written)} articoli)")
 
-                text = re.sub(r"<br\s*/?>", "\n", text, flags=re.IGNORECASE)
-                text = re.sub(r"</p>", "\n", text, flags=re.IGNORECASE)
-                text = re.sub(r"<[^>]+>", "", text)
+        if mark_exported:
+            journal = ExportJournal(self.export_dir)
+            for start in range(0, len(written), MARK_BATCH):
+                for article_id in written[start : start + MARK_BATCH]:
+                    journal.record(article_id)
+                self._mark_journaled(journal)
+            journal.close()
+        return len(written)
+
+    def _manifest(self):
+        """Manifest dei DOCX già esportati con template e renderer correnti"""
+        return ExportManifest(
+            self.export_dir,
+            self.export_template,
+            self.export_renderer,
+            self.export_force,
+            self.export_layout,
+        )
 
-        # Decodifica entità HTML comuni
-        text = text.replace("&nbsp;", " ")
-        text = text.replace("&amp;", "&")
-        text = text.replace("&lt;", "<")
-        text = text.replace("&gt;", ">")
-        text = text.replace("&quot;", '"')
-        text = text.replace("&#39;", "'")
+    def reconcile_exports(self):
+        """Marca gli articoli rimasti nel journal da un export interrotto"""
+        journal = ExportJournal(self.export_dir)
+        pending = journal.pending()
+        if pending:
+            logging.info(
+                f"Marcatura di {len(pending)} articoli esportati ma non marcati"
+            )
+            self._mark_journaled(journal)
 
-        # Pulisci spazi multipli
-        import re
+    def _mark_journaled(self, journal):
+        """Marca tutti gli articoli del journal e, se riesce, lo svuota"""
+        # The whole journal, not just the last batch: IDs of a batch that
+        # failed to commit are still in it
+        pending = journal.pending()
+        if pending and self._mark_exported(pending):
+            journal.clear()
 
-        text = re.sub(r" +", " ", text)
-        text = re.sub(r"\n{3,}", "\n\n", text)
+    def _mark_exported(self, article_ids):
+        """Marca gli articoli come esportati, in un'unica transazione.
 
-        # Aggiungi ogni paragrafo
-        for paragraph in text.split("\n"):
-            paragraph = paragraph.strip()
-            if paragraph:
-                doc.add_paragraph(paragraph)
+        Returns False if the database could not be updated (the IDs then
+        stay in the export journal).
+        """
+        try:
+            writer = self._writer()
+            writer.executemany(
+                "UPDATE t_articoli SET esportato = 1 WHERE id_articolo = ?",
+                [(article_id,) for article_id in article_ids],
+            )
+            writer.commit()
+        except Exception as e:
+            logging.error(f"Errore marcatura esportato per {list(article_ids)}: {e}")
+            return False
+        self.invalidate_caches()
+        return True
 
     def show_filter_menu(self):
         """Mostra il menu per filtrare per argomento"""
@@ -577,8 +1213,10 @@ class ArticoliExplorer:
 
         argomenti = self.get_argomenti()
 
-        for i, (arg, cnt) in enumerate(argomenti, 1):
-            print(f"  {i:2}. {arg:<40} ({cnt} articoli)")
+        for i, (arg, cnt, esportati) in enumerate(argomenti, 1):
+            print(
+                f"  {i:2}. {arg or 'N/D':<40} ({cnt} articoli, {esportati} esportati)"
+            )
 
         print(f"\n  {0}. Rimuovi filtro")
         print()
@@ -587,13 +1225,12 @@ class ArticoliExplorer:
             choice = input("  Seleziona numero: ").strip()
             if choice == "0":
                 self.current_filter = None
-                self.current_page = 0
+                self.reset_position()
             elif choice.isdigit():
                 idx = int(choice) - 1
                 if 0 <= idx < len(argomenti):
                     self.current_filter = argomenti[idx][0]
-                    self.current_search = None
-                    self.current_page = 0
+                    self.reset_position()
         except (ValueError, IndexError):
             pass
 
@@ -601,6 +1238,8 @@ class ArticoliExplorer:
         """Avvia l'interfaccia interattiva"""
         if not self.connect():
             return
+        if self.prefetch:
+            self.start_prefetch()
 
         try:
             while True:
@@ -622,31 +1261,53 @@ class ArticoliExplorer:
                 if choice.isdigit():
                     idx = int(choice) - 1
                     if 0 <= idx < len(articles):
-                        article = self.get_article_by_id(articles[idx]["id_articolo"])
+                        article = self.get_article_detail(articles[idx]["id_articolo"])
                         if article:
                             self.show_article_detail(article)
 
                 # Navigazione
                 elif choice in ("n", "next"):
-                    total = self.get_total_count()
-                    total_pages = (total + self.page_size - 1) // self.page_size
-                    if self.current_page < total_pages - 1:
-                        self.current_page += 1
+                    self.next_page()
 
                 elif choice in ("p", "prev"):
-                    if self.current_page > 0:
-                        self.current_page -= 1
+                    self.prev_page()
+
+                elif choice in ("d", "data"):
+                    date_text = input("\n  Vai alla data (AAAA[-MM[-GG]]): ").strip()
+                    if date_text and not self.jump_to_date(date_text):
+                        print("\n  Nessun articolo trovato per quella data")
+                        input("  Premi INVIO per continuare...")
+
+                elif choice in ("i", "id"):
+                    id_text = input("\n  Vai all'articolo con ID: ").strip()
+                    if id_text.isdigit() and not self.jump_to_id(int(id_text)):
+                        print("\n  Articolo non trovato (con i filtri attivi)")
+                        input("  Premi INVIO per continuare...")
 
                 # Filtri
                 elif choice in ("f", "filtra"):
                     self.show_filter_menu()
 
                 elif choice in ("s", "search"):
-                    search = input("\n  Cerca nel titolo: ").strip()
+                    search = input('\n  Cerca (parole o "frase esatta"): ').strip()
                     if search:
                         self.current_search = search
-                        self.current_filter = None
-                        self.current_page = 0
+                        self.reset_position()
+
+                elif choice in ("t", "tempo"):
+                    period = input(
+                        "\n  Periodo (AAAA, AAAA-MM, AAAA-MM-GG o DA..A, "
+                        "vuoto = tutti): "
+                    ).strip()
+                    if not period:
+                        self.current_period = None
+                        self.reset_position()
+                    elif period_bounds(period):
+                        self.current_period = period
+                        self.reset_position()
+                    else:
+                        print("\n  Periodo non valido")
+                        input("  Premi INVIO per continuare...")
 
                 # Esporta pagina corrente
                 elif choice in ("e", "export"):
@@ -663,36 +1324,41 @@ class ArticoliExplorer:
                                 articles, mark_exported=True, limit=self.page_size
                             )
 
-                # Esporta risultati (max 50)
+                # Esporta tutti i risultati correnti
                 elif choice in ("a", "all"):
                     total_results = self.get_total_count()
                     if total_results == 0:
                         print("\n  Nessun articolo da esportare")
-                    elif total_results > 50:
-                        print(f"\n  Attenzione: {total_results} articoli (limite 50).")
-                        confirm = (
-                            input("  Vuoi esportare i primi 50 risultati? [y/N]: ")
-                            .strip()
-                            .lower()
+                        input("  Premi INVIO per continuare...")
+                        continue
+                    print(f"\n  {total_results} articoli con i filtri correnti.")
+                    answer = input(
+                        "  Quanti esportarne? [INVIO = tutti, 0 = annulla]: "
+                    ).strip()
+                    if answer and not answer.isdigit():
+                        print("\n  Numero non valido")
+                        input("  Premi INVIO per continuare...")
+                        continue
+                    limit = int(answer) if answer else None
+                    if limit == 0:
+                        continue
+                    answer = (
+                        input(
+                            "  Formato? [INVIO = un DOCX per articolo, "
+                            "d = DOCX unico con indice, z = archivio ZIP]: "
                         )
-                        if confirm == "y":
-                            # fetch first 50 results
-                            self.cursor.execute(
-                                "SELECT * FROM t_articoli ORDER BY data DESC LIMIT 50"
-                            )
-                            rows = self.cursor.fetchall()
-                            self.export_articles(rows, mark_exported=True, limit=50)
-                    else:
-                        self.cursor.execute(
-                            "SELECT * FROM t_articoli ORDER BY data DESC"
-                        )
-                        rows = self.cursor.fetchall()
-                        self.export_articles(rows, mark_exported=True, limit=50)
+                        .strip()
+                        .lower()
+                    )
+                    bundle = {"d": "docx", "z": "zip"}.get(answer)
+                    self.export_results(limit=limit, bundle=bundle)
+                    input("\n  Premi INVIO per continuare...")
 
                 elif choice in ("r", "reset"):
                     self.current_filter = None
                     self.current_search = None
-                    self.current_page = 0
+                    self.current_period = None
+                    self.reset_position()
 
                 # Esci
                 elif choice in ("q", "quit", "exit"):
@@ -714,21 +1380,124 @@ def check_dependencies():
         if HTMLDOCX_AVAILABLE
         else "⚠️ Non installato (export senza formattazione HTML)"
     )
-    bs_status = "✅ OK" if BS4_AVAILABLE else "⚠️ Non installato (anteprima base)"
+    bs_status = "✅ OK" if BS4_AVAILABLE else "⚠️ Non installato (richiesto da htmldocx)"
     logging.info("  - htmldocx:    " + hd_status)
     logging.info("  - beautifulsoup4: " + bs_status)
 
     if not DOCX_AVAILABLE:
         logging.warning("⚠️ Abilita export DOCX: installa python-docx, htmldocx")
-        logging.info("   e installa beautifulsoup4 (bs4) per anteprime migliori")
 
     logging.info("")
 
 
-def main():
+def run_query_command(argv):
+    """Sottocomando `query`: articoli filtrati in JSONL, CSV o tabella"""
+    parser = argparse.ArgumentParser(
+        prog="esplora_articoli.py query",
+        description="Interroga il database senza interfaccia interattiva",
+    )
+    parser.add_argument(
+        "db", nargs="?", default="articoli.db", help="Percorso del database SQLite"
+    )
+    parser.add_argument("--topic", help="Solo articoli di questo argomento")
+    parser.add_argument(
+        "--search", help='Cerca nel titolo e nel testo (parole o "frase esatta")'
+    )
+    parser.add_argument(
+        "--period", help="Periodo: AAAA, AAAA-MM, AAAA-MM-GG o DA..A (es. 2019..2020)"
+    )
+    exported = parser.add_mutually_exclusive_group()
+    exported.add_argument(
+        "--exported",
+        dest="exported",
+        action="store_const",
+        const=True,
+        help="Solo articoli già esportati",
+    )
+    exported.add_argument(
+        "--not-exported",
+        dest="exported",
+        action="store_const",
+        const=False,
+        help="Solo articoli non ancora esportati",
+    )
+    parser.add_argument("--id-min", type=int, help="ID minimo (incluso)")
+    parser.add_argument("--id-max", type=int, help="ID massimo (incluso)")
+    parser.add_argument(
+        "--columns",
+        default=",".join(query.DEFAULT_COLUMNS),
+        help="Colonne separate da virgola, tra: " + ", ".join(query.COLUMNS),
+    )
+    parser.add_argument("--format", choices=query.FORMATS, default="jsonl")
+    parser.add_argument(
+        "--order",
+        choices=query.ORDERS,
+        default="data",
+        help="Ordine: data (più recenti prima), id, rilevanza (con --search)",
+    )
+    parser.add_argument("--limit", type=int, help="Numero massimo di articoli")
+    parser.add_argument(
+        "--output", "-o", help="File di destinazione (default: standard output)"
+    )
+    args = parser.parse_args(argv)
+
+    if args.period and not period_bounds(args.period):
+        parser.error(f"periodo non valido: {args.period}")
+    if not os.path.exists(args.db):
+        parser.error(f"database '{args.db}' non trovato")
+    columns = tuple(c.strip() for c in args.columns.split(",") if c.strip())
+
+    prepare_database(args.db)
+    conn = open_readonly(args.db)
+    rows = None
+    try:
+        match = None
+        if args.search and fulltext.fulltext_available(conn):
+            match = fulltext.build_match_query(args.search)
+        try:
+            sql, params = query.build_query(
+                columns,
+                match=match,
+                order=args.order,
+                limit=args.limit,
+                argomento=args.topic,
+                period=args.period,
+                like=None if match else args.search,
+                exported=args.exported,
+                id_min=args.id_min,
+                id_max=args.id_max,
+            )
+        except ValueError as e:
+            parser.error(str(e))
+
+        rows = query.iter_rows(conn, sql, params, columns)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8", newline="") as out:
+                count = query.write_rows(rows, columns, args.format, out)
+            print(f"Scritti {count} articoli in {args.output}", file=sys.stderr)
+        else:
+            try:
+                query.write_rows(rows, columns, args.format, sys.stdout)
+                sys.stdout.flush()
+            except BrokenPipeError:
+                # Output piped into `head` & co.: stop quietly
+                devnull = os.open(os.devnull, os.O_WRONLY)
+                os.dup2(devnull, sys.stdout.fileno())
+    finally:
+        if rows is not None:
+            rows.close()  # finalise the cursor before the connection
+        conn.close()
+    return 0
+
+
+def main(argv=None):
     # Configura console per UTF-8 su Windows
     setup_console()
 
+    argv = list(argv) if argv is not None else sys.argv[1:]
+    if argv and argv[0] == "query":
+        sys.exit(run_query_command(argv[1:]))
+
     parser = argparse.ArgumentParser(description="Esplora il database degli articoli")
     parser.add_argument(
         "db", nargs="?", default="articoli.db", help="Percorso del database SQLite"
@@ -740,6 +1509,11 @@ def main():
         "--verbose", "-v", action="store_true", help="Modalità verbosa (debug)"
     )
     parser.add_argument("--no-emoji", action="store_true", help="Output senza emoji")
+    parser.add_argument(
+        "--no-prefetch",
+        action="store_true",
+        help="Non precaricare in background le pagine vicine",
+    )
     parser.add_argument(
         "--export-all",
         action="store_true",
@@ -754,9 +1528,47 @@ def main():
         "--export-limit",
         type=int,
         default=50,
-        help="Limite massimo articoli per export non-interattivo",
+        help="Limite massimo articoli per export non-interattivo (0 = nessuno)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Processi per l'export DOCX (default: uno per CPU, 1 = seriale)",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--template",
+        help="Documento .docx di partenza (stili, margini, intestazioni) per l'export",
+    )
+    parser.add_argument(
+        "--renderer",
+        choices=docx_export.RENDERERS,
+        default="htmldocx",
+        help="Conversione HTML dei testi: htmldocx o il renderer interno (native)",
+    )
+    parser.add_argument(
+        "--queue",
+        action="store_true",
+        help="Con --export-all: export tramite la coda export_jobs del database "
+        "(riprendibile, più processi insieme)",
+    )
+    parser.add_argument(
+        "--bundle",
+        choices=docx_bundle.BUNDLE_FORMATS,
+        help="Con --export-all: un unico DOCX con indice (docx) o un archivio ZIP",
+    )
+    parser.add_argument(
+        "--layout",
+        choices=docx_export.LAYOUTS,
+        default="flat",
+        help="Cartelle dell'export: flat (nessuna), year, month (anno/mese) o id "
+        "(migliaia di ID)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rigenera anche i DOCX degli articoli invariati dall'ultimo export",
+    )
+    args = parser.parse_args(argv)
 
     setup_logging(args.verbose, args.no_emoji)
 
@@ -771,37 +1583,38 @@ def main():
         logging.info("   Usa: python esplora_articoli.py <database.db>")
         sys.exit(1)
 
+    if args.template and not os.path.isfile(args.template):
+        logging.error(f"❌ Template '{args.template}' non trovato!")
+        sys.exit(1)
+
     # Non-blocking: se export non interattivo, salta richiesta INVIO
     if not args.export_all:
         input("Premi INVIO per avviare l'esplorazione...")
 
     explorer = ArticoliExplorer(args.db)
     explorer.page_size = args.page_size
+    explorer.prefetch = not args.no_prefetch
+    explorer.export_workers = args.workers
+    explorer.export_template = args.template
+    explorer.export_renderer = args.renderer
+    explorer.export_force = args.force
+    explorer.export_layout = args.layout
 
     # Non-interactive export flags
     if args.export_all:
         if not explorer.connect():
             sys.exit(1)
         try:
-            only_new = args.export_only_new
-            # fetch articles
-            if only_new:
-                explorer.cursor.execute(
-                    (
-                        "SELECT * FROM t_articoli WHERE esportato = 0 "
-                        "ORDER BY data DESC LIMIT ?"
-                    ),
-                    (args.export_limit,),
+            if args.queue:
+                exported = explorer.export_queue(
+                    limit=args.export_limit or None, only_new=args.export_only_new
                 )
             else:
-                explorer.cursor.execute(
-                    "SELECT * FROM t_articoli ORDER BY data DESC LIMIT ?",
-                    (args.export_limit,),
+                exported = explorer.export_results(
+                    limit=args.export_limit or None,
+                    only_new=args.export_only_new,
+                    bundle=args.bundle,
                 )
-            rows = explorer.cursor.fetchall()
-            exported = explorer.export_articles(
-                rows, mark_exported=True, limit=args.export_limit
-            )
             logging.info(
                 f"Export non-interattivo completato: {exported} articoli esportati"
             )
@@ -813,4 +1626,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Export workers are spawned processes: needed by frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     main()
@@ -95,13 +95,13 @@ import sqlite3
 conn = sqlite3.connect('$DB_NAME')
 cursor = conn.cursor()
 
-cursor.execute("SELECT COUNT(*) FROM t_articoli")
+cursor.execute("SELECT COALESCE(SUM(articoli), 0) FROM argomento_stats")
 total = cursor.fetchone()[0]
 
 cursor.execute("SELECT MIN(id_articolo), MAX(id_articolo) FROM t_articoli")
 min_id, max_id = cursor.fetchone()
 
-cursor.execute("SELECT COUNT(DISTINCT argomento) FROM t_articoli")
+cursor.execute("SELECT COUNT(*) FROM argomento_stats")
 argomenti = cursor.fetchone()[0]
 
 print(f"  Totale articoli: {total}")
@@ -110,10 +110,10 @@ print(f"  Argomenti univoci: {argomenti}")
 
 # Top 5 argomenti
 cursor.execute("""
-    SELECT argomento, COUNT(*) as cnt 
-    FROM t_articoli 
-    GROUP BY argomento 
-    ORDER BY cnt DESC 
+    SELECT t.nome, s.articoli
+    FROM argomento_stats s
+    LEFT JOIN topics t USING (id_topic)
+    ORDER BY s.articoli DESC
     LIMIT 5
 """)
 print(f"\n  Top 5 argomenti:")
@@ -18,8 +18,13 @@ import sqlite3
 import sys
 import os
 import argparse
+import gzip
 import logging
 import lib.parser as parser
+from lib import fulltext, migrations, preview
+from lib.body import encode_body
+from lib.connection import open_readwrite
+from lib.dates import DATA_EPOCH_SQL
 from lib.console import setup_console, set_emoji_mode
 
 
@@ -49,49 +54,19 @@ def clear_screen():
 
 def create_database_and_table(db_path):
     """Crea il database SQLite e la tabella se non esistono"""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    # Crea la tabella t_articoli
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS t_articoli (
-            id_articolo INTEGER PRIMARY KEY,
-            data TEXT,
-            argomento TEXT,
-            titolo_articolo TEXT,
-            sotto_titolo TEXT,
-            TITLE TEXT,
-            testo_articolo TEXT,
-            nr_attach INTEGER,
-            titolo_foto TEXT,
-            foto_path TEXT,
-            link_esterno TEXT,
-            contatore_visite INTEGER,
-            attivo INTEGER,
-            id_forum INTEGER,
-            ultimo_accesso TEXT,
-            scadenza TEXT,
-            esportato INTEGER DEFAULT 0
-        )
-    """
-    )
+    # WAL: explorer sessions keep reading while the import writes
+    conn = open_readwrite(db_path)
 
-    # Ensure backward-compatible migration: add 'esportato' column if missing
-    cursor.execute("PRAGMA table_info(t_articoli)")
-    cols = [row[1] for row in cursor.fetchall()]
-    if "esportato" not in cols:
-        try:
-            cursor.execute(
-                "ALTER TABLE t_articoli ADD COLUMN esportato INTEGER DEFAULT 0"
-            )
-        except sqlite3.OperationalError:
-            # Some SQLite versions may not allow ALTER; ignore safely
-            pass
-    conn.commit()
+    # Crea/aggiorna lo schema (vedi lib/migrations.py)
+    migrations.apply_migrations(conn)
     return conn
 
 
+# Sopra questa soglia di righe per file, gli indici secondari vengono
+# eliminati prima dell'import e ricostruiti alla fine
+BULK_INDEX_THRESHOLD = 1000
+
+
 # parse_sql_value moved to lib/parser.py (see lib/parser.py)
 
 
@@ -110,6 +85,7 @@ class ImportManager:
         self.replace_all_duplicates = False
         self.dry_run = False
         self.use_progress = False
+        self.compress_bodies = False
 
         # Statistiche
         self.imported_count = 0
@@ -117,9 +93,13 @@ class ImportManager:
         self.replaced_count = 0
         self.error_count = 0
 
+        # argomento -> id_topic, so that import never looks topics up in SQL
+        self.topic_ids = {}
+
     def connect(self):
         """Connette al database"""
         self.conn = create_database_and_table(self.db_path)
+        self.topic_ids = dict(self.conn.execute("SELECT nome, id_topic FROM topics"))
         self.conn.row_factory = sqlite3.Row
         self.cursor = self.conn.cursor()
 
@@ -138,7 +118,7 @@ class ImportManager:
 
     def get_db_stats(self):
         """Ritorna statistiche del database"""
-        self.cursor.execute("SELECT COUNT(*) FROM t_articoli")
+        self.cursor.execute("SELECT COALESCE(SUM(articoli), 0) FROM argomento_stats")
         count = self.cursor.fetchone()[0]
 
         if count > 0:
@@ -149,6 +129,21 @@ class ImportManager:
             return count, min_id, max_id
         return 0, None, None
 
+    def get_argomenti_count(self):
+        """Ritorna il numero di argomenti distinti"""
+        self.cursor.execute("SELECT COUNT(*) FROM argomento_stats")
+        return self.cursor.fetchone()[0]
+
+    def get_top_argomenti(self, limit=5):
+        """Ritorna gli argomenti con più articoli"""
+        self.cursor.execute(
+            "SELECT t.nome, s.articoli FROM argomento_stats s "
+            "LEFT JOIN topics t USING (id_topic) "
+            "ORDER BY s.articoli DESC LIMIT ?",
+            (limit,),
+        )
+        return self.cursor.fetchall()
+
     def print_header(self):
         """Stampa l'intestazione"""
         clear_screen()
@@ -269,6 +264,41 @@ class ImportManager:
             else:
                 print("  Scelta non valida!")
 
+    def get_topic_id(self, argomento):
+        """Ritorna l'id dell'argomento, aggiungendolo a topics se nuovo"""
+        if argomento is None:
+            return None
+        topic_id = self.topic_ids.get(argomento)
+        if topic_id is None:
+            self.cursor.execute("INSERT INTO topics (nome) VALUES (?)", (argomento,))
+            topic_id = self.topic_ids[argomento] = self.cursor.lastrowid
+        return topic_id
+
+    def store_body(self, article_id, text):
+        """Salva il testo in t_articoli_body (compresso se richiesto) e la sua
+        anteprima; un testo invariato (stesso hash) non viene riscritto"""
+        if text is None:
+            self.cursor.execute(
+                "DELETE FROM t_articoli_body WHERE id_articolo = ?", (article_id,)
+            )
+            return
+        digest = preview.body_hash(text)
+        self.cursor.execute(
+            "SELECT hash_testo FROM t_articoli_preview WHERE id_articolo = ?",
+            (article_id,),
+        )
+        stored = self.cursor.fetchone()
+        if stored is not None and stored[0] == digest:
+            return
+        self.cursor.execute(
+            "INSERT INTO t_articoli_body (id_articolo, testo_articolo) VALUES (?, ?) "
+            "ON CONFLICT (id_articolo) DO UPDATE "
+            "SET testo_articolo = excluded.testo_articolo "
+            "WHERE testo_articolo IS NOT excluded.testo_articolo",
+            (article_id, encode_body(text, self.compress_bodies)),
+        )
+        preview.store_preview(self.cursor, article_id, text, digest)
+
     def insert_article(self, values):
         """Inserisce o aggiorna un articolo"""
         try:
@@ -276,17 +306,49 @@ class ImportManager:
                 # Simula l'inserimento senza modificare il DB
                 logging.debug(f"DRY-RUN: insert {values[0]}")
                 return True
+            # An upsert rather than INSERT OR REPLACE: REPLACE deletes the
+            # old row without firing the delete triggers that keep
+            # argomento_stats and the full-text queue current. Rows go to the
+            # base tables: the t_articoli view cannot be the target of an upsert.
+            row = (
+                *values[:2],
+                self.get_topic_id(values[2]),
+                *values[3:6],
+                *values[7:],
+                values[1],  # -> data_epoch
+            )
             self.cursor.execute(
-                """
-                INSERT OR REPLACE INTO t_articoli (
-                    id_articolo, data, argomento, titolo_articolo, sotto_titolo,
-                    TITLE, testo_articolo, nr_attach, titolo_foto, foto_path,
+                f"""
+                INSERT INTO t_articoli_base (
+                    id_articolo, data, id_topic, titolo_articolo, sotto_titolo,
+                    TITLE, nr_attach, titolo_foto, foto_path,
                     link_esterno, contatore_visite, attivo, id_forum,
-                    ultimo_accesso, scadenza
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ultimo_accesso, scadenza, data_epoch
+                ) VALUES (
+                    ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
+                    {DATA_EPOCH_SQL.format("?")}
+                )
+                ON CONFLICT (id_articolo) DO UPDATE SET
+                    data = excluded.data,
+                    data_epoch = excluded.data_epoch,
+                    id_topic = excluded.id_topic,
+                    titolo_articolo = excluded.titolo_articolo,
+                    sotto_titolo = excluded.sotto_titolo,
+                    TITLE = excluded.TITLE,
+                    nr_attach = excluded.nr_attach,
+                    titolo_foto = excluded.titolo_foto,
+                    foto_path = excluded.foto_path,
+                    link_esterno = excluded.link_esterno,
+                    contatore_visite = excluded.contatore_visite,
+                    attivo = excluded.attivo,
+                    id_forum = excluded.id_forum,
+                    ultimo_accesso = excluded.ultimo_accesso,
+                    scadenza = excluded.scadenza,
+                    esportato = 0
             """,
-                values,
+                row,
             )
+            self.store_body(values[0], values[6])
             return True
         except sqlite3.Error as e:
             logging.error(f"Errore inserimento ID {values[0]}: {e}")
@@ -322,47 +384,20 @@ class ImportManager:
 
         logging.info(f"📂 Lettura file: {sql_file}")
 
-        # Leggi il file SQL
-        with open(filepath, "r", encoding="utf-8") as f:
+        # Leggi il file SQL (anche compresso .gz, vedi lib/dump_writer.py)
+        opener = gzip.open if filepath.endswith(".gz") else open
+        with opener(filepath, "rt", encoding="utf-8") as f:
             content = f.read()
 
         # Prima passata: conta le tuple
         logging.info("🔍 Analisi contenuto...")
-        insert_marker = "INSERT INTO `t_articoli`"
-        values_marker = "VALUES"
 
         # Estrai tutte le tuple
-        all_tuples = []
-        pos = 0
-        while True:
-            pos = content.find(insert_marker, pos)
-            if pos == -1:
-                break
-
-            values_pos = content.find(values_marker, pos)
-            if values_pos == -1:
-                break
-
-            search_pos = values_pos + len(values_marker)
-
-            while True:
-                values, next_pos = parser.extract_tuple_values(content, search_pos)
-
-                if values is None:
-                    break
-
-                if len(values) == 16:
-                    all_tuples.append(values)
-
-                search_pos = next_pos
-                while search_pos < len(content) and content[search_pos] in " \n\r\t":
-                    search_pos += 1
-
-                if search_pos >= len(content) or content[search_pos] != ",":
-                    break
-                search_pos += 1
-
-            pos = search_pos
+        all_tuples = [
+            values
+            for values in parser.iter_insert_tuples(content, "t_articoli")
+            if len(values) == 16
+        ]
 
         total = len(all_tuples)
         logging.info(f"📊 Trovati {total} articoli nel file")
@@ -371,7 +406,28 @@ class ImportManager:
             logging.warning("⚠️  Nessun articolo trovato nel file!")
             return False
 
-        # Seconda passata: importa con gestione duplicati
+        # Import massivo: gli indici secondari si ricostruiscono una volta
+        # sola alla fine, invece di aggiornarli riga per riga
+        defer_indexes = not self.dry_run and total >= BULK_INDEX_THRESHOLD
+        if defer_indexes:
+            logging.debug("Indici secondari sospesi durante l'import")
+            migrations.drop_secondary_indexes(self.conn)
+        try:
+            ok = self._import_tuples(all_tuples)
+        finally:
+            if defer_indexes:
+                logging.debug("Ricostruzione indici secondari...")
+                migrations.create_secondary_indexes(self.conn)
+
+        if not self.dry_run:
+            # Indicizza per la ricerca gli articoli inseriti/aggiornati
+            fulltext.sync_fulltext(self.conn)
+            preview.sync_previews(self.conn)
+        return ok
+
+    def _import_tuples(self, all_tuples):
+        """Seconda passata: importa le tuple con gestione duplicati"""
+        total = len(all_tuples)
         print("-" * 70)
 
         if self.use_progress:
@@ -473,6 +529,10 @@ class ImportManager:
         logging.info(f"\n📊 Totale nel database: {count} articoli")
         if count > 0:
             logging.info(f"   Range ID: {min_id} - {max_id}")
+            top = self.get_top_argomenti()
+            logging.info(f"   Argomenti: {self.get_argomenti_count()}")
+            for argomento, articoli in top:
+                logging.info(f"     - {argomento or 'N/D'}: {articoli} articoli")
         logging.info("=" * 70 + "\n")
 
     def run_interactive(self):
@@ -577,6 +637,11 @@ def main():
     parser.add_argument(
         "--progress", action="store_true", help="Mostra una barra di progresso con tqdm"
     )
+    parser.add_argument(
+        "--compress-bodies",
+        action="store_true",
+        help="Salva i testi degli articoli compressi con zlib",
+    )
     args = parser.parse_args()
 
     setup_logging(args.verbose, args.no_emoji)
@@ -616,6 +681,7 @@ def main():
 
     manager = ImportManager(db_path)
     manager.dry_run = args.dry_run
+    manager.compress_bodies = args.compress_bodies
     if args.skip_duplicates:
         manager.skip_all_duplicates = True
     if args.replace_duplicates:
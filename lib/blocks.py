@@ -0,0 +1,418 @@
+"""Block representation of article bodies, parsed once and cached by hash.
+
+`parse_body()` turns a body (HTML or plain text) into a small list of
+blocks, the representation every renderer works from: the native DOCX
+renderer (lib/html_docx.py), the plain-text paragraphs of the DOCX
+fallback and the previews (lib/preview.py). Blocks are plain lists,
+tuples and strings:
+
+- ("p", style, runs): a paragraph; `style` is a python-docx style name or
+  None (headings, "Quote", "List Bullet 2", ...), `runs` a list of
+  (text, fmt, href) with fmt a BOLD/ITALIC/UNDERLINE bitmask. A "\\n" in
+  the text is a line break.
+- ("table", rows): rows of cells, each cell a list of blocks.
+
+HTML is parsed with the standard library (html.parser). Only the markup
+found in the Ficiesse archive is mapped: paragraphs and headings, line
+breaks, bold/italic/underline, links, lists, tables and preformatted text.
+Other tags (span, font, Word's o:p, ...) are transparent; images, forms and
+scripts are left out. Plain-text bodies become one paragraph per line.
+
+`t_articoli_blocchi` (migration v10) caches the blocks as compact JSON
+(zlib-compressed when that is smaller, see lib/body.py), keyed by the body
+hash of `t_articoli_preview`: identical bodies share one entry, and a
+changed body simply has a new key. Entries are written with the previews;
+`sync_blocks()` fills the missing ones and drops those no body uses.
+Bump BLOCKS_VERSION when a change to the parser alters the blocks.
+
+Provides:
+- BOLD, ITALIC, UNDERLINE, BLOCKS_VERSION
+- clean_text_content(text), is_html_content(text)
+- html_to_blocks(html), text_paragraphs(text), parse_body(text)
+- blocks_to_text(blocks, separator)
+- encode_blocks(blocks), decode_blocks(value)
+- store_blocks(conn, digest, text), sync_blocks(conn)
+- article_blocks(article)
+"""
+
+import json
+import re
+from html.parser import HTMLParser
+
+from lib.body import decode_body, encode_body
+
+BLOCKS_TABLE = "t_articoli_blocchi"
+# Stored with each entry: entries of another version are parsed again
+BLOCKS_VERSION = 1
+# Article key (and query column) holding the cached blocks, still encoded
+BLOCKS_FIELD = "blocchi"
+
+BOLD = 1
+ITALIC = 2
+UNDERLINE = 4
+
+_SYNC_BATCH = 500
+
+_FORMAT_TAGS = {
+    "b": BOLD,
+    "strong": BOLD,
+    "i": ITALIC,
+    "em": ITALIC,
+    "u": UNDERLINE,
+}
+
+# Tags that end the current paragraph; the value is the style of the next one
+_BLOCK_STYLES = {
+    "p": None,
+    "div": None,
+    "center": None,
+    "address": None,
+    "pre": None,
+    "blockquote": "Quote",
+    "h1": "Heading 1",
+    "h2": "Heading 2",
+    "h3": "Heading 3",
+    "h4": "Heading 4",
+    "h5": "Heading 5",
+    "h6": "Heading 6",
+}
+
+_LIST_STYLES = {"ul": "List Bullet", "ol": "List Number"}
+
+# Tags whose content is not article text
+_SKIP_TAGS = {"script", "style", "head", "title", "select", "textarea", "object"}
+
+# HTML white space (not &nbsp;) collapses to one blank
+_SPACES = re.compile(r"[ \t\n\r\f]+")
+_SEPARATOR = "─" * 50
+
+# Same as \n{3,}, but with a literal prefix the regex engine searches fast
+_BLANK_LINES = re.compile("\n\n\n+")
+_HTML_TAG = re.compile(
+    r"<(?:p|div|table|tr|td|h[1-6]|ul|ol|li|strong|em|b|i|a|span|font)[^>]*>",
+    re.IGNORECASE,
+)
+
+# blocks_to_text(): blanks (&nbsp; included) and line breaks
+_TEXT_SPACES = re.compile(r"[ \t\f\v\xa0]+")
+_TEXT_NEWLINES = re.compile(r" *\n[ \n]*")
+
+
+def clean_text_content(text):
+    """Pulisce il testo convertendo escape sequences e normalizzando"""
+    if not text:
+        return ""
+
+    # Converti sequenze di escape letterali in caratteri reali
+    text = text.replace("\\r\\n", "\n")
+    text = text.replace("\\n", "\n")
+    text = text.replace("\\r", "\n")
+    text = text.replace("\r\n", "\n")
+    text = text.replace("\r", "\n")
+
+    # Rimuovi righe vuote multiple
+    text = _BLANK_LINES.sub("\n\n", text)
+
+    return text.strip()
+
+
+def is_html_content(text):
+    """Verifica se il testo contiene HTML significativo"""
+    if not text:
+        return False
+    # Cerca tag HTML comuni (non solo <br> o &nbsp;): basta il primo
+    return _HTML_TAG.search(text) is not None
+
+
+class _BlockBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks = []
+        self.targets = [self.blocks]  # block lists being filled (body, cells)
+        self.tables = []  # open tables: [rows, cell open]
+        self.runs = None  # runs of the open paragraph
+        self.style = None  # style of the next paragraph
+        self.formats = {BOLD: 0, ITALIC: 0, UNDERLINE: 0}
+        self.links = []
+        self.lists = []
+        self.pre = 0
+        self.skip = 0
+
+    # -- paragraphs -------------------------------------------------------
+
+    def flush(self):
+        """Chiude il paragrafo aperto (scartato se vuoto)"""
+        runs = self.runs
+        self.runs = None
+        if not runs:
+            return
+        if not self.pre:
+            text, fmt, href = runs[-1]
+            runs[-1] = (text.rstrip(" "), fmt, href)
+        if any(text.strip() for text, _, _ in runs):
+            self.targets[-1].append(("p", self.style, runs))
+
+    def add_text(self, text):
+        fmt = (
+            (BOLD if self.formats[BOLD] else 0)
+            | (ITALIC if self.formats[ITALIC] else 0)
+            | (UNDERLINE if self.formats[UNDERLINE] else 0)
+        )
+        href = self.links[-1] if self.links else None
+        if self.runs is None:
+            self.runs = []
+        runs = self.runs
+        if runs and runs[-1][1] == fmt and runs[-1][2] == href:
+            runs[-1] = (runs[-1][0] + text, fmt, href)
+        else:
+            runs.append((text, fmt, href))
+
+    def at_line_start(self):
+        return not self.runs or self.runs[-1][0][-1:] in ("", " ", "\n")
+
+    def block_style(self, tag):
+        if tag == "li":
+            depth = min(len(self.lists), 3)
+            style = _LIST_STYLES[self.lists[-1] if self.lists else "ul"]
+            return style if depth <= 1 else f"{style} {depth}"
+        return _BLOCK_STYLES[tag]
+
+    # -- tables -----------------------------------------------------------
+
+    def close_cell(self):
+        if self.tables and self.tables[-1][1]:
+            self.flush()
+            self.targets.pop()
+            self.tables[-1][1] = False
+
+    def open_cell(self):
+        self.close_cell()
+        rows = self.tables[-1][0]
+        if not rows:
+            rows.append([])
+        cell = []
+        rows[-1].append(cell)
+        self.targets.append(cell)
+        self.tables[-1][1] = True
+
+    # -- HTMLParser -------------------------------------------------------
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self.skip += 1
+        elif self.skip:
+            return
+        elif tag in _FORMAT_TAGS:
+            self.formats[_FORMAT_TAGS[tag]] += 1
+        elif tag == "a":
+            href = dict(attrs).get("href") or ""
+            if href.startswith("javascript:"):
+                href = ""
+            self.links.append(href.strip() or None)
+        elif tag == "br":
+            self.add_text("\n")
+        elif tag in _BLOCK_STYLES or tag == "li":
+            self.flush()
+            self.style = self.block_style(tag)
+            if tag == "pre":
+                self.pre += 1
+        elif tag in _LIST_STYLES:
+            self.flush()
+            self.lists.append(tag)
+        elif tag == "hr":
+            self.flush()
+            self.targets[-1].append(("p", None, [(_SEPARATOR, 0, None)]))
+        elif tag == "table":
+            self.flush()
+            self.tables.append([[], False])
+        elif tag == "tr" and self.tables:
+            self.close_cell()
+            self.tables[-1][0].append([])
+        elif tag in ("td", "th") and self.tables:
+            self.open_cell()
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in ("br", "hr"):
+            self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self.skip = max(0, self.skip - 1)
+        elif self.skip:
+            return
+        elif tag in _FORMAT_TAGS:
+            fmt = _FORMAT_TAGS[tag]
+            self.formats[fmt] = max(0, self.formats[fmt] - 1)
+        elif tag == "a":
+            if self.links:
+                self.links.pop()
+        elif tag in _BLOCK_STYLES or tag == "li":
+            self.flush()
+            self.style = None
+            if tag == "pre":
+                self.pre = max(0, self.pre - 1)
+        elif tag in _LIST_STYLES:
+            self.flush()
+            if self.lists:
+                self.lists.pop()
+        elif tag in ("td", "th"):
+            self.close_cell()
+        elif tag == "table" and self.tables:
+            self.close_cell()
+            rows, _ = self.tables.pop()
+            rows = [row for row in rows if row]
+            if rows:
+                self.targets[-1].append(("table", rows))
+
+    def handle_data(self, data):
+        if self.skip:
+            return
+        if not self.pre:
+            data = _SPACES.sub(" ", data)
+            if data[:1] == " " and self.at_line_start():
+                data = data[1:]
+            if not data:
+                return
+        self.add_text(data)
+
+    def close(self):
+        super().close()
+        while self.tables:
+            self.handle_endtag("table")
+        self.flush()
+
+
+def html_to_blocks(html):
+    """Analizza l'HTML di un articolo e ritorna la lista dei blocchi"""
+    builder = _BlockBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.blocks
+
+
+def text_paragraphs(text_content):
+    """Paragrafi di un testo semplice (eventuali tag rimossi)"""
+    # Pulisci il contenuto
+    text = clean_text_content(text_content)
+
+    # Se contiene tag HTML, li rimuove il parser dei blocchi (entità
+    # comprese), tenendo le righe del testo
+    if "<" in text:
+        parsed = html_to_blocks(text.replace("\n", "<br>"))
+        return [line for line in blocks_to_text(parsed).split("\n") if line]
+
+    # Decodifica entità HTML comuni
+    text = text.replace("&nbsp;", " ")
+    text = text.replace("&amp;", "&")
+    text = text.replace("&lt;", "<")
+    text = text.replace("&gt;", ">")
+    text = text.replace("&quot;", '"')
+    text = text.replace("&#39;", "'")
+
+    # Pulisci spazi multipli
+    text = re.sub(r" +", " ", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+
+    return [line.strip() for line in text.split("\n") if line.strip()]
+
+
+def parse_body(text):
+    """Blocchi del testo di un articolo, HTML o testo semplice"""
+    text = clean_text_content(text)
+    if is_html_content(text):
+        return html_to_blocks(text)
+    return [("p", None, [(line, 0, None)]) for line in text_paragraphs(text)]
+
+
+def _block_lines(blocks):
+    for block in blocks:
+        if block[0] == "p":
+            yield "".join(text for text, _, _ in block[2])
+        else:
+            for row in block[1]:
+                for cell in row:
+                    yield from _block_lines(cell)
+
+
+def blocks_to_text(blocks, separator="\n"):
+    """Testo semplice dei blocchi: un paragrafo (o cella) per riga"""
+    text = _TEXT_SPACES.sub(" ", "\n".join(_block_lines(blocks)))
+    text = _TEXT_NEWLINES.sub("\n", text).strip()
+    if separator != "\n":
+        text = text.replace("\n", separator)
+    return text
+
+
+def encode_blocks(blocks):
+    """Valore da salvare in t_articoli_blocchi: JSON compatto, compresso se
+    conviene"""
+    data = json.dumps(blocks, ensure_ascii=False, separators=(",", ":"))
+    return encode_body(data, compress=True)
+
+
+def decode_blocks(value):
+    """Blocchi salvati da encode_blocks() (liste al posto delle tuple)"""
+    return json.loads(decode_body(value))
+
+
+def store_blocks(conn, digest, text):
+    """Ritorna i blocchi del testo con hash `digest`, analizzandolo e
+    salvandolo solo se non sono già in cache"""
+    row = conn.execute(
+        f"SELECT blocchi FROM {BLOCKS_TABLE} WHERE hash_testo = ? AND versione = ?",
+        (digest, BLOCKS_VERSION),
+    ).fetchone()
+    if row is not None:
+        return decode_blocks(row[0])
+    blocks = parse_body(text)
+    conn.execute(
+        f"INSERT OR REPLACE INTO {BLOCKS_TABLE} (hash_testo, versione, blocchi) "
+        "VALUES (?, ?, ?)",
+        (digest, BLOCKS_VERSION, encode_blocks(blocks)),
+    )
+    return blocks
+
+
+def sync_blocks(conn):
+    """Allinea la cache ai testi: aggiunge i blocchi mancanti e rimuove
+    quelli di altre versioni o di testi non più usati. Returns the number
+    of bodies parsed.
+
+    Both are looked for with read queries first: when the cache is already
+    in line nothing is written, so the explorer does not wait for the write
+    lock of a running import (and works on read-only databases). The
+    caller's transaction is committed at the end.
+    """
+    stale = (
+        f"FROM {BLOCKS_TABLE} WHERE versione IS NOT ? OR hash_testo NOT IN "
+        "(SELECT hash_testo FROM t_articoli_preview WHERE hash_testo IS NOT NULL)"
+    )
+    if conn.execute(f"SELECT 1 {stale} LIMIT 1", (BLOCKS_VERSION,)).fetchone():
+        conn.execute(f"DELETE {stale}", (BLOCKS_VERSION,))
+    parsed = 0
+    while True:
+        # One body per hash: identical bodies are parsed once
+        rows = conn.execute(
+            "SELECT p.hash_testo, MIN(b.testo_articolo) FROM t_articoli_preview p "
+            "JOIN t_articoli_body b ON b.id_articolo = p.id_articolo "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {BLOCKS_TABLE} x "
+            "WHERE x.hash_testo = p.hash_testo) "
+            "GROUP BY p.hash_testo LIMIT ?",
+            (_SYNC_BATCH,),
+        ).fetchall()
+        if not rows:
+            break
+        for digest, stored in rows:
+            store_blocks(conn, digest, decode_body(stored))
+        parsed += len(rows)
+
+    conn.commit()
+    return parsed
+
+
+def article_blocks(article):
+    """Blocchi del testo di un articolo: quelli in cache se la riga li
+    include (colonna `blocchi`), altrimenti analizzando il testo"""
+    if BLOCKS_FIELD in article.keys() and article[BLOCKS_FIELD] is not None:
+        return decode_blocks(article[BLOCKS_FIELD])
+    return parse_body(decode_body(article["testo_articolo"]))
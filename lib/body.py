@@ -0,0 +1,148 @@
+"""Storage of article bodies in `t_articoli_body` (optionally zlib-compressed).
+
+Since migration v6 the bodies live in their own table, joined only when an
+article is shown or exported, so list queries never read the HTML. A body is
+stored either as TEXT (plain, readable from the sqlite3 shell) or as a BLOB
+holding the zlib-compressed UTF-8 text; `decode_body()` accepts both.
+
+Provides:
+- encode_body(text, compress)
+- decode_body(value)
+- compress_bodies(conn)
+
+Uso:
+    python -m lib.body articoli.db          # comprime i testi esistenti
+"""
+
+import argparse
+import sqlite3
+import sys
+import zlib
+
+from lib.migrations import apply_migrations
+
+BODY_TABLE = "t_articoli_body"
+
+# Shorter bodies are left as text: zlib would barely shrink them
+COMPRESS_MIN_BYTES = 256
+
+# Maintained by lib.preview and lib.fulltext, which import this module
+_PREVIEW_TABLE = "t_articoli_preview"
+_FTS_PENDING_TABLE = "t_articoli_fts_pending"
+
+_LEVEL = 6
+_BATCH = 500
+
+
+def encode_body(text, compress=False):
+    """Ritorna il valore da salvare in t_articoli_body per il testo `text`.
+
+    With `compress`, bodies of at least COMPRESS_MIN_BYTES are stored as a
+    zlib BLOB, but only if that is actually smaller than the text.
+    """
+    if text is None or not compress:
+        return text
+    raw = text.encode("utf-8")
+    if len(raw) < COMPRESS_MIN_BYTES:
+        return text
+    packed = zlib.compress(raw, _LEVEL)
+    return packed if len(packed) < len(raw) else text
+
+
+def decode_body(value):
+    """Ritorna il testo di un articolo, decomprimendolo se necessario"""
+    if isinstance(value, (bytes, memoryview)):
+        return zlib.decompress(value).decode("utf-8")
+    return value
+
+
+def compress_bodies(conn):
+    """Comprime i testi salvati in chiaro. Returns the number compressed.
+
+    The caller's transaction is committed at the end; run VACUUM afterwards
+    to give the freed pages back to the file system. Only the encoding
+    changes, so the previews and the full-text queue are left as they were,
+    although the triggers on t_articoli_body treat the rewrite as an edit.
+    """
+    tables = {
+        name
+        for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN "
+            f"('{_PREVIEW_TABLE}', '{_FTS_PENDING_TABLE}')"
+        )
+    }
+    compressed = 0
+    last_id = -1
+    while True:
+        rows = conn.execute(
+            f"SELECT id_articolo, testo_articolo FROM {BODY_TABLE} "
+            "WHERE id_articolo > ? AND typeof(testo_articolo) = 'text' "
+            "ORDER BY id_articolo LIMIT ?",
+            (last_id, _BATCH),
+        ).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        updates = []
+        for article_id, text in rows:
+            packed = encode_body(text, compress=True)
+            if isinstance(packed, bytes):
+                updates.append((packed, article_id))
+        if not updates:
+            continue
+        ids = [article_id for _, article_id in updates]
+        where = f"WHERE id_articolo IN ({', '.join('?' * len(ids))})"
+        previews = pending = []
+        if _PREVIEW_TABLE in tables:
+            previews = conn.execute(
+                f"SELECT * FROM {_PREVIEW_TABLE} {where}", ids
+            ).fetchall()
+        if _FTS_PENDING_TABLE in tables:
+            pending = conn.execute(
+                f"SELECT id_articolo FROM {_FTS_PENDING_TABLE} {where}", ids
+            ).fetchall()
+        conn.executemany(
+            f"UPDATE {BODY_TABLE} SET testo_articolo = ? WHERE id_articolo = ?",
+            updates,
+        )
+        # Undo what the triggers did: same text, same preview and index
+        if _PREVIEW_TABLE in tables:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {_PREVIEW_TABLE} VALUES (?, ?, ?, ?, ?)",
+                previews,
+            )
+        if _FTS_PENDING_TABLE in tables:
+            queued = {article_id for (article_id,) in pending}
+            conn.executemany(
+                f"DELETE FROM {_FTS_PENDING_TABLE} WHERE id_articolo = ?",
+                [(i,) for i in ids if i not in queued],
+            )
+        compressed += len(updates)
+    conn.commit()
+    return compressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Comprime con zlib i testi degli articoli già importati"
+    )
+    parser.add_argument("db", help="Database SQLite")
+    parser.add_argument(
+        "--no-vacuum", action="store_true", help="Non eseguire VACUUM alla fine"
+    )
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(args.db)
+    try:
+        apply_migrations(conn)
+        count = compress_bodies(conn)
+        if not args.no_vacuum:
+            conn.execute("VACUUM")
+    finally:
+        conn.close()
+    print(f"Compressi {count} testi in {args.db}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""Connection factory shared by the importer and the explorer.
+
+The database runs in WAL mode, where readers work on the last committed
+snapshot: any number of explorer sessions can browse while one importer
+writes, and neither waits for the other. Writers use `open_readwrite()`,
+which also switches the file to WAL; browsing sessions use
+`open_readonly()`, which cannot take the write lock by mistake and reads
+through a memory map.
+
+Provides:
+- BUSY_TIMEOUT_MS, MMAP_SIZE
+- open_readwrite(db_path)
+- open_readonly(db_path)
+"""
+
+import logging
+import sqlite3
+from pathlib import Path
+
+# How long a connection waits for a lock before "database is locked"
+BUSY_TIMEOUT_MS = 5000
+
+# Upper bound of the memory map used by read-only connections
+MMAP_SIZE = 256 * 1024 * 1024
+
+
+def enable_wal(conn):
+    """Passa il database in modalità WAL. Returns True if it is now in WAL.
+
+    The journal mode is stored in the file, so this is a no-op after the
+    first time. Switching needs a moment without other connections: if
+    that is not possible now, the database keeps its current mode.
+    """
+    try:
+        mode = conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+    except sqlite3.OperationalError as e:
+        logging.debug(f"Modalità WAL non attivata: {e}")
+        return False
+    return mode.lower() == "wal"
+
+
+def open_readwrite(db_path):
+    """Connessione in lettura/scrittura (import, migrazioni, marcature)"""
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000)
+    enable_wal(conn)
+    return conn
+
+
+def open_readonly(db_path, mmap_size=MMAP_SIZE):
+    """Connessione in sola lettura (URI `mode=ro`), righe come sqlite3.Row"""
+    uri = Path(db_path).resolve().as_uri() + "?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, timeout=BUSY_TIMEOUT_MS / 1000)
+    conn.execute("PRAGMA query_only = ON")
+    conn.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+    conn.row_factory = sqlite3.Row
+    return conn
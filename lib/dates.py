@@ -0,0 +1,75 @@
+"""Article dates as sortable integers (`data_epoch`) and date-range filters.
+
+`data` keeps the MySQL datetime text as imported. Since migration v8 the
+base table also stores `data_epoch`: seconds since 1970-01-01 (the naive
+datetime read as UTC), NULL for missing, zero ('0000-00-00 00:00:00') or
+invalid dates. The explorer sorts, pages and filters on it.
+
+Provides:
+- DATA_EPOCH_SQL
+- period_bounds(text)
+"""
+
+import calendar
+import re
+
+# SQL expression deriving data_epoch from a datetime text: strftime()
+# returns NULL for MySQL zero dates and anything it cannot parse
+DATA_EPOCH_SQL = "CAST(strftime('%s', {}) AS INTEGER)"
+
+_PERIOD = re.compile(r"^(\d{4})(?:-(\d{1,2})(?:-(\d{1,2}))?)?$")
+
+
+def _epoch(year, month=1, day=1):
+    return calendar.timegm((year, month, day, 0, 0, 0))
+
+
+def _single_period(text):
+    """(inizio, fine) di AAAA, AAAA-MM o AAAA-MM-GG, fine esclusa"""
+    match = _PERIOD.match(text)
+    if not match:
+        return None
+    year = int(match.group(1))
+    month = int(match.group(2)) if match.group(2) else None
+    day = int(match.group(3)) if match.group(3) else None
+    if month is None:
+        return _epoch(year), _epoch(year + 1)
+    if not 1 <= month <= 12:
+        return None
+    if day is None:
+        end = _epoch(year + 1) if month == 12 else _epoch(year, month + 1)
+        return _epoch(year, month), end
+    if not 1 <= day <= calendar.monthrange(year, month)[1]:
+        return None
+    start = _epoch(year, month, day)
+    return start, start + 86400
+
+
+def period_bounds(text):
+    """Converte un periodo in limiti (inizio, fine) su data_epoch.
+
+    Accepts YYYY, YYYY-MM, YYYY-MM-DD, or a range FROM..TO of those, where
+    either side may be omitted ("2019..", "..2020-06"). The end is exclusive
+    and None means unbounded. Returns None if the text is not a period.
+    """
+    text = (text or "").strip()
+    if ".." not in text:
+        return _single_period(text)
+
+    first, last = (part.strip() for part in text.split("..", 1))
+    if not first and not last:
+        return None
+    start = end = None
+    if first:
+        bounds = _single_period(first)
+        if bounds is None:
+            return None
+        start = bounds[0]
+    if last:
+        bounds = _single_period(last)
+        if bounds is None:
+            return None
+        end = bounds[1]
+    if start is not None and end is not None and start >= end:
+        return None
+    return start, end
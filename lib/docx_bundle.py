@@ -0,0 +1,241 @@
+"""Bundles of exported articles: one combined DOCX or one ZIP archive.
+
+Both are written while the articles are streamed, so memory use does not
+depend on how many articles a bundle holds:
+
+- ZipBundle stores each rendered DOCX (bytes, straight from memory) as an
+  entry of a ZIP archive;
+- DocxBundle appends the body of each rendered article (see
+  docx_export.render_article) to a temporary file, with a page break
+  between articles and a bookmark on each title. On close() the document
+  is assembled: a table of contents linking the bookmarks, then the
+  bodies copied from the temporary file in chunks. Styles, page setup and
+  the other parts come from the template; hyperlinks, images and styles
+  added by the articles are carried over.
+
+Bundles are written to `<path>.tmp` and renamed when complete, so an
+interrupted export never leaves a truncated bundle behind.
+
+Provides:
+- BUNDLE_FORMATS
+- bundle_filename(label, fmt)
+- ZipBundle(path): add(filename, data), close(), abort()
+- DocxBundle(path, template): add(article, doc), close(), abort()
+"""
+
+import datetime
+import io
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+
+try:
+    from docx import Document
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import nsdecls, qn
+    from lxml import etree
+except ImportError:  # callers check docx_export.DOCX_AVAILABLE first
+    pass
+
+BUNDLE_FORMATS = ("docx", "zip")
+
+_R_NAMESPACE = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_BODY_MARK = "articoli"
+_LINK_COLOR = "0563C1"
+_COPY_CHUNK = 1 << 20
+_XMLNS = re.compile(rb' xmlns:\w+="[^"]*"')
+
+
+def bundle_filename(label, fmt):
+    """Nome del file di una raccolta: articoli_<label>_<data e ora>.<fmt>"""
+    safe_label = "".join(
+        c for c in (label or "tutti") if c.isalnum() or c in ("-", "_")
+    )[:50]
+    stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"articoli_{safe_label or 'tutti'}_{stamp}.{fmt}"
+
+
+class _Bundle:
+    def __init__(self, path):
+        self.path = path
+        self.temp = path + ".tmp"
+        self.count = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _discard_temp(self):
+        try:
+            os.remove(self.temp)
+        except FileNotFoundError:
+            pass
+
+
+class ZipBundle(_Bundle):
+    """Archivio ZIP con un DOCX per articolo"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._zip = zipfile.ZipFile(self.temp, "w")
+
+    def add(self, filename, data):
+        # A DOCX is already deflated: stored as it is
+        self._zip.writestr(filename, data, compress_type=zipfile.ZIP_STORED)
+        self.count += 1
+
+    def close(self):
+        self._zip.close()
+        os.replace(self.temp, self.path)
+
+    def abort(self):
+        self._zip.close()
+        self._discard_temp()
+
+
+class DocxBundle(_Bundle):
+    """Un unico DOCX con indice e un articolo per pagina"""
+
+    def __init__(self, path, template=None, title="Indice"):
+        super().__init__(path)
+        self.title = title
+        # Parts, styles and relationships of the bundle come from here
+        self._doc = Document(template)
+        self._styles = self._doc.styles.element
+        self._template_styles = len(self._styles)
+        self._style_ids = {
+            style.get(qn("w:styleId")) for style in self._styles.iterchildren()
+        }
+        # Declared on the root of the bundle, they are dropped from the
+        # serialized elements, which lxml gives every in-scope namespace
+        self._root_namespaces = {
+            f' xmlns:{prefix}="{uri}"'.encode("utf-8")
+            for prefix, uri in self._doc.element.nsmap.items()
+            if prefix
+        }
+        self._body = tempfile.TemporaryFile()
+        self._toc = []  # (bookmark, title) of the articles, in order
+        self._page_break = (
+            f"<w:p {nsdecls('w')}><w:r><w:br w:type=\"page\"/></w:r></w:p>"
+        ).encode("utf-8")
+
+    def add(self, article, doc):
+        """Accoda l'articolo `article`, già renderizzato in `doc`"""
+        bookmark = f"_Articolo_{article['id_articolo']}"
+        chunks = [self._page_break]
+        marked = False
+        for element in doc.element.body.iterchildren():
+            if element.tag == qn("w:sectPr"):
+                continue
+            if not marked and element.tag == qn("w:p"):
+                self._add_bookmark(element, bookmark, len(self._toc))
+                marked = True
+            self._relink(element, doc.part)
+            chunks.append(self._serialize(element))
+        if len(doc.styles.element) != self._template_styles:
+            self._copy_styles(doc.styles.element)
+        self._body.write(b"".join(chunks))
+        title = article["titolo_articolo"] or "Senza titolo"
+        self._toc.append((bookmark, title if marked else None))
+        self.count += 1
+
+    def _serialize(self, element):
+        data = etree.tostring(element, encoding="utf-8")
+        end = data.index(b">")
+        head = _XMLNS.sub(
+            lambda m: b"" if m.group(0) in self._root_namespaces else m.group(0),
+            data[:end],
+        )
+        return head + data[end:]
+
+    @staticmethod
+    def _add_bookmark(paragraph, name, bookmark_id):
+        start = OxmlElement("w:bookmarkStart")
+        start.set(qn("w:id"), str(bookmark_id))
+        start.set(qn("w:name"), name)
+        end = OxmlElement("w:bookmarkEnd")
+        end.set(qn("w:id"), str(bookmark_id))
+        p_pr = paragraph.find(qn("w:pPr"))
+        paragraph.insert(0 if p_pr is None else 1, start)
+        paragraph.append(end)
+
+    def _relink(self, element, source_part):
+        """Riporta nel documento finale le relazioni (link, immagini) usate"""
+        for node in element.iter(tag=etree.Element):
+            for attr, value in node.attrib.items():
+                if attr.startswith(_R_NAMESPACE) and value in source_part.rels:
+                    node.set(attr, self._relate(source_part.rels[value]))
+
+    def _relate(self, rel):
+        main = self._doc.part
+        if rel.is_external:
+            return main.relate_to(rel.target_ref, rel.reltype, is_external=True)
+        part = rel.target_part
+        # Each article comes from its own package: give the part (an image)
+        # a name that is free in the bundle
+        template = re.sub(r"\d*(\.\w+)$", r"%d\1", str(part.partname))
+        part.partname = main.package.next_partname(template)
+        return main.relate_to(part, rel.reltype)
+
+    def _copy_styles(self, styles):
+        for style in styles.iterchildren(qn("w:style")):
+            style_id = style.get(qn("w:styleId"))
+            if style_id not in self._style_ids:
+                self._styles.append(etree.fromstring(etree.tostring(style)))
+                self._style_ids.add(style_id)
+
+    def _write_toc(self):
+        body = self._doc.element.body
+        for element in list(body.iterchildren()):
+            if element.tag != qn("w:sectPr"):
+                body.remove(element)
+        self._doc.add_heading(self.title, 1)
+        for number, (bookmark, title) in enumerate(self._toc, 1):
+            if title is None:
+                continue
+            paragraph = self._doc.add_paragraph(f"{number}. ")
+            link = OxmlElement("w:hyperlink")
+            link.set(qn("w:anchor"), bookmark)
+            link.set(qn("w:history"), "1")
+            run = paragraph.add_run(title)
+            color = OxmlElement("w:color")
+            color.set(qn("w:val"), _LINK_COLOR)
+            run._r.get_or_add_rPr().append(color)
+            run.underline = True
+            link.append(run._r)
+            paragraph._p.append(link)
+        body.insert(len(body) - 1, etree.Comment(_BODY_MARK))
+
+    def close(self):
+        self._write_toc()
+        package = io.BytesIO()
+        self._doc.save(package)
+        document_name = str(self._doc.part.partname).lstrip("/")
+        mark = f"<!--{_BODY_MARK}-->".encode("utf-8")
+        self._body.seek(0)
+        with zipfile.ZipFile(package) as source:
+            with zipfile.ZipFile(self.temp, "w", zipfile.ZIP_DEFLATED) as target:
+                for info in source.infolist():
+                    data = source.read(info)
+                    if info.filename != document_name:
+                        target.writestr(info, data)
+                        continue
+                    head, tail = data.split(mark, 1)
+                    with target.open(document_name, "w") as out:
+                        out.write(head)
+                        shutil.copyfileobj(self._body, out, _COPY_CHUNK)
+                        out.write(tail)
+        self._body.close()
+        os.replace(self.temp, self.path)
+
+    def abort(self):
+        self._body.close()
+        self._discard_temp()
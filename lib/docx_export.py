@@ -0,0 +1,438 @@
+"""DOCX rendering of articles, serial or in a process pool.
+
+`write_article()` turns one article (a plain dict with the columns of
+`t_articoli`, body decoded) into `export/articolo_<id>_<titolo>.docx`, or
+into a subdirectory of `export/` with a sharded LAYOUTS entry.
+python-docx and htmldocx are pure Python and CPU-bound, so large exports
+use `export_parallel()`: worker processes render and write the files and
+report back only the article IDs, leaving the database to the caller.
+Serial and parallel exports run the same code and produce the same files.
+
+Parsing the template (python-docx's default one, or a house-style `.docx`)
+is the largest fixed cost of an article, so each process parses it once
+and reuses the document, restoring the template body before every article.
+Articles that add parts or relationships (images, hyperlinks) invalidate
+the cached copy, which is then parsed again for the next article.
+
+python-docx is optional (DOCX_AVAILABLE); htmldocx (which needs
+beautifulsoup4) improves the rendering when installed.
+
+Provides:
+- DOCX_AVAILABLE, HTMLDOCX_AVAILABLE, BS4_AVAILABLE, UNSUPPORTED_TAGS, RENDERERS
+- RENDER_VERSION, RENDERED_FIELDS
+- clean_text_content(text), clean_html_for_docx(html), is_html_content(text)
+- add_plain_text(doc, text, body_blocks)
+- LAYOUTS, export_filename(article), export_path(article, layout)
+- base_document(template)
+- render_article(article, doc, renderer)
+- write_article(article, export_dir, template, renderer, layout)
+- export_serial(articles, export_dir, template, renderer, unchanged, layout)
+- export_parallel(articles, export_dir, workers, template, renderer, unchanged,
+  layout)
+- render_bytes(article, template, renderer)
+- render_serial(articles, template, renderer)
+- render_parallel(articles, workers, template, renderer)
+"""
+
+import concurrent.futures
+import contextlib
+import copy
+import io
+import multiprocessing
+import os
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+
+from lib import blocks
+from lib.blocks import clean_text_content, is_html_content
+from lib.body import decode_body
+
+try:
+    from docx import Document
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+    from lib import html_docx
+
+    DOCX_AVAILABLE = True
+except ImportError:
+    DOCX_AVAILABLE = False
+
+try:
+    from htmldocx import HtmlToDocx
+
+    HTMLDOCX_AVAILABLE = True
+except ImportError:
+    HTMLDOCX_AVAILABLE = False
+
+try:
+    import bs4  # noqa: F401  (used by htmldocx)
+
+    BS4_AVAILABLE = True
+except ImportError:
+    BS4_AVAILABLE = False
+
+# HTML renderers: htmldocx (after clean_html_for_docx) or lib/html_docx.py
+RENDERERS = ("htmldocx", "native")
+
+# Bump when a change to render_article() alters the documents it writes:
+# lib/export_manifest.py then renders again the articles already exported
+RENDER_VERSION = 2
+
+# Article columns a DOCX is made of (besides the template and the renderer)
+RENDERED_FIELDS = (
+    "id_articolo",
+    "titolo_articolo",
+    "sotto_titolo",
+    "data",
+    "argomento",
+    "testo_articolo",
+)
+
+# Where write_article() puts a file inside the export directory: all in one
+# directory, or in subdirectories by year, by year/month or by thousands of IDs
+LAYOUTS = ("flat", "year", "month", "id")
+
+# Articles queued per worker: bounds the bodies held in memory by the pool
+PENDING_PER_WORKER = 4
+
+# Tags removed by clean_html_for_docx() (htmldocx cannot render them): a
+# whole element when it is closed, otherwise just the opening tag
+UNSUPPORTED_TAGS = (
+    "INPUT",
+    "TEXTAREA",
+    "SELECT",
+    "FORM",
+    "SCRIPT",
+    "STYLE",
+    "IFRAME",
+    "OBJECT",
+    "EMBED",
+)
+
+# clean_html_for_docx() makes one pass per rule below instead of two per
+# unsupported tag. All removed tags share a single pass anchored on "<". The
+# attribute rules stay separate: the regex engine searches fast for a
+# literal first character, and a pattern that may also start at any "on"
+# of the text was measured slower than the two passes together.
+_XMLNS_ATTRIBUTE = re.compile(r"""xmlns\s*=\s*["'][^"']*["']""")
+_EVENT_ATTRIBUTE = re.compile(r"""on\w+\s*=\s*["'][^"']*["']""", re.IGNORECASE)
+_UNSUPPORTED = "|".join(UNSUPPORTED_TAGS)
+_REMOVED_TAG = re.compile(
+    rf"<(?:(?P<tag>{_UNSUPPORTED})[^>]*>.*?</(?P=tag)>"  # unsupported element
+    rf"|(?:{_UNSUPPORTED})[^>]*>"  # unclosed unsupported tag
+    r"|(?-i:\?xml[^>]*\?>)"  # XML declaration
+    r"|FONT[^>]*>|/FONT>)",  # obsolete FONT tags
+    re.IGNORECASE | re.DOTALL,
+)
+# Elements left empty, e.g. <P><FONT ...></FONT></P>, are dropped afterwards
+_EMPTY_ELEMENT = re.compile(r"<([a-zA-Z]+)[^>]*>\s*</\1>")
+
+# Parsed templates of this process: template -> (document, body, fingerprint)
+_BASE_DOCUMENTS: Dict[Optional[str], Tuple[Any, List[Any], Tuple[int, int, int]]] = {}
+
+
+def clean_html_for_docx(html):
+    """Pulisce l'HTML per renderlo compatibile con htmldocx"""
+    if not html:
+        return ""
+
+    # Pulisci escape sequences
+    html = clean_text_content(html)
+
+    # Rimuovi attributi problematici (namespace XML, eventi JS)
+    html = _XMLNS_ATTRIBUTE.sub("", html)
+    html = _EVENT_ATTRIBUTE.sub("", html)
+
+    # Rimuovi tag non supportati da htmldocx, dichiarazioni XML e tag FONT
+    html = _REMOVED_TAG.sub("", html)
+
+    # Sistema tag vuoti che possono causare problemi
+    html = _EMPTY_ELEMENT.sub("", html)
+
+    # Assicura che l'HTML sia wrappato in un tag root
+    if not html.strip().startswith("<"):
+        html = f"<p>{html}</p>"
+
+    return html
+
+
+def add_plain_text(doc, text_content, body_blocks=None):
+    """Aggiunge testo semplice al documento come paragrafi.
+
+    One paragraph per line of the body blocks (lib/blocks.py): `body_blocks`
+    when the caller already has them, otherwise parsed from `text_content`.
+    """
+    if body_blocks is None:
+        body_blocks = blocks.parse_body(text_content)
+    for line in blocks.blocks_to_text(body_blocks).split("\n"):
+        if line:
+            doc.add_paragraph(line)
+
+
+_NOT_ALPHANUMERIC = re.compile(r"[^A-Za-z0-9]+")
+_DATE_PREFIX = re.compile(r"(\d{4})-(\d{2})")
+
+
+def _field(article, name):
+    try:
+        return article[name]
+    except Exception:
+        return None
+
+
+def export_filename(article):
+    """Nome del file DOCX di un articolo: articolo_<id>_<titolo>.docx.
+
+    The title part is folded to ASCII letters and digits joined by "_": the
+    same title always gives the same name on every file system, and the ID
+    keeps names unique.
+    """
+    raw_title = _field(article, "titolo_articolo") or ""
+    ascii_title = unicodedata.normalize("NFKD", raw_title).encode("ascii", "ignore")
+    slug = _NOT_ALPHANUMERIC.sub("_", ascii_title.decode("ascii")).strip("_")
+    return (
+        f"articolo_{article['id_articolo']}_{slug[:50].rstrip('_') or 'articolo'}.docx"
+    )
+
+
+def export_path(article, layout="flat"):
+    """Percorso del DOCX di un articolo relativo alla cartella di export"""
+    if layout == "flat":
+        return export_filename(article)
+    if layout == "id":
+        shard = f"{int(article['id_articolo']) // 1000:03d}"
+    else:
+        date = _DATE_PREFIX.match(str(_field(article, "data") or ""))
+        if date is None:
+            shard = "senza_data"
+        elif layout == "year":
+            shard = date.group(1)
+        else:
+            shard = os.path.join(date.group(1), date.group(2))
+    return os.path.join(shard, export_filename(article))
+
+
+def _fingerprint(doc):
+    """What rendering may add besides body content: parts, relationships, styles"""
+    parts = sum(1 for _ in doc.part.package.iter_parts())
+    return parts, len(doc.part.rels), len(doc.styles.element)
+
+
+@contextlib.contextmanager
+def base_document(template=None):
+    """Documento vuoto dal template, analizzato una volta per processo.
+
+    Yields the cached document with the template body restored; it is only
+    valid inside the `with` block. If the article changed anything else
+    (or rendering failed) the cached copy is dropped.
+    """
+    cached = _BASE_DOCUMENTS.pop(template, None)
+    if cached is None:
+        doc = Document(template)
+        body = [copy.deepcopy(element) for element in doc.element.body]
+        cached = (doc, body, _fingerprint(doc))
+    else:
+        doc, body, _ = cached
+        for element in list(doc.element.body):
+            doc.element.body.remove(element)
+        for element in body:
+            doc.element.body.append(copy.deepcopy(element))
+
+    yield doc
+    # Not reached when the block raises: the document is discarded
+    if _fingerprint(doc) == cached[2]:
+        _BASE_DOCUMENTS[template] = cached
+
+
+def render_article(article, doc=None, renderer="htmldocx"):
+    """Crea il documento DOCX di un articolo (richiede python-docx).
+
+    `doc` is the document to fill, by default a new Document(); `renderer`
+    (one of RENDERERS) converts HTML bodies. The native renderer writes
+    the body blocks (lib/blocks.py), decoded from the `blocchi` column when
+    the article has it, otherwise parsed from the body.
+    """
+    if doc is None:
+        doc = Document()
+
+    # Titolo
+    title = doc.add_heading(article["titolo_articolo"] or "Senza titolo", 0)
+    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+    # Sottotitolo
+    sotto = _field(article, "sotto_titolo")
+    if sotto:
+        subtitle = doc.add_paragraph(sotto)
+        subtitle.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        for run in subtitle.runs:
+            run.italic = True
+
+    # Metadati
+    doc.add_paragraph()
+    meta = doc.add_paragraph()
+    meta.add_run("Data: ").bold = True
+    meta.add_run(str(_field(article, "data") or "N/D"))
+    meta.add_run("  |  ")
+    meta.add_run("Argomento: ").bold = True
+    meta.add_run(str(_field(article, "argomento") or "N/D"))
+
+    doc.add_paragraph()
+    doc.add_paragraph("─" * 50)
+    doc.add_paragraph()
+
+    # Contenuto - pulisci prima il testo
+    try:
+        testo_raw = decode_body(article["testo_articolo"])
+    except Exception:
+        testo_raw = ""
+    testo_pulito = clean_text_content(testo_raw)
+
+    # Verifica se è HTML vero o testo semplice
+    if renderer == "native":
+        # Blocks cached in the database when the row carries them
+        body_blocks = None
+        try:
+            body_blocks = blocks.article_blocks(article)
+            html_docx.add_blocks(doc, body_blocks)
+        except Exception:
+            add_plain_text(doc, testo_pulito, body_blocks)
+    elif is_html_content(testo_pulito) and HTMLDOCX_AVAILABLE:
+        try:
+            testo_html = clean_html_for_docx(testo_pulito)
+            parser = HtmlToDocx()
+            parser.add_html_to_document(testo_html, doc)
+        except Exception:
+            add_plain_text(doc, testo_pulito)
+    else:
+        add_plain_text(doc, testo_pulito)
+
+    return doc
+
+
+def write_article(
+    article, export_dir, template=None, renderer="htmldocx", layout="flat"
+):
+    """Scrive il DOCX di un articolo in `export_dir`. Returns the file path.
+
+    `template` is the path of a `.docx` whose styles, page setup and body
+    every article starts from (None: the python-docx default); `renderer`
+    is passed to render_article(); `layout` (one of LAYOUTS) chooses the
+    subdirectory.
+    """
+    filepath = os.path.join(export_dir, export_path(article, layout))
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with base_document(template) as doc:
+        render_article(article, doc, renderer).save(filepath)
+    return filepath
+
+
+def _export_worker(
+    article, export_dir, template=None, renderer="htmldocx", layout="flat"
+):
+    """Eseguito nei processi del pool: ritorna (id, percorso, errore)"""
+    try:
+        filepath = write_article(article, export_dir, template, renderer, layout)
+        return article["id_articolo"], filepath, None
+    except Exception as e:
+        return article["id_articolo"], None, str(e)
+
+
+def export_serial(
+    articles,
+    export_dir,
+    template=None,
+    renderer="htmldocx",
+    unchanged=None,
+    layout="flat",
+):
+    """Come export_parallel(), nel processo corrente"""
+    for article in articles:
+        filepath = unchanged(article) if unchanged else None
+        if filepath:
+            yield article["id_articolo"], filepath, None
+        else:
+            yield _export_worker(article, export_dir, template, renderer, layout)
+
+
+def export_parallel(
+    articles,
+    export_dir,
+    workers=None,
+    template=None,
+    renderer="htmldocx",
+    unchanged=None,
+    layout="flat",
+):
+    """Scrive i DOCX di `articles` in un pool di processi.
+
+    `articles` are plain dicts (sqlite3.Row cannot be pickled) and may be a
+    generator: at most PENDING_PER_WORKER articles per worker are in flight.
+    Yields (id_articolo, filepath, error) in completion order; filepath is
+    None when the article could not be written. `unchanged(article)`, if
+    given, returns the path of a file that is already up to date: the
+    article is then yielded at once without rendering it.
+    """
+    yield from _pool_results(
+        _export_worker,
+        articles,
+        workers,
+        (export_dir, template, renderer, layout),
+        unchanged,
+    )
+
+
+def render_bytes(article, template=None, renderer="htmldocx"):
+    """Contenuto del DOCX di un articolo, senza scriverlo su disco"""
+    data = io.BytesIO()
+    with base_document(template) as doc:
+        render_article(article, doc, renderer).save(data)
+    return data.getvalue()
+
+
+def _render_worker(article, template=None, renderer="htmldocx"):
+    """Eseguito nei processi del pool: ritorna (id, nome file, contenuto, errore)"""
+    try:
+        data = render_bytes(article, template, renderer)
+        return article["id_articolo"], export_filename(article), data, None
+    except Exception as e:
+        return article["id_articolo"], None, None, str(e)
+
+
+def render_serial(articles, template=None, renderer="htmldocx"):
+    """Come render_parallel(), nel processo corrente"""
+    for article in articles:
+        yield _render_worker(article, template, renderer)
+
+
+def render_parallel(articles, workers=None, template=None, renderer="htmldocx"):
+    """Genera in un pool di processi i DOCX di `articles`, in memoria.
+
+    Like export_parallel(), but nothing is written: yields (id_articolo,
+    filename, data, error) in completion order, for bundles that store the
+    documents themselves (see lib/docx_bundle.py).
+    """
+    yield from _pool_results(_render_worker, articles, workers, (template, renderer))
+
+
+def _pool_results(worker, articles, workers, args, unchanged=None):
+    """Esegue `worker(article, *args)` in un pool; yields the results"""
+    workers = workers or os.cpu_count() or 1
+    # spawn: the caller may run threads (prefetch) and hold open databases
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(workers, mp_context=context) as pool:
+        pending = set()
+        for article in articles:
+            filepath = unchanged(article) if unchanged else None
+            if filepath:
+                yield article["id_articolo"], filepath, None
+                continue
+            pending.add(pool.submit(worker, article, *args))
+            if len(pending) >= workers * PENDING_PER_WORKER:
+                done, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    yield future.result()
+        for future in concurrent.futures.as_completed(pending):
+            yield future.result()
@@ -0,0 +1,257 @@
+"""MySQL dump writer: the counterpart of lib/parser.py.
+
+Streams the `t_articoli` table of a SQLite database back out as a
+phpMyAdmin-compatible dump (`CREATE TABLE` + extended `INSERT` statements).
+
+Provides:
+- escape_sql_value(value)
+- iter_insert_statements(rows, table, columns, max_statement_bytes)
+- write_dump(conn, path, ...)
+
+Uso:
+    python -m lib.dump_writer articoli.db export/t_articoli.sql
+    python -m lib.dump_writer articoli.db export/t_articoli.sql.gz
+"""
+
+import argparse
+import gzip
+import sqlite3
+import sys
+
+from lib.body import decode_body
+
+# The 16 columns of the original MySQL table (the `esportato` column is local)
+COLUMNS = (
+    "id_articolo",
+    "data",
+    "argomento",
+    "titolo_articolo",
+    "sotto_titolo",
+    "TITLE",
+    "testo_articolo",
+    "nr_attach",
+    "titolo_foto",
+    "foto_path",
+    "link_esterno",
+    "contatore_visite",
+    "attivo",
+    "id_forum",
+    "ultimo_accesso",
+    "scadenza",
+)
+
+# Same structure as the phpMyAdmin export the data comes from
+CREATE_TABLE_SQL = """CREATE TABLE `t_articoli` (
+  `id_articolo` int(11) NOT NULL,
+  `data` datetime DEFAULT '0000-00-00 00:00:00',
+  `argomento` varchar(100) DEFAULT '',
+  `titolo_articolo` varchar(255) DEFAULT '',
+  `sotto_titolo` varchar(255) DEFAULT '',
+  `TITLE` varchar(255) DEFAULT '',
+  `testo_articolo` text,
+  `nr_attach` int(11) DEFAULT '0',
+  `titolo_foto` varchar(100) DEFAULT '',
+  `foto_path` varchar(100) DEFAULT '',
+  `link_esterno` varchar(255) DEFAULT '',
+  `contatore_visite` int(11) DEFAULT '1',
+  `attivo` smallint(6) DEFAULT '0',
+  `id_forum` int(11) NOT NULL DEFAULT '0',
+  `ultimo_accesso` datetime DEFAULT '0000-00-00 00:00:00',
+  `scadenza` date NOT NULL DEFAULT '0000-00-00'
+) ENGINE=MyISAM DEFAULT CHARSET=utf8;
+"""
+
+INDEXES_SQL = """ALTER TABLE `t_articoli`
+  ADD PRIMARY KEY (`id_articolo`),
+  ADD KEY `idx_attivo_scadenza` (`attivo`,`scadenza`,`data`),
+  ADD KEY `idx_argomento` (`argomento`(64));
+"""
+
+HEADER = """-- Dump MySQL generato da lib/dump_writer.py
+--
+-- Tabella: `{table}`
+
+SET SQL_MODE = "NO_AUTO_VALUE_ON_ZERO";
+START TRANSACTION;
+SET time_zone = "+00:00";
+
+/*!40101 SET @OLD_CHARACTER_SET_CLIENT=@@CHARACTER_SET_CLIENT */;
+/*!40101 SET @OLD_CHARACTER_SET_RESULTS=@@CHARACTER_SET_RESULTS */;
+/*!40101 SET @OLD_COLLATION_CONNECTION=@@COLLATION_CONNECTION */;
+/*!40101 SET NAMES utf8 */;
+
+"""
+
+FOOTER = """COMMIT;
+
+/*!40101 SET CHARACTER_SET_CLIENT=@OLD_CHARACTER_SET_CLIENT */;
+/*!40101 SET CHARACTER_SET_RESULTS=@OLD_CHARACTER_SET_RESULTS */;
+/*!40101 SET COLLATION_CONNECTION=@OLD_COLLATION_CONNECTION */;
+"""
+
+# mysqld's default max_allowed_packet is 4 MB (64 MB on 8.0): stay well below
+DEFAULT_MAX_STATEMENT_BYTES = 1024 * 1024
+
+# Characters escaped by mysql_real_escape_string()
+_ESCAPES = str.maketrans(
+    {
+        "\\": "\\\\",
+        "'": "\\'",
+        '"': '\\"',
+        "\0": "\\0",
+        "\n": "\\n",
+        "\r": "\\r",
+        "\x1a": "\\Z",
+    }
+)
+
+
+def escape_sql_value(value):
+    """Converts a Python value into a MySQL literal.
+
+    - None -> NULL
+    - int/float -> numeric literal
+    - bytes -> hex literal
+    - everything else -> quoted, escaped string
+    """
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        data = bytes(value)
+        return "0x" + data.hex() if data else "''"
+    return "'" + str(value).translate(_ESCAPES) + "'"
+
+
+def iter_insert_statements(
+    rows, table="t_articoli", columns=COLUMNS, max_statement_bytes=None
+):
+    """Yields extended INSERT statements for `rows`.
+
+    Rows are grouped so that each statement stays under `max_statement_bytes`
+    (UTF-8 encoded); a single row bigger than the limit gets its own statement.
+    """
+    if max_statement_bytes is None:
+        max_statement_bytes = DEFAULT_MAX_STATEMENT_BYTES
+
+    col_list = ", ".join(f"`{c}`" for c in columns)
+    prefix = f"INSERT INTO `{table}` ({col_list}) VALUES\n"
+    prefix_size = len(prefix.encode("utf-8"))
+
+    tuples = []
+    size = prefix_size
+    for row in rows:
+        literal = "(" + ", ".join(escape_sql_value(v) for v in row) + ")"
+        literal_size = len(literal.encode("utf-8")) + 2  # ",\n" or ";\n"
+        if tuples and size + literal_size > max_statement_bytes:
+            yield prefix + ",\n".join(tuples) + ";\n"
+            tuples = []
+            size = prefix_size
+        tuples.append(literal)
+        size += literal_size
+
+    if tuples:
+        yield prefix + ",\n".join(tuples) + ";\n"
+
+
+def _open_output(path, compress):
+    if compress is None:
+        compress = str(path).endswith(".gz")
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8", newline="\n")
+    return open(path, "w", encoding="utf-8", newline="\n")
+
+
+def _iter_rows(cursor, batch_size):
+    while True:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            return
+        yield from batch
+
+
+def write_dump(
+    conn,
+    path,
+    table="t_articoli",
+    max_statement_bytes=None,
+    compress=None,
+    batch_size=500,
+):
+    """Writes `table` from the SQLite connection `conn` to a MySQL dump file.
+
+    Rows are streamed with `fetchmany(batch_size)`, so memory use does not grow
+    with the size of the table. If `compress` is None, gzip is used when `path`
+    ends with `.gz`. Returns the number of rows written.
+    """
+    cursor = conn.cursor()
+    col_list = ", ".join(f'"{c}"' for c in COLUMNS)
+    cursor.execute(f"SELECT {col_list} FROM {table} ORDER BY id_articolo")
+
+    count = 0
+    body = COLUMNS.index("testo_articolo")
+
+    def counted(rows):
+        nonlocal count
+        for row in rows:
+            count += 1
+            if isinstance(row[body], bytes):
+                row = (*row[:body], decode_body(row[body]), *row[body + 1 :])
+            yield row
+
+    with _open_output(path, compress) as out:
+        out.write(HEADER.format(table=table))
+        out.write(f"--\n-- Struttura della tabella `{table}`\n--\n\n")
+        out.write(CREATE_TABLE_SQL.replace("`t_articoli`", f"`{table}`", 1))
+        out.write(f"\n--\n-- Dump dei dati per la tabella `{table}`\n--\n\n")
+        for statement in iter_insert_statements(
+            counted(_iter_rows(cursor, batch_size)),
+            table=table,
+            max_statement_bytes=max_statement_bytes,
+        ):
+            out.write(statement)
+            out.write("\n")
+        out.write(f"--\n-- Indici per la tabella `{table}`\n--\n")
+        out.write(INDEXES_SQL.replace("`t_articoli`", f"`{table}`", 1))
+        out.write("\n")
+        out.write(FOOTER)
+
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Esporta t_articoli da SQLite in un dump MySQL (phpMyAdmin)"
+    )
+    parser.add_argument("db", help="Database SQLite di origine")
+    parser.add_argument("output", help="File .sql di destinazione (.sql.gz = gzip)")
+    parser.add_argument(
+        "--max-statement-bytes",
+        type=int,
+        default=DEFAULT_MAX_STATEMENT_BYTES,
+        help="Dimensione massima di ogni INSERT esteso (byte)",
+    )
+    parser.add_argument(
+        "--gzip", action="store_true", help="Comprimi l'output anche senza .gz"
+    )
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(args.db)
+    try:
+        count = write_dump(
+            conn,
+            args.output,
+            max_statement_bytes=args.max_statement_bytes,
+            compress=True if args.gzip else None,
+        )
+    finally:
+        conn.close()
+    print(f"Esportati {count} articoli in {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
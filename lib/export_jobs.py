@@ -0,0 +1,189 @@
+"""Persistent export queue (`export_jobs`), drained by one or more processes.
+
+`export_jobs` (migration v9) holds one row per article to export, in one of
+the states QUEUED, CLAIMED (by `worker`, at `claimed_at`), DONE or FAILED
+(with the `error`). An exporter claims a batch of jobs in a BEGIN IMMEDIATE
+transaction: the write lock is taken before the jobs are read, so the claim
+is atomic and several processes can drain the same queue without exporting
+an article twice. A finished job is marked DONE together with `esportato`,
+in the same transaction, provided its exporter still holds the claim.
+
+A failed job is retried after RETRY_DELAY seconds, doubled at every
+attempt, up to MAX_ATTEMPTS. A job claimed by a process that died is
+claimed again once CLAIM_TIMEOUT seconds have passed; attempts are counted
+when a job is claimed, so an article that crashes its exporter stops being
+retried as well. A job out of attempts starts over when its article is
+enqueued again.
+
+All functions take a read/write connection and commit their own
+transaction.
+
+Provides:
+- QUEUED, CLAIMED, DONE, FAILED
+- MAX_ATTEMPTS, RETRY_DELAY, CLAIM_TIMEOUT
+- enqueue(conn, sql, params, now)
+- claim(conn, worker, count, now)
+- complete(conn, worker, done, mark_exported)
+- fail(conn, worker, article_id, error, now)
+- release(conn, worker)
+- counts(conn, now), purge_done(conn)
+"""
+
+import time
+
+JOBS_TABLE = "export_jobs"
+
+QUEUED = "queued"
+CLAIMED = "claimed"
+DONE = "done"
+FAILED = "failed"
+
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 60  # seconds before the first retry, doubled at each attempt
+CLAIM_TIMEOUT = 15 * 60  # seconds after which a claim is considered abandoned
+
+_CLAIMABLE = (
+    "attempts < :max_attempts AND ("
+    f"state = '{QUEUED}' "
+    f"OR (state = '{FAILED}' AND available_at <= :now) "
+    f"OR (state = '{CLAIMED}' AND claimed_at <= :now - :timeout))"
+)
+
+
+def _now(now):
+    return int(time.time() if now is None else now)
+
+
+def _params(now):
+    return {"max_attempts": MAX_ATTEMPTS, "now": _now(now), "timeout": CLAIM_TIMEOUT}
+
+
+def enqueue(conn, sql, params=(), now=None):
+    """Accoda gli articoli selezionati da `sql` (prima colonna: id_articolo).
+
+    Articles already in the queue are left as they are, so enqueuing the
+    same selection again resumes an interrupted export; only the jobs that
+    ran out of attempts (failed, or claimed by an exporter that died) start
+    over from zero attempts. Returns the number of jobs added or requeued.
+    """
+    # Inlined, not bound: `params` may be positional
+    exhausted = (
+        f"attempts >= {int(MAX_ATTEMPTS)} AND (state = '{FAILED}' "
+        f"OR (state = '{CLAIMED}' AND claimed_at <= {_now(now) - CLAIM_TIMEOUT}))"
+    )
+    cursor = conn.execute(
+        f"INSERT INTO {JOBS_TABLE} (id_articolo) SELECT * FROM ({sql}) WHERE true "
+        f"ON CONFLICT (id_articolo) DO UPDATE SET state = '{QUEUED}', "
+        "attempts = 0, available_at = 0, worker = NULL, claimed_at = NULL, "
+        f"error = NULL WHERE {exhausted}",
+        params,
+    )
+    conn.commit()
+    return cursor.rowcount
+
+
+def claim(conn, worker, count, now=None):
+    """Prende fino a `count` job per `worker`; ritorna i loro ID"""
+    conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        params = _params(now)
+        ids = [
+            row[0]
+            for row in conn.execute(
+                f"SELECT id_articolo FROM {JOBS_TABLE} WHERE {_CLAIMABLE} "
+                "ORDER BY id_articolo LIMIT :count",
+                dict(params, count=count),
+            )
+        ]
+        conn.executemany(
+            f"UPDATE {JOBS_TABLE} SET state = '{CLAIMED}', worker = ?, "
+            "claimed_at = ?, attempts = attempts + 1 WHERE id_articolo = ?",
+            [(worker, params["now"], article_id) for article_id in ids],
+        )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return ids
+
+
+def complete(conn, worker, done, mark_exported=True):
+    """Segna come DONE i job `done` [(id, percorso)] ed esportati gli articoli.
+
+    Only the jobs still claimed by `worker` are completed: a claim taken
+    over after CLAIM_TIMEOUT belongs to the other exporter now, which marks
+    the article itself. Returns the number of jobs completed.
+    """
+    completed = 0
+    try:
+        for article_id, path in done:
+            cursor = conn.execute(
+                f"UPDATE {JOBS_TABLE} SET state = '{DONE}', error = NULL, path = ? "
+                f"WHERE id_articolo = ? AND worker = ? AND state = '{CLAIMED}'",
+                (path, article_id, worker),
+            )
+            if cursor.rowcount != 1:
+                continue
+            completed += 1
+            if mark_exported:
+                conn.execute(
+                    "UPDATE t_articoli SET esportato = 1 WHERE id_articolo = ?",
+                    (article_id,),
+                )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return completed
+
+
+def fail(conn, worker, article_id, error, now=None):
+    """Segna il job come FAILED; sarà ripreso dopo l'attesa del tentativo"""
+    conn.execute(
+        f"UPDATE {JOBS_TABLE} SET state = '{FAILED}', error = ?, "
+        "available_at = ? + ? * (1 << (attempts - 1)) "
+        "WHERE id_articolo = ? AND worker = ?",
+        (str(error), _now(now), RETRY_DELAY, article_id, worker),
+    )
+    conn.commit()
+
+
+def release(conn, worker):
+    """Rimette in coda i job presi da `worker` e non completati"""
+    conn.execute(
+        f"UPDATE {JOBS_TABLE} SET state = '{QUEUED}', worker = NULL, "
+        "claimed_at = NULL, attempts = attempts - 1 "
+        f"WHERE worker = ? AND state = '{CLAIMED}'",
+        (worker,),
+    )
+    conn.commit()
+
+
+def counts(conn, now=None):
+    """Numero di job per stato, più 'claimable' (quelli che si possono prendere)"""
+    result = {QUEUED: 0, CLAIMED: 0, DONE: 0, FAILED: 0}
+    for state, count in conn.execute(
+        f"SELECT state, COUNT(*) FROM {JOBS_TABLE} GROUP BY state"
+    ):
+        result[state] = count
+    result["claimable"] = conn.execute(
+        f"SELECT COUNT(*) FROM {JOBS_TABLE} WHERE {_CLAIMABLE}", _params(now)
+    ).fetchone()[0]
+    return result
+
+
+def purge_done(conn):
+    """Svuota i job DONE quando la coda è esaurita (nessun job aperto).
+
+    A failed job still waiting for a retry keeps the queue open. Returns the
+    number of jobs removed.
+    """
+    cursor = conn.execute(
+        f"DELETE FROM {JOBS_TABLE} WHERE state = '{DONE}' AND NOT EXISTS ("
+        f"SELECT 1 FROM {JOBS_TABLE} WHERE state IN ('{QUEUED}', '{CLAIMED}') "
+        f"OR (state = '{FAILED}' AND attempts < ?))",
+        (MAX_ATTEMPTS,),
+    )
+    conn.commit()
+    return cursor.rowcount
@@ -0,0 +1,56 @@
+"""Journal of exported articles not yet marked `esportato` in the database.
+
+Bulk exports mark articles in batches, one transaction per batch, so a
+crash or a locked database can leave DOCX files written but not marked.
+Every written ID is appended to `<export_dir>/.esportati.journal` (and
+flushed) as soon as its file exists; the journal is removed once the batch
+is committed. The next export first marks the IDs still in the journal.
+
+Provides:
+- JOURNAL_NAME
+- ExportJournal(export_dir): record(id), pending(), clear(), close()
+"""
+
+import os
+
+JOURNAL_NAME = ".esportati.journal"
+
+
+class ExportJournal:
+    """Append-only list of article IDs written but not yet marked"""
+
+    def __init__(self, export_dir):
+        self.path = os.path.join(export_dir, JOURNAL_NAME)
+        self._file = None
+
+    def record(self, article_id):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, "a", encoding="ascii")
+        self._file.write(f"{article_id}\n")
+        self._file.flush()
+
+    def pending(self):
+        """IDs ancora da marcare, in ordine e senza duplicati"""
+        try:
+            with open(self.path, encoding="ascii", errors="replace") as f:
+                # A crash may leave the last line truncated: a shorter ID
+                # would mark the wrong article, so it is dropped
+                lines = f.read().split("\n")[:-1]
+        except FileNotFoundError:
+            return []
+        ids = dict.fromkeys(int(line) for line in lines if line.strip().isdigit())
+        return list(ids)
+
+    def clear(self):
+        """Svuota il journal (dopo il commit delle marcature)"""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
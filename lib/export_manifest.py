@@ -0,0 +1,206 @@
+"""Manifest of the exported DOCX files, to skip articles that did not change.
+
+`<export_dir>/.esportati.manifest.json` maps each exported article ID to
+the hash of what its document is made of (the rendered fields, the
+renderer and RENDER_VERSION of lib/docx_export.py, the template file), the
+file path (relative to the export directory) and its size. An article
+whose hash matches and whose file is still there, at the path of the
+current layout and with the same size, is not rendered again, so repeating
+the export of a large selection only writes the articles that changed.
+
+With the manifest, `<export_dir>/indice.json` is written: just the ID ->
+relative path map, sorted by ID, for tools that sync the export directory
+without walking it. Both are rewritten atomically (temporary file +
+rename); a missing or unreadable manifest just means that every article is
+rendered again. Several processes may drain the same export queue, so
+save() merges this process's changes into the manifest on disk, re-read
+while holding `<export_dir>/.esportati.manifest.lock`.
+
+Provides:
+- MANIFEST_NAME, INDEX_NAME, LOCK_NAME
+- article_digest(article, template, renderer)
+- ExportManifest(export_dir, template, renderer, force, layout):
+  unchanged(article), record(id, filepath), discard(id), save()
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import sys
+
+from lib.docx_export import RENDER_VERSION, RENDERED_FIELDS, export_path
+
+MANIFEST_NAME = ".esportati.manifest.json"
+INDEX_NAME = "indice.json"
+LOCK_NAME = ".esportati.manifest.lock"
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+
+def _template_stamp(template):
+    if not template:
+        return None
+    try:
+        stat = os.stat(template)
+    except OSError:
+        return os.path.abspath(template)
+    return [os.path.abspath(template), stat.st_size, stat.st_mtime_ns]
+
+
+def article_digest(article, template=None, renderer="htmldocx"):
+    """Hash SHA-256 di tutto ciò che determina il DOCX di un articolo"""
+    digest = hashlib.sha256()
+    header = [RENDER_VERSION, renderer, _template_stamp(template)]
+    for name in RENDERED_FIELDS:
+        try:
+            value = article[name]
+        except (KeyError, IndexError):
+            value = None
+        if isinstance(value, bytes):
+            # Compressed body: hash the stored bytes, no need to decode
+            digest.update(value)
+            value = len(value)
+        header.append(value)
+    digest.update(json.dumps(header, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ExportManifest:
+    """Hash e file dei DOCX esportati, per articolo"""
+
+    def __init__(
+        self,
+        export_dir,
+        template=None,
+        renderer="htmldocx",
+        force=False,
+        layout="flat",
+    ):
+        self.export_dir = export_dir
+        self.path = os.path.join(export_dir, MANIFEST_NAME)
+        self.template = template
+        self.renderer = renderer
+        self.force = force
+        self.layout = layout
+        self.skipped = 0
+        self._digests = {}  # digests of the articles being rendered
+        self._changes = {}  # entries to merge by save(); None to remove
+        self.entries = _load(self.path)
+
+    def unchanged(self, article):
+        """Percorso del DOCX già aggiornato di `article`, altrimenti None"""
+        article_id = article["id_articolo"]
+        digest = article_digest(article, self.template, self.renderer)
+        entry = self.entries.get(str(article_id))
+        if (
+            not self.force
+            and entry
+            and entry.get("hash") == digest
+            and entry.get("path") == _portable(export_path(article, self.layout))
+        ):
+            filepath = os.path.join(self.export_dir, entry["path"])
+            try:
+                if os.path.getsize(filepath) == entry.get("size"):
+                    self.skipped += 1
+                    return filepath
+            except OSError:
+                pass
+        self._digests[article_id] = digest
+        return None
+
+    def record(self, article_id, filepath):
+        """Annota il file appena scritto per `article_id`"""
+        digest = self._digests.pop(article_id, None)
+        if digest is None:
+            return  # skipped as unchanged: the entry is already current
+        try:
+            size = os.path.getsize(filepath)
+        except OSError:
+            self.discard(article_id)
+            return
+        entry = {
+            "hash": digest,
+            "renderer": f"{self.renderer}/{RENDER_VERSION}",
+            "path": _portable(os.path.relpath(filepath, self.export_dir)),
+            "size": size,
+        }
+        self.entries[str(article_id)] = self._changes[str(article_id)] = entry
+
+    def discard(self, article_id):
+        """Dimentica `article_id` (file non scritto o non valido)"""
+        self._digests.pop(article_id, None)
+        self.entries.pop(str(article_id), None)
+        self._changes[str(article_id)] = None
+
+    def save(self):
+        """Riscrive manifest e indice con le modifiche di questo processo"""
+        if not self._changes:
+            return
+        os.makedirs(self.export_dir, exist_ok=True)
+        with _locked(os.path.join(self.export_dir, LOCK_NAME)):
+            # Other exporters may have saved since this manifest was read
+            entries = _load(self.path)
+            for article_id, entry in self._changes.items():
+                if entry is None:
+                    entries.pop(article_id, None)
+                else:
+                    entries[article_id] = entry
+            index = {
+                article_id: entries[article_id]["path"]
+                for article_id in sorted(entries, key=int)
+            }
+            _write_json(os.path.join(self.export_dir, INDEX_NAME), index, indent=1)
+            _write_json(self.path, entries, separators=(",", ":"))
+        self.entries = entries
+        self._changes = {}
+
+
+def _load(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return entries if isinstance(entries, dict) else {}
+
+
+@contextlib.contextmanager
+def _locked(path):
+    # Exclusive lock on a separate file: the manifest itself is replaced
+    with open(path, "a+b") as f:
+        if sys.platform == "win32":
+            f.seek(0)
+            while True:
+                try:
+                    # LK_LOCK gives up after about ten seconds: keep waiting
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _portable(path):
+    # Same manifest and index on every OS: "/" separators
+    return path.replace(os.sep, "/")
+
+
+def _write_json(path, data, **options):
+    temp = path + ".tmp"
+    with open(temp, "w", encoding="utf-8") as f:
+        json.dump(data, f, **options)
+    os.replace(temp, path)
@@ -0,0 +1,109 @@
+"""Full-text search over titles, subtitles and article bodies (SQLite FTS5).
+
+The `t_articoli_fts` table is created by migration v3 (see lib/migrations.py).
+Triggers on `t_articoli_base` queue changed IDs in `t_articoli_fts_pending`;
+`sync_fulltext()` then indexes them with the HTML stripped from the body.
+The queue keeps the triggers pure SQL, so rows written by any tool (sqlite3
+shell included) are indexed the next time the importer or explorer runs.
+
+Provides:
+- FTS_TABLE
+- fulltext_available(conn)
+- sync_fulltext(conn)
+- build_match_query(text)
+"""
+
+import re
+
+from lib.body import decode_body
+from lib.text import html_to_text
+
+FTS_TABLE = "t_articoli_fts"
+PENDING_TABLE = "t_articoli_fts_pending"
+
+# Relative weight of (titolo_articolo, sotto_titolo, testo) in bm25 ranking
+BM25_WEIGHTS = (10.0, 5.0, 1.0)
+
+_SYNC_BATCH = 500
+
+# Quoted phrases or single words (letters/digits, accents included)
+_QUERY_TOKENS = re.compile(r'"([^"]+)"|(\w+)', re.UNICODE)
+
+
+def fulltext_available(conn):
+    """True se la tabella FTS5 esiste (SQLite compilato con FTS5)"""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (FTS_TABLE,),
+    ).fetchone()
+    return row is not None
+
+
+def sync_fulltext(conn):
+    """Indicizza gli articoli in coda (inseriti, modificati o eliminati).
+
+    Returns the number of queued IDs processed. The caller's transaction is
+    committed at the end.
+    """
+    if not fulltext_available(conn):
+        return 0
+
+    processed = 0
+    while True:
+        ids = [
+            row[0]
+            for row in conn.execute(
+                f"SELECT id_articolo FROM {PENDING_TABLE} LIMIT ?", (_SYNC_BATCH,)
+            )
+        ]
+        if not ids:
+            break
+
+        marks = ", ".join("?" * len(ids))
+        conn.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({marks})", ids)
+        rows = conn.execute(
+            "SELECT id_articolo, titolo_articolo, sotto_titolo, testo_articolo "
+            f"FROM t_articoli WHERE id_articolo IN ({marks})",
+            ids,
+        ).fetchall()
+        conn.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, titolo_articolo, sotto_titolo, testo) "
+            "VALUES (?, ?, ?, ?)",
+            [
+                (
+                    row[0],
+                    row[1] or "",
+                    row[2] or "",
+                    html_to_text(decode_body(row[3]), " "),
+                )
+                for row in rows
+            ],
+        )
+        conn.execute(f"DELETE FROM {PENDING_TABLE} WHERE id_articolo IN ({marks})", ids)
+        processed += len(ids)
+
+    conn.commit()
+    return processed
+
+
+def build_match_query(text):
+    """Converte il testo cercato dall'utente in una query FTS5 MATCH.
+
+    - words become prefix queries ("carab" matches "carabinieri")
+    - "quoted text" is matched as an exact phrase
+    - all terms must match (implicit AND)
+
+    Returns None if the text contains nothing searchable.
+    """
+    terms = []
+    for phrase, word in _QUERY_TOKENS.findall(text or ""):
+        if phrase:
+            words = re.findall(r"\w+", phrase, re.UNICODE)
+            if words:
+                terms.append('"' + " ".join(words) + '"')
+        elif word:
+            terms.append(f'"{word}"*')
+
+    if not terms:
+        return None
+    return " ".join(terms)
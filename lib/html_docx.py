@@ -0,0 +1,113 @@
+"""Native HTML -> DOCX rendering, without htmldocx and BeautifulSoup.
+
+`add_blocks()` writes the blocks of an article body (see lib/blocks.py,
+which parses the HTML once with html.parser and caches the result) into a
+python-docx document: paragraph and list styles, line breaks, character
+formats, external hyperlinks and tables.
+
+Provides:
+- BOLD, ITALIC, UNDERLINE
+- html_to_blocks(html)
+- add_blocks(doc, blocks)
+- add_html(doc, html)
+"""
+
+import re
+
+from docx.opc.constants import RELATIONSHIP_TYPE
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.shared import RGBColor
+
+from lib.blocks import BOLD, ITALIC, UNDERLINE, html_to_blocks
+
+_LINK_COLOR = RGBColor(0x05, 0x63, 0xC1)
+
+
+# Line breaks and tabs inside a run, written as <w:br/> and <w:tab/>
+_RUN_BREAKS = re.compile(r"(\n|\t)")
+
+
+def _add_run(paragraph, text, fmt):
+    # Run.text would add the text one character at a time: write whole
+    # <w:t> pieces instead
+    run = paragraph.add_run()
+    for piece in _RUN_BREAKS.split(text):
+        if piece == "\n":
+            run._r.add_br()
+        elif piece == "\t":
+            run._r.add_tab()
+        elif piece:
+            run._r.add_t(piece)
+    if fmt & BOLD:
+        run.bold = True
+    if fmt & ITALIC:
+        run.italic = True
+    if fmt & UNDERLINE:
+        run.underline = True
+    return run
+
+
+def _add_link(paragraph, text, fmt, href):
+    """Aggiunge un collegamento ipertestuale esterno al paragrafo"""
+    r_id = paragraph.part.relate_to(href, RELATIONSHIP_TYPE.HYPERLINK, True)
+    link = OxmlElement("w:hyperlink")
+    link.set(qn("r:id"), r_id)
+    paragraph._p.append(link)
+    run = _add_run(paragraph, text, fmt)
+    link.append(run._r)
+    run.font.color.rgb = _LINK_COLOR
+    run.underline = True
+
+
+class _BlockWriter:
+    def __init__(self, doc):
+        self.doc = doc
+        self.style_ids = {}
+
+    def style_id(self, name):
+        # Looking a style up by name scans styles.xml: once per document
+        if name not in self.style_ids:
+            try:
+                self.style_ids[name] = self.doc.styles[name].style_id
+            except KeyError:
+                # Style missing from the template: keep the default one
+                self.style_ids[name] = None
+        return self.style_ids[name]
+
+    def write(self, container, blocks, reuse=None):
+        for block in blocks:
+            if block[0] == "p":
+                _, style, runs = block
+                paragraph = container.add_paragraph() if reuse is None else reuse
+                reuse = None
+                if style and self.style_id(style):
+                    paragraph._p.style = self.style_id(style)
+                for text, fmt, href in runs:
+                    if not text:
+                        continue
+                    if href:
+                        _add_link(paragraph, text, fmt, href)
+                    else:
+                        _add_run(paragraph, text, fmt)
+            else:
+                rows = block[1]
+                columns = max(len(row) for row in rows)
+                table = container.add_table(rows=len(rows), cols=columns)
+                if self.style_id("Table Grid"):
+                    table.style = "Table Grid"
+                for row, cells in zip(table.rows, rows):
+                    for cell, cell_blocks in zip(row.cells, cells):
+                        # A new cell already holds an empty paragraph
+                        self.write(cell, cell_blocks, cell.paragraphs[0])
+                reuse = None
+
+
+def add_blocks(doc, blocks):
+    """Scrive i blocchi alla fine del documento `doc`"""
+    _BlockWriter(doc).write(doc, blocks)
+
+
+def add_html(doc, html):
+    """Aggiunge al documento l'HTML di un articolo"""
+    add_blocks(doc, html_to_blocks(html))
@@ -0,0 +1,945 @@
+"""Versioned schema migrations for the articoli SQLite database.
+
+The schema version is stored in `PRAGMA user_version`. Each migration step
+brings the database to its version and must be idempotent, so that databases
+created before versioning (user_version = 0) can be upgraded safely.
+
+Provides:
+- SCHEMA_VERSION
+- get_schema_version(conn)
+- apply_migrations(conn)
+- drop_secondary_indexes(conn) / create_secondary_indexes(conn)
+- rebuild_argomento_stats(conn)
+
+Since v5 the rows live in `t_articoli_base` (topic as an integer key into
+`topics`) and, since v6, the bodies in `t_articoli_body`; `t_articoli` is a
+writable view with the original columns.
+
+Used by both `ImportManager.connect` and `ArticoliExplorer.connect`.
+"""
+
+import logging
+import sqlite3
+
+from lib.dates import DATA_EPOCH_SQL
+
+
+def _column_names(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _v1_base_schema(conn):
+    """Tabella t_articoli (16 colonne del dump + esportato)"""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS t_articoli (
+            id_articolo INTEGER PRIMARY KEY,
+            data TEXT,
+            argomento TEXT,
+            titolo_articolo TEXT,
+            sotto_titolo TEXT,
+            TITLE TEXT,
+            testo_articolo TEXT,
+            nr_attach INTEGER,
+            titolo_foto TEXT,
+            foto_path TEXT,
+            link_esterno TEXT,
+            contatore_visite INTEGER,
+            attivo INTEGER,
+            id_forum INTEGER,
+            ultimo_accesso TEXT,
+            scadenza TEXT,
+            esportato INTEGER DEFAULT 0
+        )
+    """
+    )
+
+    # Databases created before the 'esportato' column existed
+    if "esportato" not in _column_names(conn, "t_articoli"):
+        conn.execute("ALTER TABLE t_articoli ADD COLUMN esportato INTEGER DEFAULT 0")
+
+
+def _v2_secondary_indexes(conn):
+    """Indici per le query dell'esploratore (ordine per data, filtro argomento)"""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_articoli_data ON t_articoli (data)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_articoli_argomento_data "
+        "ON t_articoli (argomento, data)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_articoli_da_esportare "
+        "ON t_articoli (data) WHERE esportato = 0"
+    )
+
+
+def _v3_fulltext(conn):
+    """Indice full-text FTS5 (vedi lib/fulltext.py)"""
+    try:
+        conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS t_articoli_fts USING fts5("
+            "titolo_articolo, sotto_titolo, testo, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+    except sqlite3.OperationalError as e:
+        # SQLite compiled without FTS5: the explorer falls back to LIKE
+        logging.warning(f"FTS5 non disponibile, ricerca senza indice: {e}")
+        return
+
+    # IDs waiting to be (re)indexed by lib.fulltext.sync_fulltext()
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS t_articoli_fts_pending "
+        "(id_articolo INTEGER PRIMARY KEY)"
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS t_articoli_fts_insert
+        AFTER INSERT ON t_articoli BEGIN
+            INSERT OR IGNORE INTO t_articoli_fts_pending VALUES (NEW.id_articolo);
+        END
+    """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS t_articoli_fts_update
+        AFTER UPDATE OF id_articolo, titolo_articolo, sotto_titolo, testo_articolo
+        ON t_articoli BEGIN
+            INSERT OR IGNORE INTO t_articoli_fts_pending VALUES (OLD.id_articolo);
+            INSERT OR IGNORE INTO t_articoli_fts_pending VALUES (NEW.id_articolo);
+        END
+    """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS t_articoli_fts_delete
+        AFTER DELETE ON t_articoli BEGIN
+            INSERT OR IGNORE INTO t_articoli_fts_pending VALUES (OLD.id_articolo);
+        END
+    """
+    )
+    conn.execute(
+        "INSERT OR IGNORE INTO t_articoli_fts_pending "
+        "SELECT id_articolo FROM t_articoli"
+    )
+
+
+# Dates below this bound are MySQL zero dates ('0000-00-00 00:00:00')
+_ZERO_DATE = "'0000-00-00 00:00:00'"
+
+# Statements shared by the argomento_stats triggers: {row} is NEW or OLD
+_STATS_ADD = f"""
+    INSERT INTO argomento_stats (argomento, articoli, esportati, data_min, data_max)
+    VALUES (
+        COALESCE({{row}}.argomento, ''), 1, COALESCE({{row}}.esportato, 0) != 0,
+        CASE WHEN {{row}}.data > {_ZERO_DATE} THEN {{row}}.data END,
+        CASE WHEN {{row}}.data > {_ZERO_DATE} THEN {{row}}.data END
+    )
+    ON CONFLICT (argomento) DO UPDATE SET
+        articoli = articoli + 1,
+        esportati = esportati + excluded.esportati,
+        data_min = min(
+            COALESCE(data_min, excluded.data_min),
+            COALESCE(excluded.data_min, data_min)
+        ),
+        data_max = max(
+            COALESCE(data_max, excluded.data_max),
+            COALESCE(excluded.data_max, data_max)
+        );
+"""
+
+_STATS_REMOVE = f"""
+    UPDATE argomento_stats SET
+        articoli = articoli - 1,
+        esportati = esportati - (COALESCE({{row}}.esportato, 0) != 0),
+        data_min = (
+            SELECT MIN(data) FROM t_articoli
+            WHERE argomento = argomento_stats.argomento AND data > {_ZERO_DATE}
+        ),
+        data_max = (
+            SELECT MAX(data) FROM t_articoli
+            WHERE argomento = argomento_stats.argomento AND data > {_ZERO_DATE}
+        )
+    WHERE argomento = COALESCE({{row}}.argomento, '');
+    DELETE FROM argomento_stats
+    WHERE argomento = COALESCE({{row}}.argomento, '') AND articoli <= 0;
+"""
+
+
+def _v4_argomento_stats(conn):
+    """Statistiche per argomento mantenute da trigger (vedi get_argomenti)"""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS argomento_stats (
+            argomento TEXT PRIMARY KEY NOT NULL,
+            articoli INTEGER NOT NULL DEFAULT 0,
+            esportati INTEGER NOT NULL DEFAULT 0,
+            data_min TEXT,
+            data_max TEXT
+        )
+    """
+    )
+    conn.execute(
+        "CREATE TRIGGER IF NOT EXISTS argomento_stats_insert "
+        "AFTER INSERT ON t_articoli BEGIN " + _STATS_ADD.format(row="NEW") + " END"
+    )
+    conn.execute(
+        "CREATE TRIGGER IF NOT EXISTS argomento_stats_delete "
+        "AFTER DELETE ON t_articoli BEGIN " + _STATS_REMOVE.format(row="OLD") + " END"
+    )
+    # Export marking only moves the exported counter
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS argomento_stats_esportato
+        AFTER UPDATE OF esportato ON t_articoli
+        WHEN OLD.argomento IS NEW.argomento AND OLD.data IS NEW.data
+        BEGIN
+            UPDATE argomento_stats SET esportati = esportati
+                - (COALESCE(OLD.esportato, 0) != 0)
+                + (COALESCE(NEW.esportato, 0) != 0)
+            WHERE argomento = COALESCE(NEW.argomento, '');
+        END
+    """
+    )
+    conn.execute(
+        "CREATE TRIGGER IF NOT EXISTS argomento_stats_update "
+        "AFTER UPDATE OF argomento, data, esportato ON t_articoli "
+        "WHEN OLD.argomento IS NOT NEW.argomento OR OLD.data IS NOT NEW.data "
+        "BEGIN "
+        + _STATS_REMOVE.format(row="OLD")
+        + _STATS_ADD.format(row="NEW")
+        + " END"
+    )
+    rebuild_argomento_stats(conn)
+    _v4_fulltext_queue_upsert(conn)
+
+
+def _v4_fulltext_queue_upsert(conn):
+    """Ricrea i trigger della coda FTS con ON CONFLICT DO NOTHING.
+
+    Inside a trigger, INSERT OR IGNORE takes the conflict policy of the outer
+    statement, so the importer's upsert made the v3 triggers abort on IDs
+    already queued. An upsert clause in the trigger is not overridden.
+    """
+    if not conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' "
+        "AND name = 't_articoli_fts_insert'"
+    ).fetchone():
+        return  # SQLite without FTS5: v3 created no triggers
+
+    queue = "INSERT INTO t_articoli_fts_pending VALUES ({}) ON CONFLICT DO NOTHING;"
+    for name in ("insert", "update", "delete"):
+        conn.execute(f"DROP TRIGGER t_articoli_fts_{name}")
+    conn.execute(
+        "CREATE TRIGGER t_articoli_fts_insert AFTER INSERT ON t_articoli BEGIN "
+        + queue.format("NEW.id_articolo")
+        + " END"
+    )
+    conn.execute(
+        "CREATE TRIGGER t_articoli_fts_update "
+        "AFTER UPDATE OF id_articolo, titolo_articolo, sotto_titolo, testo_articolo "
+        "ON t_articoli BEGIN "
+        + queue.format("OLD.id_articolo")
+        + queue.format("NEW.id_articolo")
+        + " END"
+    )
+    conn.execute(
+        "CREATE TRIGGER t_articoli_fts_delete AFTER DELETE ON t_articoli BEGIN "
+        + queue.format("OLD.id_articolo")
+        + " END"
+    )
+
+
+# Columns of the t_articoli view, in the order of the MySQL dump + esportato.
+# In t_articoli_base, 'argomento' is replaced by 'id_topic'.
+_ARTICOLI_COLUMNS = [
+    "id_articolo",
+    "data",
+    "argomento",
+    "titolo_articolo",
+    "sotto_titolo",
+    "TITLE",
+    "testo_articolo",
+    "nr_attach",
+    "titolo_foto",
+    "foto_path",
+    "link_esterno",
+    "contatore_visite",
+    "attivo",
+    "id_forum",
+    "ultimo_accesso",
+    "scadenza",
+    "esportato",
+]
+
+_TOPIC_OF_NEW = "(SELECT id_topic FROM topics WHERE nome = NEW.argomento)"
+
+# Statements shared by the v5 argomento_stats triggers: {row} is NEW or OLD.
+# Articles without a topic are counted under id_topic 0.
+_STATS_ADD_TOPIC = f"""
+    INSERT INTO argomento_stats (id_topic, articoli, esportati, data_min, data_max)
+    VALUES (
+        COALESCE({{row}}.id_topic, 0), 1, COALESCE({{row}}.esportato, 0) != 0,
+        CASE WHEN {{row}}.data > {_ZERO_DATE} THEN {{row}}.data END,
+        CASE WHEN {{row}}.data > {_ZERO_DATE} THEN {{row}}.data END
+    )
+    ON CONFLICT (id_topic) DO UPDATE SET
+        articoli = articoli + 1,
+        esportati = esportati + excluded.esportati,
+        data_min = min(
+            COALESCE(data_min, excluded.data_min),
+            COALESCE(excluded.data_min, data_min)
+        ),
+        data_max = max(
+            COALESCE(data_max, excluded.data_max),
+            COALESCE(excluded.data_max, data_max)
+        );
+"""
+
+_STATS_REMOVE_TOPIC = f"""
+    UPDATE argomento_stats SET
+        articoli = articoli - 1,
+        esportati = esportati - (COALESCE({{row}}.esportato, 0) != 0),
+        data_min = (
+            SELECT MIN(data) FROM t_articoli_base
+            WHERE id_topic IS NULLIF(argomento_stats.id_topic, 0)
+            AND data > {_ZERO_DATE}
+        ),
+        data_max = (
+            SELECT MAX(data) FROM t_articoli_base
+            WHERE id_topic IS NULLIF(argomento_stats.id_topic, 0)
+            AND data > {_ZERO_DATE}
+        )
+    WHERE id_topic = COALESCE({{row}}.id_topic, 0);
+    DELETE FROM argomento_stats
+    WHERE id_topic = COALESCE({{row}}.id_topic, 0) AND articoli <= 0;
+"""
+
+
+def _create_articoli_view(conn, body_table=False, data_epoch=False):
+    """Vista t_articoli con le colonne originali, scrivibile da trigger.
+
+    Shared by the steps that change the layout under the view: `body_table`
+    (v6) reads and writes the text in t_articoli_body, `data_epoch` (v8)
+    adds the derived column, read-only, computed from `data` on write. The
+    view and its INSTEAD OF triggers must not exist yet.
+    """
+    columns = _ARTICOLI_COLUMNS + (["data_epoch"] if data_epoch else [])
+    view_columns = ", ".join(
+        {"argomento": "t.nome AS argomento"}.get(c)
+        or (f"x.{c}" if body_table and c == "testo_articolo" else f"b.{c}")
+        for c in columns
+    )
+    source = "t_articoli_base b LEFT JOIN topics t ON t.id_topic = b.id_topic" + (
+        " LEFT JOIN t_articoli_body x ON x.id_articolo = b.id_articolo"
+        if body_table
+        else ""
+    )
+    conn.execute(f"CREATE VIEW t_articoli AS SELECT {view_columns} FROM {source}")
+
+    # Writes through the view: unknown topics are added to the dictionary
+    add_topic = (
+        "INSERT INTO topics (nome) SELECT NEW.argomento "
+        "WHERE NEW.argomento IS NOT NULL {} ON CONFLICT (nome) DO NOTHING;"
+    )
+    view_base_columns = [
+        c for c in _ARTICOLI_COLUMNS if not (body_table and c == "testo_articolo")
+    ]
+    base_columns = ["id_topic" if c == "argomento" else c for c in view_base_columns]
+    values = [
+        (
+            _TOPIC_OF_NEW
+            if c == "argomento"
+            else "COALESCE(NEW.esportato, 0)" if c == "esportato" else f"NEW.{c}"
+        )
+        for c in view_base_columns
+    ]
+    assignments = [
+        f"id_topic = {_TOPIC_OF_NEW}" if c == "argomento" else f"{c} = NEW.{c}"
+        for c in view_base_columns
+    ]
+    if data_epoch:
+        base_columns.append("data_epoch")
+        values.append(DATA_EPOCH_SQL.format("NEW.data"))
+        assignments.append(f"data_epoch = {DATA_EPOCH_SQL.format('NEW.data')}")
+
+    # last_insert_rowid() is the base row's id when NEW.id_articolo is NULL
+    insert_body = (
+        " INSERT INTO t_articoli_body (id_articolo, testo_articolo) "
+        "SELECT COALESCE(NEW.id_articolo, last_insert_rowid()), NEW.testo_articolo "
+        "WHERE NEW.testo_articolo IS NOT NULL;"
+    )
+    update_body = (
+        " DELETE FROM t_articoli_body "
+        "WHERE id_articolo = NEW.id_articolo AND NEW.testo_articolo IS NULL;"
+        " INSERT INTO t_articoli_body (id_articolo, testo_articolo) "
+        "SELECT NEW.id_articolo, NEW.testo_articolo "
+        "WHERE NEW.testo_articolo IS NOT NULL "
+        "AND NEW.testo_articolo IS NOT OLD.testo_articolo "
+        "ON CONFLICT (id_articolo) DO UPDATE "
+        "SET testo_articolo = excluded.testo_articolo;"
+    )
+    conn.execute(
+        "CREATE TRIGGER t_articoli_insert INSTEAD OF INSERT ON t_articoli BEGIN "
+        + add_topic.format("")
+        + f" INSERT INTO t_articoli_base ({', '.join(base_columns)}) "
+        f"VALUES ({', '.join(values)});" + (insert_body if body_table else "") + " END"
+    )
+    conn.execute(
+        "CREATE TRIGGER t_articoli_update INSTEAD OF UPDATE ON t_articoli BEGIN "
+        + add_topic.format("AND NEW.argomento IS NOT OLD.argomento")
+        + f" UPDATE t_articoli_base SET {', '.join(assignments)} "
+        "WHERE id_articolo = OLD.id_articolo;"
+        + (update_body if body_table else "")
+        + " END"
+    )
+    conn.execute(
+        "CREATE TRIGGER t_articoli_delete INSTEAD OF DELETE ON t_articoli BEGIN "
+        "DELETE FROM t_articoli_base WHERE id_articolo = OLD.id_articolo; END"
+    )
+
+
+def _v5_topics(conn):
+    """Argomenti in una tabella topics, referenziata per chiave intera.
+
+    The rows move to t_articoli_base (id_topic instead of argomento) and
+    t_articoli becomes a view with the original columns, writable through
+    INSTEAD OF triggers, so existing queries and tools keep working.
+    """
+    kind = conn.execute(
+        "SELECT type FROM sqlite_master WHERE name = 't_articoli'"
+    ).fetchone()
+    if kind == ("view",):
+        return
+
+    conn.execute(
+        "CREATE TABLE topics (id_topic INTEGER PRIMARY KEY, nome TEXT NOT NULL UNIQUE)"
+    )
+    conn.execute(
+        "INSERT INTO topics (nome) SELECT argomento FROM t_articoli "
+        "WHERE argomento IS NOT NULL GROUP BY argomento ORDER BY COUNT(*) DESC"
+    )
+
+    base_columns = ["id_topic" if c == "argomento" else c for c in _ARTICOLI_COLUMNS]
+    conn.execute(
+        """
+        CREATE TABLE t_articoli_base (
+            id_articolo INTEGER PRIMARY KEY,
+            data TEXT,
+            id_topic INTEGER REFERENCES topics (id_topic),
+            titolo_articolo TEXT,
+            sotto_titolo TEXT,
+            TITLE TEXT,
+            testo_articolo TEXT,
+            nr_attach INTEGER,
+            titolo_foto TEXT,
+            foto_path TEXT,
+            link_esterno TEXT,
+            contatore_visite INTEGER,
+            attivo INTEGER,
+            id_forum INTEGER,
+            ultimo_accesso TEXT,
+            scadenza TEXT,
+            esportato INTEGER DEFAULT 0
+        )
+    """
+    )
+    select = ", ".join(
+        "t.id_topic" if c == "id_topic" else f"a.{c}" for c in base_columns
+    )
+    conn.execute(
+        f"INSERT INTO t_articoli_base ({', '.join(base_columns)}) SELECT {select} "
+        "FROM t_articoli a LEFT JOIN topics t ON t.nome = a.argomento"
+    )
+
+    # Drops the old table's indexes and triggers too
+    conn.execute("DROP TABLE t_articoli")
+
+    _create_articoli_view(conn)
+
+    conn.execute("CREATE INDEX idx_articoli_data ON t_articoli_base (data)")
+    conn.execute(
+        "CREATE INDEX idx_articoli_topic_data ON t_articoli_base (id_topic, data)"
+    )
+    conn.execute(
+        "CREATE INDEX idx_articoli_da_esportare "
+        "ON t_articoli_base (data) WHERE esportato = 0"
+    )
+
+    # Full-text queue, now on the base table. The view rewrites every column
+    # on UPDATE, so only queue articles whose indexed text actually changed.
+    if conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 't_articoli_fts'"
+    ).fetchone():
+        queue = "INSERT INTO t_articoli_fts_pending VALUES ({}) ON CONFLICT DO NOTHING;"
+        conn.execute(
+            "CREATE TRIGGER t_articoli_fts_insert AFTER INSERT ON t_articoli_base "
+            "BEGIN " + queue.format("NEW.id_articolo") + " END"
+        )
+        conn.execute(
+            "CREATE TRIGGER t_articoli_fts_update AFTER UPDATE OF id_articolo, "
+            "titolo_articolo, sotto_titolo, testo_articolo ON t_articoli_base "
+            "WHEN OLD.id_articolo IS NOT NEW.id_articolo "
+            "OR OLD.titolo_articolo IS NOT NEW.titolo_articolo "
+            "OR OLD.sotto_titolo IS NOT NEW.sotto_titolo "
+            "OR OLD.testo_articolo IS NOT NEW.testo_articolo BEGIN "
+            + queue.format("OLD.id_articolo")
+            + queue.format("NEW.id_articolo")
+            + " END"
+        )
+        conn.execute(
+            "CREATE TRIGGER t_articoli_fts_delete AFTER DELETE ON t_articoli_base "
+            "BEGIN " + queue.format("OLD.id_articolo") + " END"
+        )
+
+    # Statistics keyed by id_topic
+    conn.execute("DROP TABLE argomento_stats")
+    conn.execute(
+        """
+        CREATE TABLE argomento_stats (
+            id_topic INTEGER PRIMARY KEY,
+            articoli INTEGER NOT NULL DEFAULT 0,
+            esportati INTEGER NOT NULL DEFAULT 0,
+            data_min TEXT,
+            data_max TEXT
+        )
+    """
+    )
+    conn.execute(
+        "CREATE TRIGGER argomento_stats_insert AFTER INSERT ON t_articoli_base "
+        "BEGIN " + _STATS_ADD_TOPIC.format(row="NEW") + " END"
+    )
+    conn.execute(
+        "CREATE TRIGGER argomento_stats_delete AFTER DELETE ON t_articoli_base "
+        "BEGIN " + _STATS_REMOVE_TOPIC.format(row="OLD") + " END"
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER argomento_stats_esportato
+        AFTER UPDATE OF esportato ON t_articoli_base
+        WHEN OLD.id_topic IS NEW.id_topic AND OLD.data IS NEW.data
+        BEGIN
+            UPDATE argomento_stats SET esportati = esportati
+                - (COALESCE(OLD.esportato, 0) != 0)
+                + (COALESCE(NEW.esportato, 0) != 0)
+            WHERE id_topic = COALESCE(NEW.id_topic, 0);
+        END
+    """
+    )
+    conn.execute(
+        "CREATE TRIGGER argomento_stats_update "
+        "AFTER UPDATE OF id_topic, data, esportato ON t_articoli_base "
+        "WHEN OLD.id_topic IS NOT NEW.id_topic OR OLD.data IS NOT NEW.data "
+        "BEGIN "
+        + _STATS_REMOVE_TOPIC.format(row="OLD")
+        + _STATS_ADD_TOPIC.format(row="NEW")
+        + " END"
+    )
+    rebuild_argomento_stats(conn)
+
+
+def _v6_body_table(conn):
+    """Testi degli articoli in t_articoli_body (partizionamento verticale).
+
+    List queries on the t_articoli view never reference testo_articolo, so
+    SQLite drops the join and only scans the narrow base rows. The body
+    column has no declared type: it holds TEXT, or a zlib BLOB written by
+    lib.body.encode_body().
+    """
+    if conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 't_articoli_body'"
+    ).fetchone():
+        return
+
+    conn.execute("DROP VIEW t_articoli")  # and its INSTEAD OF triggers
+    conn.execute(
+        "CREATE TABLE t_articoli_body "
+        "(id_articolo INTEGER PRIMARY KEY, testo_articolo)"
+    )
+    conn.execute(
+        "INSERT INTO t_articoli_body SELECT id_articolo, testo_articolo "
+        "FROM t_articoli_base WHERE testo_articolo IS NOT NULL"
+    )
+
+    base_columns = [
+        "id_topic" if c == "argomento" else c
+        for c in _ARTICOLI_COLUMNS
+        if c != "testo_articolo"
+    ]
+    conn.execute(
+        """
+        CREATE TABLE t_articoli_base_v6 (
+            id_articolo INTEGER PRIMARY KEY,
+            data TEXT,
+            id_topic INTEGER REFERENCES topics (id_topic),
+            titolo_articolo TEXT,
+            sotto_titolo TEXT,
+            TITLE TEXT,
+            nr_attach INTEGER,
+            titolo_foto TEXT,
+            foto_path TEXT,
+            link_esterno TEXT,
+            contatore_visite INTEGER,
+            attivo INTEGER,
+            id_forum INTEGER,
+            ultimo_accesso TEXT,
+            scadenza TEXT,
+            esportato INTEGER DEFAULT 0
+        )
+    """
+    )
+    column_list = ", ".join(base_columns)
+    conn.execute(
+        f"INSERT INTO t_articoli_base_v6 ({column_list}) "
+        f"SELECT {column_list} FROM t_articoli_base"
+    )
+    conn.execute("DROP TABLE t_articoli_base")  # with its indexes and triggers
+    conn.execute("ALTER TABLE t_articoli_base_v6 RENAME TO t_articoli_base")
+
+    conn.execute("CREATE INDEX idx_articoli_data ON t_articoli_base (data)")
+    conn.execute(
+        "CREATE INDEX idx_articoli_topic_data ON t_articoli_base (id_topic, data)"
+    )
+    conn.execute(
+        "CREATE INDEX idx_articoli_da_esportare "
+        "ON t_articoli_base (data) WHERE esportato = 0"
+    )
+
+    # A body follows its article
+    conn.execute(
+        "CREATE TRIGGER t_articoli_body_delete AFTER DELETE ON t_articoli_base "
+        "BEGIN DELETE FROM t_articoli_body WHERE id_articolo = OLD.id_articolo; END"
+    )
+    conn.execute(
+        "CREATE TRIGGER t_articoli_body_renumber "
+        "AFTER UPDATE OF id_articolo ON t_articoli_base "
+        "WHEN OLD.id_articolo IS NOT NEW.id_articolo BEGIN "
+        "UPDATE t_articoli_body SET id_articolo = NEW.id_articolo "
+        "WHERE id_articolo = OLD.id_articolo; END"
+    )
+
+    # Full-text queue: titles on the base table, text on the body table
+    if conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 't_articoli_fts'"
+    ).fetchone():
+        queue = "INSERT INTO t_articoli_fts_pending VALUES ({}) ON CONFLICT DO NOTHING;"
+        for table in ("t_articoli_base", "t_articoli_body"):
+            conn.execute(
+                f"CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} "
+                "BEGIN " + queue.format("NEW.id_articolo") + " END"
+            )
+            conn.execute(
+                f"CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} "
+                "BEGIN " + queue.format("OLD.id_articolo") + " END"
+            )
+        conn.execute(
+            "CREATE TRIGGER t_articoli_base_fts_update AFTER UPDATE OF id_articolo, "
+            "titolo_articolo, sotto_titolo ON t_articoli_base "
+            "WHEN OLD.id_articolo IS NOT NEW.id_articolo "
+            "OR OLD.titolo_articolo IS NOT NEW.titolo_articolo "
+            "OR OLD.sotto_titolo IS NOT NEW.sotto_titolo BEGIN "
+            + queue.format("OLD.id_articolo")
+            + queue.format("NEW.id_articolo")
+            + " END"
+        )
+        conn.execute(
+            "CREATE TRIGGER t_articoli_body_fts_update "
+            "AFTER UPDATE ON t_articoli_body "
+            "WHEN OLD.testo_articolo IS NOT NEW.testo_articolo "
+            "OR OLD.id_articolo IS NOT NEW.id_articolo BEGIN "
+            + queue.format("OLD.id_articolo")
+            + queue.format("NEW.id_articolo")
+            + " END"
+        )
+
+    conn.execute(
+        "CREATE TRIGGER argomento_stats_insert AFTER INSERT ON t_articoli_base "
+        "BEGIN " + _STATS_ADD_TOPIC.format(row="NEW") + " END"
+    )
+    conn.execute(
+        "CREATE TRIGGER argomento_stats_delete AFTER DELETE ON t_articoli_base "
+        "BEGIN " + _STATS_REMOVE_TOPIC.format(row="OLD") + " END"
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER argomento_stats_esportato
+        AFTER UPDATE OF esportato ON t_articoli_base
+        WHEN OLD.id_topic IS NEW.id_topic AND OLD.data IS NEW.data
+        BEGIN
+            UPDATE argomento_stats SET esportati = esportati
+                - (COALESCE(OLD.esportato, 0) != 0)
+                + (COALESCE(NEW.esportato, 0) != 0)
+            WHERE id_topic = COALESCE(NEW.id_topic, 0);
+        END
+    """
+    )
+    conn.execute(
+        "CREATE TRIGGER argomento_stats_update "
+        "AFTER UPDATE OF id_topic, data, esportato ON t_articoli_base "
+        "WHEN OLD.id_topic IS NOT NEW.id_topic OR OLD.data IS NOT NEW.data "
+        "BEGIN "
+        + _STATS_REMOVE_TOPIC.format(row="OLD")
+        + _STATS_ADD_TOPIC.format(row="NEW")
+        + " END"
+    )
+
+    _create_articoli_view(conn, body_table=True)
+
+
+def _v7_previews(conn):
+    """Anteprime in testo semplice dei testi (vedi lib/preview.py)"""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS t_articoli_preview (
+            id_articolo INTEGER PRIMARY KEY,
+            hash_testo BLOB,
+            caratteri INTEGER,
+            parole INTEGER,
+            anteprima TEXT
+        )
+    """
+    )
+    # Any change to a body makes its preview stale: drop it, so that
+    # lib.preview.sync_previews() recomputes it
+    drop = "DELETE FROM t_articoli_preview WHERE id_articolo = {};"
+    conn.execute(
+        "CREATE TRIGGER IF NOT EXISTS t_articoli_preview_insert "
+        "AFTER INSERT ON t_articoli_body BEGIN "
+        + drop.format("NEW.id_articolo")
+        + " END"
+    )
+    conn.execute(
+        "CREATE TRIGGER IF NOT EXISTS t_articoli_preview_update "
+        "AFTER UPDATE ON t_articoli_body "
+        "WHEN OLD.testo_articolo IS NOT NEW.testo_articolo "
+        "OR OLD.id_articolo IS NOT NEW.id_articolo BEGIN "
+        + drop.format("OLD.id_articolo")
+        + drop.format("NEW.id_articolo")
+        + " END"
+    )
+    conn.execute(
+        "CREATE TRIGGER IF NOT EXISTS t_articoli_preview_delete "
+        "AFTER DELETE ON t_articoli_body BEGIN "
+        + drop.format("OLD.id_articolo")
+        + " END"
+    )
+
+
+def _v8_data_epoch(conn):
+    """Colonna intera data_epoch (vedi lib/dates.py) con i relativi indici"""
+    if "data_epoch" in _column_names(conn, "t_articoli_base"):
+        return
+
+    epoch_of = DATA_EPOCH_SQL.format
+    conn.execute("ALTER TABLE t_articoli_base ADD COLUMN data_epoch INTEGER")
+    conn.execute(f"UPDATE t_articoli_base SET data_epoch = {epoch_of('data')}")
+
+    for name in (
+        "idx_articoli_data",
+        "idx_articoli_topic_data",
+        "idx_articoli_da_esportare",
+    ):
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    conn.execute("CREATE INDEX idx_articoli_data_epoch ON t_articoli_base (data_epoch)")
+    conn.execute(
+        "CREATE INDEX idx_articoli_topic_epoch "
+        "ON t_articoli_base (id_topic, data_epoch)"
+    )
+    conn.execute(
+        "CREATE INDEX idx_articoli_da_esportare "
+        "ON t_articoli_base (data_epoch) WHERE esportato = 0"
+    )
+
+    # Writers that do not set data_epoch (the importer and the view do)
+    fix = (
+        f"UPDATE t_articoli_base SET data_epoch = {epoch_of('NEW.data')} "
+        "WHERE id_articolo = NEW.id_articolo;"
+    )
+    stale = f"NEW.data_epoch IS NOT {epoch_of('NEW.data')}"
+    conn.execute(
+        "CREATE TRIGGER t_articoli_base_epoch_insert AFTER INSERT ON t_articoli_base "
+        f"WHEN {stale} BEGIN {fix} END"
+    )
+    conn.execute(
+        "CREATE TRIGGER t_articoli_base_epoch_update "
+        "AFTER UPDATE OF data, data_epoch ON t_articoli_base "
+        f"WHEN {stale} BEGIN {fix} END"
+    )
+
+    # The view gains data_epoch (read-only: always derived from data)
+    conn.execute("DROP VIEW t_articoli")  # and its INSTEAD OF triggers
+    _create_articoli_view(conn, body_table=True, data_epoch=True)
+
+
+def _v9_export_jobs(conn):
+    """Coda persistente degli export (vedi lib/export_jobs.py)"""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS export_jobs (
+            id_articolo INTEGER PRIMARY KEY,
+            state TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            available_at INTEGER NOT NULL DEFAULT 0,
+            worker TEXT,
+            claimed_at INTEGER,
+            error TEXT,
+            path TEXT
+        )
+    """
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_export_jobs_state "
+        "ON export_jobs (state, available_at)"
+    )
+
+
+def _v10_body_blocks(conn):
+    """Cache dei blocchi dei testi per hash (vedi lib/blocks.py).
+
+    Keyed by the body hash of t_articoli_preview, so no trigger is needed:
+    a changed body has a new hash, and lib.blocks.sync_blocks() drops the
+    entries no body uses any more. The blocks column has no declared type,
+    like the bodies: TEXT, or a zlib BLOB.
+    """
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS t_articoli_blocchi (
+            hash_testo BLOB PRIMARY KEY,
+            versione INTEGER NOT NULL,
+            blocchi NOT NULL
+        )
+    """
+    )
+
+
+# Ordered list of (version, description, step). Never edit or reorder a
+# released step: add a new one with the next version instead.
+MIGRATIONS = [
+    (1, "Tabella t_articoli con colonna esportato", _v1_base_schema),
+    (2, "Indici secondari su data, argomento ed esportato", _v2_secondary_indexes),
+    (3, "Ricerca full-text FTS5", _v3_fulltext),
+    (4, "Statistiche per argomento (argomento_stats)", _v4_argomento_stats),
+    (5, "Argomenti nella tabella topics (t_articoli diventa una vista)", _v5_topics),
+    (6, "Testi degli articoli in t_articoli_body", _v6_body_table),
+    (7, "Anteprime dei testi (t_articoli_preview)", _v7_previews),
+    (8, "Data intera data_epoch e indici per periodo", _v8_data_epoch),
+    (9, "Coda persistente degli export (export_jobs)", _v9_export_jobs),
+    (10, "Cache dei blocchi dei testi (t_articoli_blocchi)", _v10_body_blocks),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Secondary indexes of the current schema, by name. Unlike the migration
+# steps above, this always describes the latest version: the importer uses it
+# to drop and rebuild the indexes around large imports.
+SECONDARY_INDEXES = {
+    "idx_articoli_data_epoch": "t_articoli_base (data_epoch)",
+    "idx_articoli_topic_epoch": "t_articoli_base (id_topic, data_epoch)",
+    "idx_articoli_da_esportare": "t_articoli_base (data_epoch) WHERE esportato = 0",
+}
+
+
+def get_schema_version(conn):
+    """Ritorna la versione dello schema (PRAGMA user_version)"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def apply_migrations(conn):
+    """Applica le migrazioni mancanti in un'unica transazione.
+
+    The write lock is taken up front (BEGIN IMMEDIATE) and the version is
+    re-read under it, so concurrent processes never apply a step twice. On
+    error everything is rolled back and the exception is re-raised.
+
+    Returns the list of versions applied (empty if already up to date).
+    """
+    if get_schema_version(conn) >= SCHEMA_VERSION:
+        return []
+
+    conn.commit()  # close any implicit transaction opened by the caller
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None  # manual transaction control
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            current = get_schema_version(conn)
+            applied = []
+            for version, description, step in MIGRATIONS:
+                if version <= current:
+                    continue
+                logging.debug(f"Migrazione schema v{version}: {description}")
+                step(conn)
+                applied.append(version)
+            if applied:
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+        except BaseException:
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+            raise
+    finally:
+        conn.isolation_level = isolation_level
+
+    return applied
+
+
+def drop_secondary_indexes(conn):
+    """Elimina gli indici secondari (prima di un import massivo).
+
+    Returns the names of the indexes that were dropped.
+    """
+    existing = {
+        row[0]
+        for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    }
+    dropped = []
+    for name in SECONDARY_INDEXES:
+        if name in existing:
+            conn.execute(f"DROP INDEX {name}")
+            dropped.append(name)
+    return dropped
+
+
+def create_secondary_indexes(conn):
+    """Ricrea gli indici secondari mancanti (dopo un import massivo)"""
+    for name, definition in SECONDARY_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+
+
+def rebuild_argomento_stats(conn):
+    """Ricalcola da zero la tabella argomento_stats.
+
+    The triggers keep it current; this is only needed to populate it the
+    first time, or to repair it after writes made with triggers disabled.
+    The statistics are keyed by topic name up to v4 and by id_topic from v5
+    (which rebuilds them): both layouts are handled, so v4 can run this too.
+    """
+    conn.execute("DELETE FROM argomento_stats")
+    if "id_topic" not in _column_names(conn, "argomento_stats"):
+        conn.execute(
+            f"""
+            INSERT INTO argomento_stats
+            SELECT
+                COALESCE(argomento, ''),
+                COUNT(*),
+                SUM(COALESCE(esportato, 0) != 0),
+                MIN(CASE WHEN data > {_ZERO_DATE} THEN data END),
+                MAX(CASE WHEN data > {_ZERO_DATE} THEN data END)
+            FROM t_articoli
+            GROUP BY COALESCE(argomento, '')
+        """
+        )
+        return
+    conn.execute(
+        f"""
+        INSERT INTO argomento_stats
+        SELECT
+            COALESCE(id_topic, 0),
+            COUNT(*),
+            SUM(COALESCE(esportato, 0) != 0),
+            MIN(CASE WHEN data > {_ZERO_DATE} THEN data END),
+            MAX(CASE WHEN data > {_ZERO_DATE} THEN data END)
+        FROM t_articoli_base
+        GROUP BY COALESCE(id_topic, 0)
+    """
+    )
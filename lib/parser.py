@@ -3,6 +3,7 @@
 Provides:
 - parse_sql_value(value_str)
 - extract_tuple_values(content, start_pos)
+- iter_insert_tuples(content, table)
 
 Designed to be small and easily testable.
 """
@@ -48,53 +49,79 @@ def parse_sql_value(value_str):
     return s
 
 
+# MySQL backslash escapes inside quoted strings (\% and \_ keep the backslash)
+_MYSQL_ESCAPES = {
+    "0": "\0",
+    "b": "\b",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+    "Z": "\x1a",
+    "%": "\\%",
+    "_": "\\_",
+}
+
+# Run of characters inside a quoted string that need no special handling
+_PLAIN_CHUNK = re.compile(r"[^'\\]+")
+
+
 def extract_tuple_values(content, start_pos):
     """Extract a tuple starting at or after start_pos in content.
 
+    Quoted strings are decoded here (MySQL backslash escapes and doubled
+    quotes), so the values round-trip with the output of lib/dump_writer.py.
+
     Returns (values_list, next_pos) or (None, start_pos) if no tuple found.
     """
-    i = start_pos
-    n = len(content)
-
-    # Find the opening parenthesis
-    while i < n and content[i] != "(":
-        i += 1
-
-    if i >= n:
+    i = content.find("(", start_pos)
+    if i == -1:
         return None, start_pos
 
     i += 1  # skip '('
+    n = len(content)
 
     values = []
     current = ""
-    in_quotes = False
-    escape = False
+    text = None  # decoded content when the current value is a quoted string
     paren_level = 0
 
+    def finish():
+        if text is not None:
+            return "".join(text)
+        return parse_sql_value(current.strip())
+
     while i < n:
         ch = content[i]
 
-        if escape:
-            current += ch
-            escape = False
-            i += 1
-            continue
-
-        if ch == "\\":
-            escape = True
-            # don't add backslash itself; next char will be added in escape path
-            i += 1
-            continue
-
         if ch == "'":
-            in_quotes = not in_quotes
-            current += ch
-            i += 1
-            continue
-
-        if in_quotes:
-            current += ch
+            # Quoted string: decode until the closing quote
+            if text is None:
+                text = []
             i += 1
+            while i < n:
+                m = _PLAIN_CHUNK.match(content, i)
+                if m:
+                    text.append(m.group())
+                    i = m.end()
+                    continue
+                ch = content[i]
+                if ch == "\\" and i + 1 < n:
+                    nxt = content[i + 1]
+                    text.append(_MYSQL_ESCAPES.get(nxt, nxt))
+                    i += 2
+                    continue
+                if ch == "'":
+                    if i + 1 < n and content[i + 1] == "'":
+                        text.append("'")
+                        i += 2
+                        continue
+                    break
+                # lone trailing backslash
+                text.append(ch)
+                i += 1
+            else:
+                return None, start_pos
+            i += 1  # skip closing quote
             continue
 
         if ch == "(":
@@ -110,14 +137,15 @@ def extract_tuple_values(content, start_pos):
                 i += 1
                 continue
             # end of tuple
-            if current.strip() != "":
-                values.append(parse_sql_value(current.strip()))
+            if text is not None or current.strip() != "":
+                values.append(finish())
             return values, i + 1
 
         if ch == ",":
             # value separator
-            values.append(parse_sql_value(current.strip()))
+            values.append(finish())
             current = ""
+            text = None
             i += 1
             continue
 
@@ -126,3 +154,38 @@ def extract_tuple_values(content, start_pos):
         i += 1
 
     return None, start_pos
+
+
+def iter_insert_tuples(content, table="t_articoli"):
+    """Yield the value lists of every `INSERT INTO `table` ... VALUES` tuple"""
+    insert_marker = f"INSERT INTO `{table}`"
+    values_marker = "VALUES"
+    pos = 0
+    while True:
+        pos = content.find(insert_marker, pos)
+        if pos == -1:
+            break
+
+        values_pos = content.find(values_marker, pos)
+        if values_pos == -1:
+            break
+
+        search_pos = values_pos + len(values_marker)
+
+        while True:
+            values, next_pos = extract_tuple_values(content, search_pos)
+
+            if values is None:
+                break
+
+            yield values
+
+            search_pos = next_pos
+            while search_pos < len(content) and content[search_pos] in " \n\r\t":
+                search_pos += 1
+
+            if search_pos >= len(content) or content[search_pos] != ",":
+                break
+            search_pos += 1
+
+        pos = search_pos
@@ -0,0 +1,130 @@
+"""Background prefetch of explorer pages, served from a small LRU cache.
+
+While the user reads a page, a worker thread with its own read-only
+connection loads the neighbouring pages and the full rows of the visible
+articles, so `[n]ext`, `[p]rev`, the article detail and the page export
+usually find their data already in memory.
+
+The cache is cleared when the data changes (PRAGMA data_version or a write
+made by the explorer). `clear()` also bumps a generation number, and values
+computed before the clear are dropped by `put()`: a prefetch still running
+on an old snapshot cannot repopulate the cache with stale rows.
+
+Provides:
+- PageCache
+- Prefetcher
+"""
+
+import collections
+import logging
+import queue
+import sqlite3
+import threading
+
+from lib.connection import open_readonly
+
+PAGE_CACHE_SIZE = 64
+
+
+class PageCache:
+    """Cache LRU thread-safe di pagine e articoli"""
+
+    def __init__(self, maxsize=PAGE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.generation = 0
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def get(self, key):
+        """Ritorna il valore di `key` (None se assente) e lo marca come recente"""
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key, value, generation=None):
+        """Salva `value`; ignorato se calcolato prima dell'ultimo clear()"""
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return False
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.generation += 1
+
+
+class Prefetcher:
+    """Thread di lettura in background con una connessione in sola lettura.
+
+    Jobs are callables taking the worker's connection. Each submit() makes
+    the jobs still queued from earlier calls obsolete: they describe pages
+    around a position the user has already left.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.error = None
+        self._queue = queue.Queue()
+        self._batch = 0
+        self._thread = threading.Thread(
+            target=self._run, name="esplora-prefetch", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def submit(self, *jobs):
+        """Accoda `jobs`, scartando quelli non ancora eseguiti"""
+        self._batch += 1
+        for job in jobs:
+            self._queue.put((self._batch, job))
+
+    def wait(self):
+        """Attende che la coda sia vuota (usato dai test)"""
+        self._queue.join()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        try:
+            conn = open_readonly(self.db_path)
+        except sqlite3.Error as e:
+            logging.debug(f"Prefetch disattivato: {e}")
+            self.error = e
+            conn = None
+
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    break
+                batch, job = item
+                if conn is None or batch != self._batch:
+                    continue
+                try:
+                    job(conn)
+                except sqlite3.Error as e:
+                    # A failed prefetch only costs a synchronous read later
+                    logging.debug(f"Prefetch fallito: {e}")
+            finally:
+                self._queue.task_done()
+
+        if conn is not None:
+            conn.close()
@@ -0,0 +1,92 @@
+"""Plain-text previews of article bodies, computed once and stored.
+
+`t_articoli_preview` (migration v7) holds, for each body, the first
+PREVIEW_CHARS characters of its plain text, its length in characters and
+words, and a hash of the body. The importer recomputes a preview only when
+the hash changes; triggers on `t_articoli_body` drop the preview of any body
+changed by other tools, and `sync_previews()` fills the missing ones.
+
+A preview is the plain text of the body blocks (lib/blocks.py): the body
+is parsed once, and the blocks are cached in `t_articoli_blocchi` under the
+same hash for the renderers.
+
+Provides:
+- PREVIEW_CHARS
+- body_hash(text)
+- make_preview(text, body_blocks)
+- store_preview(conn, article_id, text, digest)
+- sync_previews(conn)
+"""
+
+import hashlib
+
+from lib import blocks
+from lib.body import decode_body
+
+PREVIEW_TABLE = "t_articoli_preview"
+PREVIEW_CHARS = 500
+
+_SYNC_BATCH = 500
+
+
+def body_hash(text):
+    """Hash (SHA-1, 20 byte) del testo di un articolo"""
+    return hashlib.sha1((text or "").encode("utf-8")).digest()
+
+
+def make_preview(text, body_blocks=None):
+    """Ritorna (anteprima, caratteri, parole) per il testo HTML `text`.
+
+    `body_blocks` are the blocks of `text`, if already parsed.
+    """
+    if not text:
+        return "", 0, 0
+    if body_blocks is None:
+        body_blocks = blocks.parse_body(text)
+    plain = blocks.blocks_to_text(body_blocks, " ")
+    return plain[:PREVIEW_CHARS], len(plain), len(plain.split())
+
+
+def store_preview(conn, article_id, text, digest=None):
+    """Calcola e salva l'anteprima di un articolo (e i blocchi del testo)"""
+    if digest is None:
+        digest = body_hash(text)
+    body_blocks = blocks.store_blocks(conn, digest, text)
+    anteprima, caratteri, parole = make_preview(text, body_blocks)
+    conn.execute(
+        f"INSERT OR REPLACE INTO {PREVIEW_TABLE} "
+        "(id_articolo, hash_testo, caratteri, parole, anteprima) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (
+            article_id,
+            digest,
+            caratteri,
+            parole,
+            anteprima,
+        ),
+    )
+
+
+def sync_previews(conn):
+    """Calcola le anteprime mancanti. Returns the number computed.
+
+    The block cache is then brought in line (blocks.sync_blocks()); the
+    caller's transaction is committed at the end.
+    """
+    computed = 0
+    while True:
+        rows = conn.execute(
+            "SELECT b.id_articolo, b.testo_articolo FROM t_articoli_body b "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {PREVIEW_TABLE} p "
+            "WHERE p.id_articolo = b.id_articolo) LIMIT ?",
+            (_SYNC_BATCH,),
+        ).fetchall()
+        if not rows:
+            break
+        for article_id, stored in rows:
+            store_preview(conn, article_id, decode_body(stored))
+        computed += len(rows)
+
+    blocks.sync_blocks(conn)
+    conn.commit()
+    return computed
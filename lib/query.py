@@ -0,0 +1,211 @@
+"""Filtered, streaming queries on `t_articoli` (the explorer's `query` command).
+
+The filters are the explorer's own (topic, period, search) plus the
+exported flag and an ID range. Rows are read with fetchmany() and written
+out one at a time, so the whole archive goes through in constant memory.
+
+Provides:
+- ARTICLE_COLUMNS, COLUMNS, DEFAULT_COLUMNS, FORMATS, ORDERS, BLOCKS_JOIN
+- filter_conditions(...)
+- build_query(columns, ...)
+- iter_rows(conn, sql, params, columns)
+- write_rows(rows, columns, fmt, out)
+"""
+
+import csv
+import json
+
+from lib import blocks, fulltext
+from lib.body import decode_body
+from lib.dates import period_bounds
+from lib.dump_writer import COLUMNS as DUMP_COLUMNS
+
+PREVIEW_COLUMNS = ("anteprima", "caratteri", "parole")
+# A full article, as exported: the view columns of the original table
+ARTICLE_COLUMNS = DUMP_COLUMNS + ("esportato",)
+COLUMNS = ARTICLE_COLUMNS + ("data_epoch",) + PREVIEW_COLUMNS
+DEFAULT_COLUMNS = ("id_articolo", "data", "argomento", "titolo_articolo", "esportato")
+
+# Cached blocks of a body, by the hash of its preview `p` (see lib/blocks.py)
+BLOCKS_JOIN = (
+    f" LEFT JOIN {blocks.BLOCKS_TABLE} x ON x.hash_testo = p.hash_testo "
+    f"AND x.versione = {blocks.BLOCKS_VERSION}"
+)
+
+FORMATS = ("jsonl", "csv", "table")
+ORDERS = ("data", "id", "rilevanza")
+
+FETCH_BATCH = 500
+
+# Table output: column widths come from the first batch, capped here
+TABLE_MAX_WIDTH = 40
+
+
+def filter_conditions(
+    argomento=None,
+    period=None,
+    like=None,
+    exported=None,
+    id_min=None,
+    id_max=None,
+    alias="",
+):
+    """Ritorna (condizioni, params) per i filtri dati, combinati in AND.
+
+    `like` searches title and subtitle with LIKE (the fallback when FTS5 is
+    not available); `alias` prefixes the column names ("a" -> "a.data").
+    """
+    col = f"{alias}." if alias else ""
+    conds, params = [], []
+    if argomento:
+        conds.append(f"{col}argomento = ?")
+        params.append(argomento)
+    bounds = period_bounds(period) if period else None
+    if bounds:
+        start, end = bounds
+        if start is not None:
+            conds.append(f"{col}data_epoch >= ?")
+            params.append(start)
+        if end is not None:
+            conds.append(f"{col}data_epoch < ?")
+            params.append(end)
+    if like:
+        conds.append(f"({col}titolo_articolo LIKE ? OR {col}sotto_titolo LIKE ?)")
+        params.extend([f"%{like}%"] * 2)
+    if exported is not None:
+        conds.append(f"{col}esportato = ?")
+        params.append(1 if exported else 0)
+    if id_min is not None:
+        conds.append(f"{col}id_articolo >= ?")
+        params.append(id_min)
+    if id_max is not None:
+        conds.append(f"{col}id_articolo <= ?")
+        params.append(id_max)
+    return conds, params
+
+
+def build_query(
+    columns, match=None, order="data", limit=None, with_blocks=False, **filters
+):
+    """Costruisce (sql, params) per le colonne e i filtri dati.
+
+    `match` is an FTS5 query (see fulltext.build_match_query); `filters`
+    are passed to filter_conditions(). Column names must come from COLUMNS.
+    `with_blocks` adds a last column with the cached blocks of the body
+    (see lib/blocks.py), NULL when not cached.
+    """
+    unknown = [c for c in columns if c not in COLUMNS]
+    if unknown:
+        raise ValueError(f"Colonne sconosciute: {', '.join(unknown)}")
+    if order == "rilevanza" and not match:
+        raise ValueError("L'ordine per rilevanza richiede una ricerca full-text")
+
+    select = ", ".join(f"p.{c}" if c in PREVIEW_COLUMNS else f"a.{c}" for c in columns)
+    conds, params = filter_conditions(alias="a", **filters)
+    fts = fulltext.FTS_TABLE
+    if match:
+        source = f"{fts} JOIN t_articoli a ON a.id_articolo = {fts}.rowid"
+        conds.insert(0, f"{fts} MATCH ?")
+        params.insert(0, match)
+    else:
+        source = "t_articoli a"
+    if with_blocks or any(c in PREVIEW_COLUMNS for c in columns):
+        source += " LEFT JOIN t_articoli_preview p ON p.id_articolo = a.id_articolo"
+    if with_blocks:
+        select += ", x.blocchi"
+        source += BLOCKS_JOIN
+
+    sql = f"SELECT {select} FROM {source}"
+    if conds:
+        sql += " WHERE " + " AND ".join(conds)
+    if order == "rilevanza":
+        weights = ", ".join(str(w) for w in fulltext.BM25_WEIGHTS)
+        sql += f" ORDER BY bm25({fts}, {weights}), a.id_articolo DESC"
+    elif order == "id":
+        sql += " ORDER BY a.id_articolo"
+    else:
+        # NULL (undated) rows sort last, as in the explorer
+        sql += " ORDER BY a.data_epoch DESC, a.id_articolo DESC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return sql, params
+
+
+def iter_rows(conn, sql, params, columns, batch_size=FETCH_BATCH):
+    """Esegue la query e produce le righe come tuple, a blocchi di fetchmany()"""
+    body = columns.index("testo_articolo") if "testo_articolo" in columns else None
+    cursor = conn.execute(sql, params)
+    try:
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            for row in batch:
+                row = tuple(row)
+                if body is not None:
+                    row = (*row[:body], decode_body(row[body]), *row[body + 1 :])
+                yield row
+    finally:
+        cursor.close()
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    return " ".join(str(value).split())
+
+
+def _write_table(rows, columns, out, first_batch=FETCH_BATCH):
+    head = []
+    for row in rows:
+        head.append(row)
+        if len(head) >= first_batch:
+            break
+    widths = [
+        min(TABLE_MAX_WIDTH, max([len(c)] + [len(_cell(r[i])) for r in head]))
+        for i, c in enumerate(columns)
+    ]
+
+    def line(values):
+        cells = []
+        for value, width in zip(values, widths):
+            if len(value) > width:
+                value = value[: width - 1] + "…"
+            cells.append(value.ljust(width))
+        return " | ".join(cells).rstrip() + "\n"
+
+    out.write(line(columns))
+    out.write("-+-".join("-" * w for w in widths) + "\n")
+    count = 0
+    for row in head:
+        out.write(line([_cell(v) for v in row]))
+        count += 1
+    for row in rows:
+        out.write(line([_cell(v) for v in row]))
+        count += 1
+    return count
+
+
+def write_rows(rows, columns, fmt, out):
+    """Scrive `rows` su `out` nel formato `fmt`. Returns the number of rows.
+
+    `rows` is consumed lazily; the table format reads ahead one batch to
+    size its columns and truncates longer values after that.
+    """
+    if fmt == "table":
+        return _write_table(iter(rows), columns, out)
+
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(out)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    else:
+        for row in rows:
+            out.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+            out.write("\n")
+            count += 1
+    return count
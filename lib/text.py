@@ -0,0 +1,91 @@
+"""Plain-text helpers for article bodies.
+
+Provides:
+- html_to_text(html)
+
+Uses only the standard library (html.parser), so it works without
+beautifulsoup4 and can run inside migrations and import.
+"""
+
+import re
+from html.parser import HTMLParser
+
+# Tags that start a new line in the plain-text rendering
+_BLOCK_TAGS = {
+    "address",
+    "blockquote",
+    "br",
+    "div",
+    "dl",
+    "dt",
+    "dd",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "hr",
+    "li",
+    "ol",
+    "p",
+    "pre",
+    "table",
+    "td",
+    "th",
+    "tr",
+    "ul",
+}
+
+# Tags whose content is never text
+_SKIP_TAGS = {"script", "style", "head", "title", "object", "embed", "iframe"}
+
+_SPACES = re.compile(r"[ \t\f\v\xa0]+")
+_NEWLINES = re.compile(r" *\n[ \n]*")
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self.skip += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self.skip = max(0, self.skip - 1)
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self.skip:
+            self.parts.append(data)
+
+
+def html_to_text(html, separator="\n"):
+    """Converte l'HTML di un articolo in testo semplice.
+
+    Block-level tags become line breaks (joined with `separator`), entities
+    are decoded and runs of whitespace are collapsed.
+    """
+    if not html:
+        return ""
+
+    extractor = _TextExtractor()
+    extractor.feed(html.replace("\r\n", "\n").replace("\r", "\n"))
+    extractor.close()
+
+    text = _SPACES.sub(" ", "".join(extractor.parts))
+    text = _NEWLINES.sub("\n", text).strip()
+    if separator != "\n":
+        text = text.replace("\n", separator)
+    return text
@@ -0,0 +1,137 @@
+"""Benchmark: inline bodies vs t_articoli_body (plain and zlib-compressed).
+
+Builds the same synthetic archive three times and reports file size, the
+time to scan the explorer's list columns over the whole table, and the time
+to load full articles by ID.
+
+Uso:
+    python scripts/bench_body_storage.py [--articles 5000] [--repeat 5]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from lib import body, migrations  # noqa: E402
+
+LIST_QUERY = (
+    "SELECT id_articolo, data, argomento, titolo_articolo, sotto_titolo, esportato "
+    "FROM t_articoli ORDER BY data DESC, id_articolo DESC"
+)
+DETAIL_QUERY = "SELECT * FROM t_articoli WHERE id_articolo = ?"
+
+WORDS = (
+    "sindacato carabinieri reparto servizio comando regionale turni riunione "
+    "ordine giorno nazionale personale diritti contratto orario straordinario"
+).split()
+
+
+def make_body(rng):
+    paragraphs = []
+    for _ in range(rng.randint(8, 20)):
+        words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 80)))
+        paragraphs.append(f'<P align="justify"><FONT face="Verdana">{words}</FONT></P>')
+    return "\r\n".join(paragraphs)
+
+
+def build(path, layout, articles, seed=1):
+    """layout: 'inline' (schema v5), 'body' or 'body-zlib' (schema v6)"""
+    conn = sqlite3.connect(path)
+    steps = migrations.MIGRATIONS
+    if layout == "inline":
+        steps = [m for m in steps if m[0] <= 5]
+    for version, _, step in steps:
+        step(conn)
+    conn.execute(f"PRAGMA user_version = {steps[-1][0]}")
+
+    rng = random.Random(seed)
+    compress = layout == "body-zlib"
+    for i in range(1, articles + 1):
+        text = make_body(rng)
+        if layout == "inline":
+            conn.execute(
+                "INSERT INTO t_articoli (id_articolo, data, argomento, "
+                "titolo_articolo, testo_articolo) VALUES (?, ?, ?, ?, ?)",
+                (
+                    i,
+                    f"20{i % 20:02d}-{i % 12 + 1:02d}-01",
+                    f"arg{i % 15}",
+                    f"t{i}",
+                    text,
+                ),
+            )
+        else:
+            conn.execute(
+                "INSERT INTO t_articoli (id_articolo, data, argomento, "
+                "titolo_articolo) VALUES (?, ?, ?, ?)",
+                (i, f"20{i % 20:02d}-{i % 12 + 1:02d}-01", f"arg{i % 15}", f"t{i}"),
+            )
+            conn.execute(
+                "INSERT INTO t_articoli_body (id_articolo, testo_articolo) "
+                "VALUES (?, ?)",
+                (i, body.encode_body(text, compress)),
+            )
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+
+
+def timed(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def measure(path, articles, repeat):
+    ids = random.Random(2).sample(range(1, articles + 1), min(200, articles))
+
+    def list_scan():
+        # Fresh connection and a small page cache, as in a cold explorer start
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA cache_size = -2000")
+        for _ in conn.execute(LIST_QUERY):
+            pass
+        conn.close()
+
+    def details():
+        conn = sqlite3.connect(path)
+        for article_id in ids:
+            row = conn.execute(DETAIL_QUERY, (article_id,)).fetchone()
+            body.decode_body(row[6])
+        conn.close()
+
+    return os.path.getsize(path), timed(list_scan, repeat), timed(details, repeat)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articles", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{args.articles} articoli, migliore di {args.repeat} ripetizioni\n")
+    print(f"{'layout':<12}{'file (MB)':>12}{'lista (ms)':>14}{'200 dettagli (ms)':>20}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for layout in ("inline", "body", "body-zlib"):
+            path = os.path.join(tmp, f"{layout}.db")
+            build(path, layout, args.articles)
+            size, scan, detail = measure(path, args.articles, args.repeat)
+            print(
+                f"{layout:<12}{size / 1e6:>12.1f}{scan * 1000:>14.1f}"
+                f"{detail * 1000:>20.1f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Benchmark: per-article fixed cost of a DOCX, new Document() vs cached template.
+
+Renders the same short articles (title, metadata, one paragraph) starting
+from a fresh Document() each time and from the per-process cached template
+of lib/docx_export.py, and reports the time per article. Short bodies keep
+the fixed cost (template parsing, boilerplate, saving) in the foreground.
+
+Uso:
+    python scripts/bench_docx_template.py [--articles 200] [--repeat 3]
+        [--template modello.docx]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from lib import docx_export  # noqa: E402
+
+
+def make_articles(count):
+    return [
+        {
+            "id_articolo": i,
+            "data": "2020-01-01 00:00:00",
+            "argomento": "notizie",
+            "titolo_articolo": f"Titolo {i}",
+            "testo_articolo": f"<P>Riunione regionale {i}</P>",
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def timed(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articles", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--template", help="Template .docx (default: python-docx)")
+    args = parser.parse_args(argv)
+
+    if not docx_export.DOCX_AVAILABLE:
+        print("python-docx non installato")
+        return 1
+    articles = make_articles(args.articles)
+    template = args.template
+
+    def fresh():
+        for article in articles:
+            doc = docx_export.render_article(article, docx_export.Document(template))
+            doc.save(io.BytesIO())
+
+    def cached():
+        docx_export._BASE_DOCUMENTS.clear()
+        for article in articles:
+            with docx_export.base_document(template) as doc:
+                docx_export.render_article(article, doc).save(io.BytesIO())
+
+    def parse_only():
+        for _ in articles:
+            docx_export.Document(template)
+
+    print(f"{args.articles} articoli, migliore di {args.repeat} ripetizioni\n")
+    print(f"{'modo':<26}{'ms/articolo':>14}")
+    for name, fn in (
+        ("Document() per articolo", fresh),
+        ("template in cache", cached),
+        ("solo parsing template", parse_only),
+    ):
+        elapsed = timed(fn, args.repeat)
+        print(f"{name:<26}{elapsed * 1000 / args.articles:>14.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
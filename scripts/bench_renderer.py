@@ -0,0 +1,136 @@
+"""Benchmark: DOCX rendering of article bodies, htmldocx vs the native renderer.
+
+Renders the HTML article bodies of the dumps in import/ with both renderers
+of lib/docx_export.py (starting from the cached base document, as the
+export does) and reports the time per article, split between the body
+conversion alone and the whole article saved to memory. The native
+renderer is also timed from the blocks cached in the database
+(lib/blocks.py), which skips parsing the HTML.
+
+Uso:
+    python scripts/bench_renderer.py [import/t_articoli.sql ...] [--repeat 3]
+"""
+
+import argparse
+import glob
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from lib import blocks, docx_export, parser  # noqa: E402
+
+
+def load_articles(paths):
+    """Articoli HTML dei dump SQL indicati"""
+    articles = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            content = f.read()
+        for values in parser.iter_insert_tuples(content, "t_articoli"):
+            if len(values) != 16 or not values[6]:
+                continue
+            if not docx_export.is_html_content(values[6]):
+                continue
+            articles.append(
+                {
+                    "id_articolo": values[0],
+                    "data": values[1],
+                    "argomento": values[2],
+                    "titolo_articolo": values[3],
+                    "testo_articolo": values[6],
+                }
+            )
+    return articles
+
+
+def timed(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument(
+        "dumps",
+        nargs="*",
+        default=sorted(glob.glob(os.path.join(ROOT, "import", "*.sql"))),
+    )
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args(argv)
+
+    if not docx_export.DOCX_AVAILABLE:
+        print("python-docx/htmldocx non installati")
+        return 1
+    articles = load_articles(args.dumps)
+    if not articles:
+        print("Nessun articolo HTML trovato nei dump")
+        return 1
+    bodies = [
+        docx_export.clean_html_for_docx(
+            docx_export.clean_text_content(a["testo_articolo"])
+        )
+        for a in articles
+    ]
+
+    def body_htmldocx():
+        failed = 0
+        for body in bodies:
+            with docx_export.base_document(None) as doc:
+                try:
+                    docx_export.HtmlToDocx().add_html_to_document(body, doc)
+                except Exception:
+                    # render_article() falls back to plain text
+                    failed += 1
+        return failed
+
+    def body_native():
+        for body in bodies:
+            with docx_export.base_document(None) as doc:
+                docx_export.html_docx.add_html(doc, body)
+
+    cached = [blocks.encode_blocks(blocks.parse_body(body)) for body in bodies]
+
+    def body_cached():
+        for value in cached:
+            with docx_export.base_document(None) as doc:
+                docx_export.html_docx.add_blocks(doc, blocks.decode_blocks(value))
+
+    def article(renderer):
+        def run():
+            for a in articles:
+                with docx_export.base_document(None) as doc:
+                    docx_export.render_article(a, doc, renderer).save(io.BytesIO())
+
+        return run
+
+    print(f"{len(articles)} articoli HTML, migliore di {args.repeat} ripetizioni")
+    print(f"Errori di htmldocx (testo semplice): {body_htmldocx()}\n")
+    print(f"{'misura':<18}{'htmldocx (ms)':>15}{'native (ms)':>14}{'rapporto':>10}")
+    for name, before, after in (
+        ("solo corpo", body_htmldocx, body_native),
+        ("articolo salvato", article("htmldocx"), article("native")),
+    ):
+        ms = [timed(fn, args.repeat) * 1000 / len(articles) for fn in (before, after)]
+        print(f"{name:<18}{ms[0]:>15.2f}{ms[1]:>14.2f}{ms[0] / ms[1]:>9.1f}x")
+    native, from_cache = (
+        timed(fn, args.repeat) * 1000 / len(articles)
+        for fn in (body_native, body_cached)
+    )
+    print(
+        f"\nsolo corpo, native dai blocchi in cache: {from_cache:.2f} ms "
+        f"({native / from_cache:.1f}x rispetto all'analisi dell'HTML)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""Benchmark: HTML cleanup for DOCX, two regex passes per tag vs merged passes.
+
+Times clean_html_for_docx() and is_html_content() of lib/docx_export.py
+against the previous implementation (kept below as `legacy_*`, also the
+reference of tests/test_sanitizer.py) on the article bodies of the dumps
+in import/, and checks that both produce the same output.
+
+Uso:
+    python scripts/bench_sanitizer.py [import/t_articoli.sql ...] [--repeat 5]
+"""
+
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from lib import docx_export, parser  # noqa: E402
+
+
+def legacy_clean_text_content(text):
+    """clean_text_content() before the precompiled blank-line pattern"""
+    if not text:
+        return ""
+    text = text.replace("\\r\\n", "\n")
+    text = text.replace("\\n", "\n")
+    text = text.replace("\\r", "\n")
+    text = text.replace("\r\n", "\n")
+    text = text.replace("\r", "\n")
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+def legacy_clean_html_for_docx(html):
+    """clean_html_for_docx() before the merged tag pass: two passes per tag"""
+    if not html:
+        return ""
+
+    html = legacy_clean_text_content(html)
+
+    unsupported_tags = [
+        "INPUT",
+        "TEXTAREA",
+        "SELECT",
+        "FORM",
+        "SCRIPT",
+        "STYLE",
+        "IFRAME",
+        "OBJECT",
+        "EMBED",
+    ]
+    for tag in unsupported_tags:
+        html = re.sub(
+            rf"<{tag}[^>]*>.*?</{tag}>", "", html, flags=re.IGNORECASE | re.DOTALL
+        )
+        html = re.sub(rf"<{tag}[^>]*/?\s*>", "", html, flags=re.IGNORECASE)
+
+    html = re.sub(r"<\?xml[^>]*\?>", "", html)
+    html = re.sub(r'xmlns\s*=\s*["\'][^"\']*["\']', "", html)
+    html = re.sub(r'on\w+\s*=\s*["\'][^"\']*["\']', "", html, flags=re.IGNORECASE)
+
+    html = re.sub(r"<FONT[^>]*>", "", html, flags=re.IGNORECASE)
+    html = re.sub(r"</FONT>", "", html, flags=re.IGNORECASE)
+
+    html = re.sub(r"<([a-zA-Z]+)[^>]*>\s*</\1>", "", html)
+
+    if not html.strip().startswith("<"):
+        html = f"<p>{html}</p>"
+
+    return html
+
+
+def legacy_is_html_content(text):
+    """is_html_content() before the single search: findall over the body"""
+    if not text:
+        return False
+    html_tags = re.findall(
+        r"<(?:p|div|table|tr|td|h[1-6]|ul|ol|li|strong|em|b|i|a|span|font)[^>]*>",
+        text,
+        re.IGNORECASE,
+    )
+    return len(html_tags) > 0
+
+
+def load_bodies(paths):
+    """Testi degli articoli nei dump SQL indicati"""
+    bodies = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            content = f.read()
+        for values in parser.iter_insert_tuples(content, "t_articoli"):
+            if len(values) == 16 and values[6]:
+                bodies.append(values[6])
+    return bodies
+
+
+def timed(fn, bodies, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for body in bodies:
+            fn(body)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument(
+        "dumps",
+        nargs="*",
+        default=sorted(glob.glob(os.path.join(ROOT, "import", "*.sql"))),
+    )
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args(argv)
+
+    bodies = load_bodies(args.dumps)
+    if not bodies:
+        print("Nessun articolo trovato nei dump")
+        return 1
+    different = sum(
+        legacy_clean_html_for_docx(b) != docx_export.clean_html_for_docx(b)
+        for b in bodies
+    )
+
+    print(f"{len(bodies)} articoli, migliore di {args.repeat} ripetizioni")
+    print(f"Output diversi: {different}\n")
+    print(f"{'funzione':<22}{'prima (µs)':>14}{'dopo (µs)':>14}")
+    for name, before, after in (
+        (
+            "clean_html_for_docx",
+            legacy_clean_html_for_docx,
+            docx_export.clean_html_for_docx,
+        ),
+        ("is_html_content", legacy_is_html_content, docx_export.is_html_content),
+    ):
+        per_article = [
+            timed(fn, bodies, args.repeat) * 1e6 / len(bodies) for fn in (before, after)
+        ]
+        print(f"{name:<22}{per_article[0]:>14.1f}{per_article[1]:>14.1f}")
+    return 1 if different else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
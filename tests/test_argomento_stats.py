@@ -0,0 +1,113 @@
+import sqlite3
+
+from esplora_articoli import ArticoliExplorer
+from import_articoli_to_sqlite import ImportManager, create_database_and_table
+
+STATS_QUERY = """
+    SELECT t.nome, s.articoli, s.esportati, s.data_min, s.data_max
+    FROM argomento_stats s
+    LEFT JOIN topics t USING (id_topic)
+    ORDER BY 1
+"""
+
+# What the triggers must keep argomento_stats equal to
+GROUP_BY_QUERY = """
+    SELECT
+        argomento,
+        COUNT(*),
+        SUM(COALESCE(esportato, 0) != 0),
+        MIN(CASE WHEN data > '0000-00-00 00:00:00' THEN data END),
+        MAX(CASE WHEN data > '0000-00-00 00:00:00' THEN data END)
+    FROM t_articoli
+    GROUP BY argomento
+    ORDER BY 1
+"""
+
+
+def create_test_db(path):
+    conn = create_database_and_table(str(path))
+    conn.executemany(
+        "INSERT INTO t_articoli (id_articolo, data, argomento, titolo_articolo) "
+        "VALUES (?, ?, ?, ?)",
+        [
+            (1, "2020-01-01 00:00:00", "Sindacato", "a"),
+            (2, "2021-06-01 00:00:00", "Sindacato", "b"),
+            (3, "0000-00-00 00:00:00", "Attualità", "c"),
+            (4, None, None, "d"),
+            (5, "2019-03-01 00:00:00", "Attualità", "e"),
+        ],
+    )
+    conn.commit()
+    return conn
+
+
+def assert_consistent(conn):
+    assert (
+        conn.execute(STATS_QUERY).fetchall() == conn.execute(GROUP_BY_QUERY).fetchall()
+    )
+
+
+def test_stats_follow_writes(tmp_path):
+    conn = create_test_db(tmp_path / "stats.db")
+    assert_consistent(conn)
+    assert conn.execute(
+        "SELECT articoli, data_min, data_max FROM argomento_stats "
+        "JOIN topics USING (id_topic) WHERE nome = 'Sindacato'"
+    ).fetchone() == (2, "2020-01-01 00:00:00", "2021-06-01 00:00:00")
+
+    conn.execute("UPDATE t_articoli SET esportato = 1 WHERE id_articolo IN (1, 3)")
+    assert_consistent(conn)
+
+    # Moving an article to another topic, and changing its date
+    conn.execute("UPDATE t_articoli SET argomento = 'Attualità' WHERE id_articolo = 2")
+    conn.execute(
+        "UPDATE t_articoli SET data = '2018-01-01 00:00:00' WHERE id_articolo = 5"
+    )
+    assert_consistent(conn)
+
+    # Deleting the last article of a topic removes the topic
+    conn.execute("DELETE FROM t_articoli WHERE id_articolo = 1")
+    conn.execute("DELETE FROM t_articoli WHERE argomento IS NULL")
+    assert_consistent(conn)
+    assert [r[0] for r in conn.execute(STATS_QUERY)] == ["Attualità"]
+    conn.close()
+
+
+def test_reimport_resets_export_and_keeps_stats(tmp_path):
+    db = tmp_path / "stats.db"
+    create_test_db(db).close()
+
+    manager = ImportManager(str(db))
+    manager.connect()
+    manager.cursor.execute("UPDATE t_articoli SET esportato = 1")
+    values = (2, "2022-01-01 00:00:00", "Nuovo") + (None,) * 13
+    assert manager.insert_article(values)
+    manager.conn.commit()
+    assert manager.get_db_stats()[0] == 5
+    assert manager.get_argomenti_count() == 4
+    manager.close()
+
+    conn = sqlite3.connect(db)
+    assert_consistent(conn)
+    assert conn.execute(
+        "SELECT esportato FROM t_articoli WHERE id_articolo = 2"
+    ).fetchone() == (0,)
+    conn.close()
+
+
+def test_explorer_topics_and_export_marking(tmp_path):
+    db = tmp_path / "stats.db"
+    create_test_db(db).close()
+
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    assert [tuple(r) for r in explorer.get_argomenti()] == [
+        ("Attualità", 2, 0),
+        ("Sindacato", 2, 0),
+        (None, 1, 0),
+    ]
+
+    article = explorer.get_article_by_id(1)
+    assert explorer.export_article(article, interactive=False, mark_exported=True)
+    assert tuple(explorer.get_argomenti()[1]) == ("Sindacato", 2, 1)
+    explorer.close()
@@ -0,0 +1,149 @@
+import json
+import sqlite3
+import zipfile
+
+import pytest
+
+from esplora_articoli import ArticoliExplorer
+from import_articoli_to_sqlite import ImportManager
+from lib import blocks, docx_export, preview
+from lib.connection import open_readwrite
+
+HTML = (
+    "<P>Primo <B>paragrafo</B></P><TABLE><TR><TD>a</TD><TD>b&nbsp;c</TD></TR></TABLE>"
+)
+
+
+def import_articles(db, texts):
+    manager = ImportManager(str(db))
+    manager.connect()
+    for i, text in enumerate(texts, 1):
+        values = (i, "2020-01-01 00:00:00", "notizie", f"Titolo {i}", None, None)
+        assert manager.insert_article(values + (text,) + (None,) * 9)
+    manager.close()
+
+
+def cached(db):
+    conn = sqlite3.connect(db)
+    rows = conn.execute(
+        "SELECT hash_testo, versione, blocchi FROM t_articoli_blocchi"
+    ).fetchall()
+    conn.close()
+    return {
+        digest: (version, blocks.decode_blocks(value))
+        for digest, version, value in rows
+    }
+
+
+def test_parse_body_html_and_plain_text():
+    assert blocks.parse_body("riga uno\\n\\nriga &amp; due  ") == [
+        ("p", None, [("riga uno", 0, None)]),
+        ("p", None, [("riga & due", 0, None)]),
+    ]
+    parsed = blocks.parse_body(HTML)
+    assert parsed[0] == (
+        "p",
+        None,
+        [("Primo ", 0, None), ("paragrafo", blocks.BOLD, None)],
+    )
+    assert blocks.blocks_to_text(parsed) == "Primo paragrafo\na\nb c"
+    assert blocks.blocks_to_text(parsed, " ") == "Primo paragrafo a b c"
+    assert blocks.parse_body(None) == []
+    # Stray tags in a plain text: dropped, lines and entities kept
+    assert blocks.text_paragraphs("riga uno\nriga <i>due</i> &amp; tre<BR>x") == [
+        "riga uno",
+        "riga due & tre",
+        "x",
+    ]
+
+
+def test_encoded_blocks_round_trip():
+    parsed = blocks.parse_body(HTML * 20)
+    value = blocks.encode_blocks(parsed)
+    assert isinstance(value, bytes)  # long enough to be compressed
+    decoded = blocks.decode_blocks(value)
+    # JSON has no tuples: the same blocks, as lists
+    assert decoded == json.loads(json.dumps(parsed))
+    assert blocks.blocks_to_text(decoded) == blocks.blocks_to_text(parsed)
+    small = blocks.encode_blocks(blocks.parse_body("corto"))
+    assert isinstance(small, str)
+    assert blocks.decode_blocks(small) == [["p", None, [["corto", 0, None]]]]
+
+
+def test_cache_is_shared_by_hash_and_synced(tmp_path, monkeypatch):
+    db = tmp_path / "blocchi.db"
+    import_articles(db, [HTML, HTML, "<P>terzo</P>"])
+    entries = cached(db)
+    assert len(entries) == 2  # identical bodies, one entry
+    assert entries[preview.body_hash(HTML)][1] == blocks.decode_blocks(
+        blocks.encode_blocks(blocks.parse_body(HTML))
+    )
+
+    # Changed by another tool: the explorer parses the new body only
+    conn = sqlite3.connect(db)
+    conn.execute(
+        "UPDATE t_articoli SET testo_articolo = '<P>nuovo</P>' WHERE id_articolo = 3"
+    )
+    conn.commit()
+    conn.close()
+    parsed = []
+    real = blocks.parse_body
+    monkeypatch.setattr(
+        blocks, "parse_body", lambda text: parsed.append(text) or real(text)
+    )
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    explorer.close()
+    assert parsed == ["<P>nuovo</P>"]
+    entries = cached(db)
+    assert set(entries) == {preview.body_hash(HTML), preview.body_hash("<P>nuovo</P>")}
+
+    # Nothing to do: read queries only, no write lock taken
+    conn = open_readwrite(str(db))
+    statements = []
+    conn.set_trace_callback(statements.append)
+    assert blocks.sync_blocks(conn) == 0
+    assert [s.split()[0] for s in statements] == ["SELECT", "SELECT"]
+    conn.set_trace_callback(None)
+    conn.close()
+
+    # A new parser version replaces every entry
+    monkeypatch.setattr(blocks, "BLOCKS_VERSION", 2)
+    conn = open_readwrite(str(db))
+    assert blocks.sync_blocks(conn) == 2
+    conn.close()
+    assert {version for version, _ in cached(db).values()} == {2}
+
+
+@pytest.mark.skipif(not docx_export.DOCX_AVAILABLE, reason="python-docx mancante")
+def test_native_export_renders_cached_blocks(tmp_path, monkeypatch):
+    db = tmp_path / "blocchi.db"
+    import_articles(db, [HTML, "testo semplice\\nseconda riga", "<P>x<BR>y</P>"])
+
+    def export(name):
+        explorer = ArticoliExplorer(str(db))
+        assert explorer.connect()
+        explorer.export_dir = str(tmp_path / name)
+        explorer.export_workers = 1
+        explorer.export_renderer = "native"
+        assert explorer.export_results(mark_exported=False) == 3
+        assert explorer.get_article_by_id(1)[blocks.BLOCKS_FIELD] is not None
+        explorer.close()
+        parts = {}
+        for path in (tmp_path / name).glob("*.docx"):
+            with zipfile.ZipFile(path) as archive:
+                parts[path.name] = {n: archive.read(n) for n in archive.namelist()}
+        return parts
+
+    parsed = export("analizzati")
+    monkeypatch.setattr(blocks, "parse_body", None)  # only the cache is left
+    assert export("dalla_cache") == parsed
+
+
+@pytest.mark.skipif(not docx_export.DOCX_AVAILABLE, reason="python-docx mancante")
+def test_plain_text_fallback_uses_blocks(monkeypatch):
+    cached = blocks.decode_blocks(blocks.encode_blocks(blocks.parse_body(HTML)))
+    monkeypatch.setattr(blocks, "parse_body", None)  # only the blocks are left
+    doc = docx_export.Document()
+    docx_export.add_plain_text(doc, HTML, cached)
+    assert [p.text for p in doc.paragraphs] == ["Primo paragrafo", "a", "b c"]
@@ -0,0 +1,116 @@
+import sqlite3
+
+from esplora_articoli import ArticoliExplorer
+from import_articoli_to_sqlite import ImportManager
+from lib import body, fulltext
+from lib.dump_writer import write_dump
+
+LONG_HTML = "<P>Il <B>carabiniere</B> scelto del reparto operativo.</P>\r\n" * 20
+
+
+def import_articles(db, compress):
+    manager = ImportManager(str(db))
+    manager.connect()
+    manager.compress_bodies = compress
+    for i, text in enumerate([LONG_HTML, "<P>breve</P>", None], 1):
+        values = (i, f"2020-01-0{i} 00:00:00", "arg", f"titolo {i}", None, None)
+        assert manager.insert_article(values + (text,) + (None,) * 9)
+    fulltext.sync_fulltext(manager.conn)
+    manager.close()
+
+
+def stored_types(db):
+    conn = sqlite3.connect(db)
+    rows = conn.execute(
+        "SELECT id_articolo, typeof(testo_articolo) FROM t_articoli_body "
+        "ORDER BY id_articolo"
+    ).fetchall()
+    conn.close()
+    return rows
+
+
+def test_encode_decode():
+    packed = body.encode_body(LONG_HTML, compress=True)
+    assert isinstance(packed, bytes) and len(packed) < len(LONG_HTML)
+    assert body.decode_body(packed) == LONG_HTML
+    assert body.encode_body("corto", compress=True) == "corto"
+    assert body.encode_body(LONG_HTML) == LONG_HTML
+    assert body.decode_body(None) is None
+
+
+def test_compressed_import_is_transparent(tmp_path):
+    db = tmp_path / "body.db"
+    import_articles(db, compress=True)
+    assert stored_types(db) == [(1, "blob"), (2, "text")]
+
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    assert explorer.get_article_by_id(1)["testo_articolo"] == LONG_HTML
+    assert explorer.get_article_by_id(3)["testo_articolo"] is None
+    explorer.current_search = "carabiniere"
+    assert [r["id_articolo"] for r in explorer.get_articles_page()] == [1]
+    explorer.close()
+
+    out = tmp_path / "dump.sql"
+    conn = sqlite3.connect(db)
+    write_dump(conn, str(out))
+    conn.close()
+    assert "<B>carabiniere</B>" in out.read_text(encoding="utf-8")
+
+
+def test_list_queries_skip_bodies(tmp_path):
+    db = tmp_path / "body.db"
+    import_articles(db, compress=False)
+
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    query, params = explorer._seek_query(seek=("<", 1578009600, 3), limit=6)
+    plan = " | ".join(
+        row[-1] for row in explorer.conn.execute(f"EXPLAIN QUERY PLAN {query}", params)
+    )
+    # The body join is dropped when no body column is selected
+    assert "SEARCH x" not in plan
+    explorer.close()
+
+
+def test_view_writes_and_compress_existing(tmp_path):
+    db = tmp_path / "body.db"
+    import_articles(db, compress=False)
+    assert stored_types(db) == [(1, "text"), (2, "text")]
+
+    conn = sqlite3.connect(db)
+    assert body.compress_bodies(conn) == 1
+    (stored,) = conn.execute(
+        "SELECT testo_articolo FROM t_articoli WHERE id_articolo = 1"
+    ).fetchone()
+    assert body.decode_body(stored) == LONG_HTML
+
+    conn.execute("UPDATE t_articoli SET testo_articolo = 'nuovo' WHERE id_articolo = 3")
+    conn.execute("UPDATE t_articoli SET testo_articolo = NULL WHERE id_articolo = 2")
+    conn.execute("DELETE FROM t_articoli WHERE id_articolo = 1")
+    conn.commit()
+    conn.close()
+    assert stored_types(db) == [(3, "text")]
+
+
+def test_compress_keeps_previews_and_index(tmp_path):
+    db = tmp_path / "body.db"
+    import_articles(db, compress=False)
+    conn = sqlite3.connect(db)
+    conn.execute("INSERT INTO t_articoli_fts_pending VALUES (2)")
+    conn.commit()
+
+    def snapshot():
+        previews = conn.execute(
+            "SELECT * FROM t_articoli_preview ORDER BY id_articolo"
+        ).fetchall()
+        pending = conn.execute("SELECT * FROM t_articoli_fts_pending").fetchall()
+        return previews, pending
+
+    before = snapshot()
+    assert len(before[0]) == 2
+    assert body.compress_bodies(conn) == 1
+    # Only the encoding changed: nothing to recompute or reindex
+    assert snapshot() == before
+    conn.close()
+    assert stored_types(db) == [(1, "blob"), (2, "text")]
@@ -0,0 +1,63 @@
+import sqlite3
+
+import pytest
+
+from esplora_articoli import ArticoliExplorer
+from import_articoli_to_sqlite import ImportManager
+from lib import connection, fulltext, preview
+
+
+def article(article_id):
+    values = (article_id, f"2020-01-{article_id:02d} 00:00:00", "arg", f"t{article_id}")
+    return values + (None, None, f"<P>testo {article_id}</P>") + (None,) * 9
+
+
+def start_import(db, ids):
+    manager = ImportManager(str(db))
+    manager.connect()
+    for i in ids:
+        assert manager.insert_article(article(i))
+    return manager
+
+
+def test_readonly_connection(tmp_path):
+    db = tmp_path / "conn.db"
+    start_import(db, [1]).close()
+
+    conn = connection.open_readonly(db)
+    assert conn.execute("PRAGMA query_only").fetchone()[0] == 1
+    assert conn.execute("PRAGMA mmap_size").fetchone()[0] == connection.MMAP_SIZE
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("UPDATE t_articoli SET esportato = 1")
+    conn.close()
+
+
+def test_explorer_browses_during_import(tmp_path, monkeypatch):
+    # A lock wait would make this test slow rather than hang it
+    monkeypatch.setattr(connection, "BUSY_TIMEOUT_MS", 200)
+    db = tmp_path / "conn.db"
+    manager = start_import(db, [1, 2])
+    fulltext.sync_fulltext(manager.conn)
+    preview.sync_previews(manager.conn)
+
+    # The importer keeps a write transaction open while the explorer starts
+    assert manager.insert_article(article(3))
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    assert [r["id_articolo"] for r in explorer.get_articles_page()] == [2, 1]
+
+    # An explorer read in progress does not block the importer's commit
+    cursor = explorer.conn.execute("SELECT id_articolo FROM t_articoli")
+    cursor.fetchone()
+    manager.conn.commit()
+    cursor.close()
+    assert explorer.get_total_count() == 3
+
+    # Export marking goes through its own short write transaction
+    assert explorer.export_article(
+        explorer.get_article_by_id(3), interactive=False, mark_exported=True
+    )
+    manager.close()
+    assert explorer.get_articles_page()[0]["esportato"] == 1
+    explorer.close()
@@ -0,0 +1,80 @@
+import sqlite3
+
+from esplora_articoli import ArticoliExplorer
+from import_articoli_to_sqlite import create_database_and_table
+
+
+def create_test_db(path, n=25):
+    conn = create_database_and_table(str(path))
+    conn.executemany(
+        "INSERT INTO t_articoli (id_articolo, data, argomento, titolo_articolo, "
+        "testo_articolo) VALUES (?, date('now'), ?, ?, ?)",
+        [(i, "arg", f"title {i}", f"body {i}") for i in range(1, n + 1)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def count_statements(explorer):
+    seen = []
+    explorer.conn.set_trace_callback(
+        lambda sql: seen.append(sql) if "COUNT(*)" in sql else None
+    )
+    return seen
+
+
+def test_page_flips_count_once(tmp_path, capsys):
+    db = tmp_path / "count.db"
+    create_test_db(db)
+
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    counts = count_statements(explorer)
+
+    # Redraw + next, three times: one COUNT in total
+    for _ in range(3):
+        explorer.print_articles_list(explorer.get_articles_page())
+        explorer.next_page()
+    assert len(counts) == 1
+
+    # A different filter is a different result set
+    explorer.current_filter = "altro"
+    explorer.reset_position()
+    assert explorer.get_total_count() == 0
+    explorer.current_filter = None
+    assert explorer.get_total_count() == 25
+    assert len(counts) == 2
+    explorer.close()
+
+
+def test_cache_invalidated_by_other_connections(tmp_path):
+    db = tmp_path / "count.db"
+    create_test_db(db)
+
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    assert explorer.get_total_count() == 25
+
+    other = sqlite3.connect(db)
+    other.execute("DELETE FROM t_articoli WHERE id_articolo > 20")
+    other.commit()
+    other.close()
+
+    assert explorer.get_total_count() == 20
+    explorer.close()
+
+
+def test_cache_invalidated_by_export_marking(tmp_path):
+    db = tmp_path / "count.db"
+    create_test_db(db, n=2)
+
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    explorer.get_total_count()
+    counts = count_statements(explorer)
+
+    article = explorer.get_article_by_id(1)
+    assert explorer.export_article(article, interactive=False, mark_exported=True)
+    explorer.get_total_count()
+    assert len(counts) == 1
+    explorer.close()
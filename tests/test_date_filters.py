@@ -0,0 +1,122 @@
+import calendar
+import sqlite3
+
+from esplora_articoli import ArticoliExplorer
+from import_articoli_to_sqlite import ImportManager
+from lib.dates import period_bounds
+
+ARTICLES = [
+    (1, "2019-12-31 23:59:59", "sindacato", "fine anno", "turni festivi"),
+    (2, "2020-01-15 10:00:00", "sindacato", "gennaio", "riunione turni"),
+    (3, "2020-02-01 00:00:00", "notizie", "febbraio", "riunione regionale"),
+    (4, "2020-02-29 12:00:00", "sindacato", "bisestile", "contratto"),
+    (5, "0000-00-00 00:00:00", "sindacato", "senza data", "turni"),
+    (6, "2021-06-01 08:00:00", "notizie", "giugno", "turni estivi"),
+]
+
+
+def epoch(year, month=1, day=1):
+    return calendar.timegm((year, month, day, 0, 0, 0))
+
+
+def create_db(path):
+    manager = ImportManager(str(path))
+    manager.connect()
+    for article_id, data, topic, title, text in ARTICLES:
+        values = (article_id, data, topic, title, None, None, f"<P>{text}</P>")
+        assert manager.insert_article(values + (None,) * 9)
+    manager.close()
+
+
+def page_ids(explorer):
+    return [row["id_articolo"] for row in explorer.get_articles_page()]
+
+
+def test_period_bounds():
+    assert period_bounds("2020") == (epoch(2020), epoch(2021))
+    assert period_bounds("2020-12") == (epoch(2020, 12), epoch(2021))
+    assert period_bounds("2020-02-29") == (
+        epoch(2020, 2, 29),
+        epoch(2020, 3, 1),
+    )
+    assert period_bounds("2019..2020-01") == (epoch(2019), epoch(2020, 2))
+    assert period_bounds("2020-06..") == (epoch(2020, 6), None)
+    assert period_bounds("..2019") == (None, epoch(2020))
+    for text in ("", "..", "2020-13", "2019-02-29", "2021..2020", "ieri"):
+        assert period_bounds(text) is None
+
+
+def test_data_epoch_backfill_and_zero_dates(tmp_path):
+    db = tmp_path / "date.db"
+    create_db(db)
+
+    conn = sqlite3.connect(db)
+    rows = dict(conn.execute("SELECT id_articolo, data_epoch FROM t_articoli"))
+    assert rows[2] == epoch(2020, 1, 15) + 10 * 3600
+    assert rows[5] is None
+
+    # Writers that bypass the importer still get a consistent data_epoch
+    conn.execute("UPDATE t_articoli SET data = '2022-01-01' WHERE id_articolo = 5")
+    conn.execute("INSERT INTO t_articoli (id_articolo, data) VALUES (7, '2023-01-01')")
+    rows = dict(conn.execute("SELECT id_articolo, data_epoch FROM t_articoli_base"))
+    assert (rows[5], rows[7]) == (epoch(2022), epoch(2023))
+    conn.close()
+
+
+def test_filters_combine(tmp_path):
+    db = tmp_path / "date.db"
+    create_db(db)
+
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    explorer.current_period = "2020"
+    assert page_ids(explorer) == [4, 3, 2]
+    assert explorer.get_total_count() == 3
+
+    explorer.current_filter = "sindacato"
+    assert page_ids(explorer) == [4, 2]
+
+    explorer.current_search = "turni"
+    assert page_ids(explorer) == [2]
+    assert explorer.get_total_count() == 1
+
+    explorer.current_filter = None
+    explorer.current_period = "..2020-01"
+    assert page_ids(explorer) == [2, 1]
+
+    # Zero dates sort last and fall outside every period
+    explorer.current_period = None
+    explorer.current_search = None
+    assert page_ids(explorer) == [6, 4, 3, 2, 1, 5]
+    explorer.close()
+
+
+def test_jump_to_date(tmp_path):
+    db = tmp_path / "date.db"
+    create_db(db)
+
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    explorer.page_size = 2
+    assert explorer.jump_to_date("2020-02")
+    assert page_ids(explorer)[0] == 4
+    assert not explorer.jump_to_date("1990")
+    assert not explorer.jump_to_date("2019..2020")
+    explorer.close()
+
+
+def test_period_filter_uses_epoch_index(tmp_path):
+    db = tmp_path / "date.db"
+    create_db(db)
+
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    explorer.current_filter = "sindacato"
+    explorer.current_period = "2020"
+    query, params = explorer._seek_query(limit=10)
+    plan = " | ".join(
+        row[-1] for row in explorer.conn.execute(f"EXPLAIN QUERY PLAN {query}", params)
+    )
+    assert "idx_articoli_topic_epoch (id_topic=? AND data_epoch>" in plan
+    assert "TEMP B-TREE" not in plan
+    explorer.close()
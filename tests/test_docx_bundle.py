@@ -0,0 +1,104 @@
+import zipfile
+
+import pytest
+
+from esplora_articoli import ArticoliExplorer
+from import_articoli_to_sqlite import ImportManager
+from lib import docx_bundle, docx_export
+
+docx = pytest.importorskip("docx")
+
+from docx.oxml.ns import qn  # noqa: E402
+
+
+def create_db(path, n=5):
+    manager = ImportManager(str(path))
+    manager.connect()
+    for i in range(1, n + 1):
+        text = (
+            f"<P>Riunione <B>{i}</B> <A href='https://ficiesse.it/{i % 2}'>sito</A></P>"
+        )
+        values = (i, "2020-01-01 00:00:00", "notizie", f"Titolo {i}", None, None, text)
+        assert manager.insert_article(values + (None,) * 9)
+    manager.close()
+
+
+def open_explorer(db, export_dir, workers=1):
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    explorer.export_dir = str(export_dir)
+    explorer.export_workers = workers
+    explorer.export_renderer = "native"  # needs python-docx only
+    return explorer
+
+
+def marked(explorer):
+    rows = explorer.conn.execute("SELECT COUNT(*) FROM t_articoli WHERE esportato = 1")
+    return rows.fetchone()[0]
+
+
+def test_combined_docx_with_toc(tmp_path):
+    db = tmp_path / "bundle.db"
+    create_db(db)
+    out = tmp_path / "out"
+    explorer = open_explorer(db, out)
+    explorer.current_filter = "notizie"
+
+    assert explorer.export_results(bundle="docx") == 5
+    assert marked(explorer) == 5
+    explorer.close()
+
+    [path] = out.iterdir()
+    assert path.name.startswith("articoli_notizie_") and path.suffix == ".docx"
+    doc = docx_export.Document(str(path))
+    texts = [p.text for p in doc.paragraphs]
+    toc = [f"{n}. Titolo {i}" for n, i in enumerate(range(5, 0, -1), 1)]
+    assert texts[:6] == ["Indice"] + toc
+    assert sum(t.startswith("Riunione") for t in texts) == 5
+
+    body = doc.element.body
+    xml = body.xml
+    assert xml.count('w:type="page"') == 5
+    anchors = [
+        link.get(qn("w:anchor"))
+        for link in body.iter(qn("w:hyperlink"))
+        if link.get(qn("w:anchor"))
+    ]
+    names = [b.get(qn("w:name")) for b in body.iter(qn("w:bookmarkStart"))]
+    assert anchors == names == [f"_Articolo_{i}" for i in range(5, 0, -1)]
+    # External links are related to the bundle, once per target
+    targets = sorted(
+        rel.target_ref for rel in doc.part.rels.values() if rel.is_external
+    )
+    assert targets == ["https://ficiesse.it/0", "https://ficiesse.it/1"]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_zip_bundle_holds_the_article_documents(tmp_path, workers):
+    db = tmp_path / "bundle.db"
+    create_db(db, n=20)
+    out = tmp_path / "out"
+    explorer = open_explorer(db, out, workers)
+    assert explorer.export_results(bundle="zip", mark_exported=False) == 20
+    assert marked(explorer) == 0
+    explorer.close()
+
+    [path] = out.iterdir()
+    with zipfile.ZipFile(path) as archive:
+        infos = archive.infolist()
+        assert sorted(info.filename for info in infos) == sorted(
+            f"articolo_{i}_Titolo_{i}.docx" for i in range(1, 21)
+        )
+        assert {info.compress_type for info in infos} == {zipfile.ZIP_STORED}
+        with archive.open(infos[0]) as entry:
+            doc = docx_export.Document(entry)
+    assert doc.paragraphs[0].text.startswith("Titolo")
+
+
+def test_interrupted_bundle_leaves_no_file(tmp_path):
+    path = tmp_path / "raccolta.zip"
+    with pytest.raises(RuntimeError):
+        with docx_bundle.ZipBundle(str(path)) as bundle:
+            bundle.add("a.docx", b"dati")
+            raise RuntimeError("interrotto")
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,84 @@
+import zipfile
+
+import pytest
+
+import esplora_articoli
+from esplora_articoli import ArticoliExplorer
+from import_articoli_to_sqlite import ImportManager
+from lib import docx_export
+
+pytestmark = pytest.mark.skipif(
+    not docx_export.DOCX_AVAILABLE, reason="python-docx non installato"
+)
+
+
+def create_db(path, n=24):
+    manager = ImportManager(str(path))
+    manager.connect()
+    for i in range(1, n + 1):
+        text = (
+            f"<P>Riunione <B>{i}</B></P><P>Seconda riga</P>" if i % 2 else f"testo {i}"
+        )
+        values = (i, "2020-01-01 00:00:00", "notizie", f"Titolo {i}", None, None, text)
+        assert manager.insert_article(values + (None,) * 9)
+    manager.close()
+
+
+def docx_parts(path):
+    """XML parts of a DOCX: the zip timestamps differ between runs"""
+    with zipfile.ZipFile(path) as archive:
+        return {name: archive.read(name) for name in archive.namelist()}
+
+
+def export_to(db, export_dir, workers):
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    explorer.export_dir = str(export_dir)
+    explorer.export_workers = workers
+    assert explorer.export_results(mark_exported=False) == 24
+    explorer.close()
+    return {p.name: docx_parts(p) for p in export_dir.glob("*.docx")}
+
+
+def test_parallel_matches_serial(tmp_path):
+    db = tmp_path / "docx.db"
+    create_db(db)
+
+    serial = export_to(db, tmp_path / "serial", workers=1)
+    parallel = export_to(db, tmp_path / "parallel", workers=2)
+    assert len(serial) == 24
+    assert serial == parallel
+
+
+def test_marks_in_batches(tmp_path, monkeypatch):
+    db = tmp_path / "docx.db"
+    create_db(db)
+    monkeypatch.setattr(esplora_articoli, "MARK_BATCH", 10)
+
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    explorer.export_dir = str(tmp_path / "out")
+    explorer.export_workers = 2
+    batches = []
+    mark = explorer._mark_exported
+    monkeypatch.setattr(
+        explorer, "_mark_exported", lambda ids: batches.append(len(ids)) or mark(ids)
+    )
+
+    assert explorer.export_results() == 24
+    assert batches == [10, 10, 4]
+    count = explorer.conn.execute(
+        "SELECT COUNT(*) FROM t_articoli WHERE esportato = 1"
+    ).fetchone()[0]
+    assert count == 24
+    explorer.close()
+
+
+def test_worker_reports_errors(tmp_path):
+    results = list(
+        docx_export.export_serial(
+            [{"id_articolo": 1, "titolo_articolo": "Titolo", "testo_articolo": "x"}],
+            str(tmp_path / "missing" / "\0"),
+        )
+    )
+    assert results[0][0] == 1 and results[0][1] is None and results[0][2]
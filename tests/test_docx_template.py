@@ -0,0 +1,87 @@
+import io
+import zipfile
+
+import pytest
+
+from lib import docx_export
+
+pytestmark = pytest.mark.skipif(
+    not docx_export.DOCX_AVAILABLE, reason="python-docx non installato"
+)
+
+ARTICLES = [
+    {"id_articolo": 1, "titolo_articolo": "Primo", "testo_articolo": "testo 1"},
+    {
+        "id_articolo": 2,
+        "titolo_articolo": "Con link",
+        "sotto_titolo": "Sottotitolo",
+        "testo_articolo": '<P>Vedi <A href="http://example.org">il sito</A></P>',
+    },
+    {
+        "id_articolo": 3,
+        "titolo_articolo": "Terzo",
+        "testo_articolo": "<P>Riunione <B>regionale</B></P><UL><LI>uno</LI></UL>",
+    },
+]
+
+
+def docx_parts(data):
+    """XML parts of a DOCX: the zip timestamps differ between runs"""
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        return {name: archive.read(name) for name in archive.namelist()}
+
+
+def saved(doc):
+    out = io.BytesIO()
+    doc.save(out)
+    return docx_parts(out.getvalue())
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    docx_export._BASE_DOCUMENTS.clear()
+    yield
+    docx_export._BASE_DOCUMENTS.clear()
+
+
+def test_cached_document_matches_fresh_one(tmp_path):
+    for article in ARTICLES * 2:
+        path = docx_export.write_article(article, str(tmp_path))
+        with open(path, "rb") as f:
+            assert docx_parts(f.read()) == saved(docx_export.render_article(article))
+
+
+def test_template_parsed_once(tmp_path, monkeypatch):
+    calls = []
+    document = docx_export.Document
+    monkeypatch.setattr(
+        docx_export, "Document", lambda *args: calls.append(args) or document(*args)
+    )
+
+    for article in (ARTICLES[0], ARTICLES[2], ARTICLES[0]):
+        docx_export.write_article(article, str(tmp_path))
+    assert len(calls) == 1
+
+    # A hyperlink adds a relationship: the next article starts from a new parse
+    # (native renderer: it writes links without htmldocx)
+    docx_export.write_article(ARTICLES[1], str(tmp_path), renderer="native")
+    docx_export.write_article(ARTICLES[0], str(tmp_path))
+    assert len(calls) == 2
+
+
+def test_house_style_template(tmp_path):
+    template = docx_export.Document()
+    template.add_paragraph("Carta intestata")
+    template.sections[0].left_margin = 381000
+    template_path = tmp_path / "modello.docx"
+    template.save(template_path)
+
+    for _ in range(2):
+        path = docx_export.write_article(
+            ARTICLES[0], str(tmp_path / "out"), str(template_path)
+        )
+    doc = docx_export.Document(path)
+    texts = [p.text for p in doc.paragraphs]
+    assert texts[0] == "Carta intestata"
+    assert texts.count("Primo") == 1
+    assert doc.sections[0].left_margin == 381000
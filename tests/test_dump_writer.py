@@ -0,0 +1,149 @@
+import gzip
+import sqlite3
+
+from import_articoli_to_sqlite import ImportManager
+from lib import dump_writer, parser
+
+ROWS = [
+    (
+        1,
+        "2003-12-22 00:00:00",
+        "Editoriale",
+        'L\'articolo "citato"',
+        "",
+        "Titolo\r\n",
+        '<P align=center>Riga 1</P>\r\n<P><FONT style="X">a\\b</FONT></P>',
+        0,
+        "",
+        "",
+        "",
+        23,
+        1,
+        0,
+        "2010-06-21 14:58:38",
+        "0000-00-00",
+    ),
+    (
+        2,
+        "0000-00-00 00:00:00",
+        "Attualità",
+        "Perché (parentesi), virgole; e 'apici'",
+        None,
+        None,
+        "tab\there, nul\0 e ctrl-z\x1a, 100% _ok_, backslash+quote \\'",
+        3,
+        None,
+        None,
+        None,
+        0,
+        0,
+        0,
+        None,
+        "0000-00-00",
+    ),
+]
+
+
+def create_test_db(path, rows=ROWS):
+    manager = ImportManager(str(path))
+    manager.connect()
+    for row in rows:
+        manager.insert_article(list(row))
+    manager.close()
+
+
+def read_rows(path):
+    conn = sqlite3.connect(path)
+    cols = ", ".join(f'"{c}"' for c in dump_writer.COLUMNS)
+    rows = conn.execute(f"SELECT {cols} FROM t_articoli ORDER BY id_articolo")
+    result = [tuple(r) for r in rows]
+    conn.close()
+    return result
+
+
+def test_escape_sql_value():
+    assert dump_writer.escape_sql_value(None) == "NULL"
+    assert dump_writer.escape_sql_value(5) == "5"
+    assert dump_writer.escape_sql_value("it's") == "'it\\'s'"
+    assert dump_writer.escape_sql_value("a\r\nb") == "'a\\r\\nb'"
+    assert dump_writer.escape_sql_value("a\\b") == "'a\\\\b'"
+
+
+def test_escaped_values_parse_back():
+    for value in ("it's", 'q"q', "a\\'b", "x\r\ny", "nul\0", "100% _x_", "àèì"):
+        literal = dump_writer.escape_sql_value(value)
+        vals, _ = parser.extract_tuple_values(f"({literal})", 0)
+        assert vals == [value]
+
+
+def test_statements_are_chunked_by_size():
+    rows = [(i, "x" * 100) for i in range(50)]
+    statements = list(
+        dump_writer.iter_insert_statements(
+            rows, columns=("id_articolo", "data"), max_statement_bytes=1000
+        )
+    )
+    assert len(statements) > 1
+    for stmt in statements:
+        assert stmt.startswith("INSERT INTO `t_articoli`")
+        assert stmt.endswith(";\n")
+        assert len(stmt.encode("utf-8")) <= 1000
+
+    # Every row ends up in exactly one statement
+    ids = []
+    for stmt in statements:
+        pos = stmt.find("VALUES")
+        while True:
+            vals, pos = parser.extract_tuple_values(stmt, pos)
+            if vals is None:
+                break
+            ids.append(vals[0])
+    assert ids == list(range(50))
+
+
+def test_round_trip_through_importer(tmp_path):
+    src = tmp_path / "src.db"
+    create_test_db(src)
+
+    dump = tmp_path / "dump.sql"
+    conn = sqlite3.connect(src)
+    count = dump_writer.write_dump(conn, dump, max_statement_bytes=300)
+    conn.close()
+    assert count == 2
+
+    content = dump.read_text(encoding="utf-8")
+    assert "CREATE TABLE `t_articoli`" in content
+    assert content.count("INSERT INTO `t_articoli`") == 2
+
+    dst = tmp_path / "dst.db"
+    manager = ImportManager(str(dst))
+    manager.connect()
+    manager.interactive = False
+    manager.replace_all_duplicates = True
+    assert manager.import_file(str(dump))
+    manager.close()
+
+    assert read_rows(dst) == read_rows(src)
+
+
+def test_gzip_output(tmp_path):
+    src = tmp_path / "src.db"
+    create_test_db(src)
+
+    dump = tmp_path / "dump.sql.gz"
+    conn = sqlite3.connect(src)
+    dump_writer.write_dump(conn, dump)
+    conn.close()
+
+    with gzip.open(dump, "rt", encoding="utf-8") as f:
+        assert "INSERT INTO `t_articoli`" in f.read()
+
+    dst = tmp_path / "dst.db"
+    manager = ImportManager(str(dst))
+    manager.connect()
+    manager.interactive = False
+    manager.replace_all_duplicates = True
+    assert manager.import_file(str(dump))
+    manager.close()
+
+    assert read_rows(dst) == read_rows(src)
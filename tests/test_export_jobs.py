@@ -0,0 +1,150 @@
+import threading
+
+from esplora_articoli import ArticoliExplorer
+from import_articoli_to_sqlite import ImportManager
+from lib import export_jobs
+from lib.connection import open_readwrite
+
+ALL_IDS = "SELECT id_articolo FROM t_articoli"
+
+
+def create_db(path, n=10):
+    manager = ImportManager(str(path))
+    manager.connect()
+    for i in range(1, n + 1):
+        values = (i, "2020-01-01 00:00:00", "notizie", f"Titolo {i}", None, None)
+        assert manager.insert_article(values + (f"testo {i}",) + (None,) * 9)
+    manager.close()
+
+
+def states(conn):
+    return dict(conn.execute("SELECT id_articolo, state FROM export_jobs"))
+
+
+def test_concurrent_claims_are_disjoint(tmp_path):
+    db = tmp_path / "jobs.db"
+    create_db(db, n=200)
+    conn = open_readwrite(str(db))
+    assert export_jobs.enqueue(conn, ALL_IDS) == 200
+    assert export_jobs.enqueue(conn, ALL_IDS) == 0  # already queued
+    claimed = {}
+
+    def drain(worker):
+        worker_conn = open_readwrite(str(db))
+        claimed[worker] = []
+        while True:
+            ids = export_jobs.claim(worker_conn, worker, 7)
+            if not ids:
+                break
+            claimed[worker].extend(ids)
+        worker_conn.close()
+
+    threads = [threading.Thread(target=drain, args=(f"w{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    all_claimed = [i for ids in claimed.values() for i in ids]
+    assert sorted(all_claimed) == list(range(1, 201))
+    assert set(states(conn).values()) == {export_jobs.CLAIMED}
+    conn.close()
+
+
+def test_failed_jobs_back_off_and_give_up(tmp_path, monkeypatch):
+    db = tmp_path / "jobs.db"
+    create_db(db, n=1)
+    monkeypatch.setattr(export_jobs, "MAX_ATTEMPTS", 3)
+    conn = open_readwrite(str(db))
+    export_jobs.enqueue(conn, ALL_IDS)
+
+    now = 1000
+    for delay in (60, 120):
+        assert export_jobs.claim(conn, "w", 10, now=now) == [1]
+        export_jobs.fail(conn, "w", 1, "disco pieno", now=now)
+        assert export_jobs.claim(conn, "w", 10, now=now + delay - 1) == []
+        now += delay
+    assert export_jobs.claim(conn, "w", 10, now=now) == [1]
+    export_jobs.fail(conn, "w", 1, "disco pieno", now=now)
+    # Third failure: no more attempts
+    assert export_jobs.claim(conn, "w", 10, now=now + 10**6) == []
+    row = conn.execute("SELECT state, attempts, error FROM export_jobs").fetchone()
+    assert row == (export_jobs.FAILED, 3, "disco pieno")
+
+    # Queued again by the user: a fresh set of attempts
+    assert export_jobs.enqueue(conn, ALL_IDS, now=now) == 1
+    row = conn.execute("SELECT state, attempts, error FROM export_jobs").fetchone()
+    assert row == (export_jobs.QUEUED, 0, None)
+    assert export_jobs.claim(conn, "w", 10, now=now) == [1]
+    assert export_jobs.enqueue(conn, ALL_IDS, now=now) == 0  # still claimed
+    conn.close()
+
+
+def test_abandoned_claims_are_taken_over(tmp_path):
+    db = tmp_path / "jobs.db"
+    create_db(db, n=3)
+    conn = open_readwrite(str(db))
+    export_jobs.enqueue(conn, ALL_IDS)
+    assert export_jobs.claim(conn, "morto", 2, now=0) == [1, 2]
+
+    assert export_jobs.claim(conn, "vivo", 10, now=1) == [3]
+    timeout = export_jobs.CLAIM_TIMEOUT
+    assert export_jobs.claim(conn, "vivo", 10, now=timeout) == [1, 2]
+
+    # The late exporter cannot complete jobs that are no longer its own
+    assert export_jobs.complete(conn, "morto", [(1, "1.docx"), (2, "2.docx")]) == 0
+    assert export_jobs.complete(conn, "vivo", [(2, "2.docx")]) == 1
+    assert states(conn) == {
+        1: export_jobs.CLAIMED,
+        2: export_jobs.DONE,
+        3: export_jobs.CLAIMED,
+    }
+    exported = conn.execute("SELECT id_articolo FROM t_articoli WHERE esportato = 1")
+    assert exported.fetchall() == [(2,)]
+
+    export_jobs.release(conn, "vivo")
+    assert states(conn) == {
+        1: export_jobs.QUEUED,
+        2: export_jobs.DONE,
+        3: export_jobs.QUEUED,
+    }
+    conn.close()
+
+
+def test_export_queue_resumes_and_retries(tmp_path, monkeypatch):
+    db = tmp_path / "jobs.db"
+    create_db(db, n=6)
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    explorer.export_dir = str(tmp_path / "out")
+    explorer.export_workers = 1
+    written = []
+
+    def write_article(article, export_dir, *options):
+        if article["id_articolo"] == 4 and 4 not in written:
+            written.append(4)
+            raise OSError("disco pieno")
+        written.append(article["id_articolo"])
+        return f"{export_dir}/{article['id_articolo']}.docx"
+
+    monkeypatch.setattr("lib.docx_export.write_article", write_article)
+    writer = explorer._writer()
+    # A previous run died holding articles 1 and 2, long ago
+    export_jobs.enqueue(writer, ALL_IDS)
+    export_jobs.claim(writer, "morto", 2, now=0)
+
+    assert explorer.export_queue() == 5
+    # Article 4 waits for a retry, which keeps the queue (and done jobs) open
+    jobs = states(writer)
+    assert jobs.pop(4) == export_jobs.FAILED
+    assert set(jobs.values()) == {export_jobs.DONE}
+    exported = writer.execute("SELECT COUNT(*) FROM t_articoli WHERE esportato = 1")
+    assert exported.fetchone()[0] == 5
+
+    # Next run, once the retry delay has passed
+    writer.execute("UPDATE export_jobs SET available_at = 0")
+    writer.commit()
+    assert explorer.drain_export_queue() == 1
+    assert states(writer) == {}
+    assert sorted(written) == [1, 2, 3, 4, 4, 5, 6]
+    explorer.close()
@@ -0,0 +1,94 @@
+from esplora_articoli import ArticoliExplorer
+from import_articoli_to_sqlite import ImportManager
+from lib.export_journal import JOURNAL_NAME, ExportJournal
+
+
+def create_db(path, n=120):
+    manager = ImportManager(str(path))
+    manager.connect()
+    for i in range(1, n + 1):
+        values = (i, "2020-01-01 00:00:00", "notizie", f"Titolo {i}", None, None)
+        assert manager.insert_article(values + (f"testo {i}",) + (None,) * 9)
+    manager.close()
+
+
+def open_explorer(db, export_dir, monkeypatch):
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    explorer.export_dir = str(export_dir)
+    explorer.export_workers = 1
+    monkeypatch.setattr(
+        "lib.docx_export.write_article",
+        lambda article, export_dir, *options: f"{export_dir}/a.docx",
+    )
+    return explorer
+
+
+def marked(explorer):
+    rows = explorer.conn.execute(
+        "SELECT id_articolo FROM t_articoli WHERE esportato = 1 ORDER BY id_articolo"
+    )
+    return [row[0] for row in rows]
+
+
+def test_journal_drops_truncated_line(tmp_path):
+    journal = ExportJournal(str(tmp_path))
+    assert journal.pending() == []
+    for article_id in (5, 7, 5):
+        journal.record(article_id)
+    journal.close()
+    with open(tmp_path / JOURNAL_NAME, "a") as f:
+        f.write("12")  # crash in the middle of "123\n"
+    assert journal.pending() == [5, 7]
+    journal.clear()
+    assert not (tmp_path / JOURNAL_NAME).exists()
+
+
+def test_bulk_export_commits_in_batches(tmp_path, monkeypatch):
+    db = tmp_path / "journal.db"
+    create_db(db)
+    explorer = open_explorer(db, tmp_path / "out", monkeypatch)
+    statements = []
+    explorer._writer().set_trace_callback(statements.append)
+
+    assert explorer.export_results() == 120
+    assert sum(sql == "COMMIT" for sql in statements) == 2
+    assert len(marked(explorer)) == 120
+    assert not (tmp_path / "out" / JOURNAL_NAME).exists()
+    explorer.close()
+
+
+def test_unmarked_files_reconciled_on_next_run(tmp_path, monkeypatch):
+    db = tmp_path / "journal.db"
+    create_db(db, n=6)
+    # A previous run wrote articles 2 and 3, then crashed before marking them
+    journal = ExportJournal(str(tmp_path / "out"))
+    journal.record(2)
+    journal.record(3)
+    journal.close()
+
+    explorer = open_explorer(db, tmp_path / "out", monkeypatch)
+    assert explorer.export_results(only_new=True) == 4
+    assert marked(explorer) == [1, 2, 3, 4, 5, 6]
+    assert journal.pending() == []
+    explorer.close()
+
+
+def test_failed_batch_stays_journaled(tmp_path, monkeypatch):
+    db = tmp_path / "journal.db"
+    create_db(db, n=30)
+    monkeypatch.setattr("esplora_articoli.MARK_BATCH", 10)
+    explorer = open_explorer(db, tmp_path / "out", monkeypatch)
+    mark = explorer._mark_exported
+    calls = []
+
+    def locked_once(article_ids):
+        calls.append(len(article_ids))
+        return len(calls) > 1 and mark(article_ids)
+
+    monkeypatch.setattr(explorer, "_mark_exported", locked_once)
+    assert explorer.export_results() == 30
+    # The batch that failed is marked together with the next one
+    assert calls == [10, 20, 10]
+    assert len(marked(explorer)) == 30
+    explorer.close()
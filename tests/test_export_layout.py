@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from esplora_articoli import ArticoliExplorer
+from import_articoli_to_sqlite import ImportManager
+from lib import docx_export
+from lib.export_manifest import INDEX_NAME
+
+
+def test_filenames_are_ascii_and_unique():
+    names = {
+        docx_export.export_filename({"id_articolo": i, "titolo_articolo": title})
+        for i, title in enumerate(["Riunione!", "Riunione?", "Riunione ", None], 1)
+    }
+    assert names == {
+        "articolo_1_Riunione.docx",
+        "articolo_2_Riunione.docx",
+        "articolo_3_Riunione.docx",
+        "articolo_4_articolo.docx",
+    }
+    article = {"id_articolo": 7, "titolo_articolo": "Attività:  l'Unità d'Italia."}
+    assert (
+        docx_export.export_filename(article)
+        == "articolo_7_Attivita_l_Unita_d_Italia.docx"
+    )
+    long_title = {"id_articolo": 8, "titolo_articolo": "a" * 49 + " b"}
+    assert docx_export.export_filename(long_title) == f"articolo_8_{'a' * 49}.docx"
+
+
+@pytest.mark.parametrize(
+    "layout, expected",
+    [
+        ("flat", "articolo_12345_T.docx"),
+        ("year", "2011/articolo_12345_T.docx"),
+        ("month", "2011/03/articolo_12345_T.docx"),
+        ("id", "012/articolo_12345_T.docx"),
+    ],
+)
+def test_export_path_layouts(layout, expected):
+    article = {"id_articolo": 12345, "titolo_articolo": "T", "data": "2011-03-05"}
+    path = docx_export.export_path(article, layout)
+    assert path.replace("\\", "/") == expected
+    undated = dict(article, data=None)
+    if layout in ("year", "month"):
+        assert docx_export.export_path(undated, layout).startswith("senza_data")
+
+
+@pytest.mark.skipif(not docx_export.DOCX_AVAILABLE, reason="python-docx mancante")
+def test_sharded_export_writes_index(tmp_path):
+    db = tmp_path / "layout.db"
+    manager = ImportManager(str(db))
+    manager.connect()
+    for i, date in enumerate(["2019-12-31 10:00:00", "2020-01-02 10:00:00"], 1):
+        values = (i, date, "notizie", f"Titolo {i}", None, None, f"testo {i}")
+        assert manager.insert_article(values + (None,) * 9)
+    manager.close()
+
+    out = tmp_path / "out"
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    explorer.export_dir = str(out)
+    explorer.export_workers = 1
+    explorer.export_layout = "month"
+    assert explorer.export_results(mark_exported=False) == 2
+    index = json.loads((out / INDEX_NAME).read_text())
+    assert index == {
+        "1": "2019/12/articolo_1_Titolo_1.docx",
+        "2": "2020/01/articolo_2_Titolo_2.docx",
+    }
+    assert all((out / path).is_file() for path in index.values())
+
+    # Another layout writes the files again at their new paths
+    explorer.export_layout = "id"
+    assert explorer.export_results(mark_exported=False) == 2
+    index = json.loads((out / INDEX_NAME).read_text())
+    assert index["1"] == "000/articolo_1_Titolo_1.docx"
+    assert (out / index["2"]).is_file()
+    explorer.close()
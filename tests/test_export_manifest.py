@@ -0,0 +1,143 @@
+import json
+
+import pytest
+
+from esplora_articoli import ArticoliExplorer
+from import_articoli_to_sqlite import ImportManager
+from lib import docx_export
+from lib.export_manifest import (
+    INDEX_NAME,
+    MANIFEST_NAME,
+    ExportManifest,
+    article_digest,
+)
+
+pytestmark = pytest.mark.skipif(
+    not docx_export.DOCX_AVAILABLE, reason="python-docx non installato"
+)
+
+
+def create_db(path, n=5):
+    manager = ImportManager(str(path))
+    manager.connect()
+    for i in range(1, n + 1):
+        values = (i, "2020-01-01 00:00:00", "notizie", f"Titolo {i}", None, None)
+        assert manager.insert_article(values + (f"<P>testo {i}</P>",) + (None,) * 9)
+    manager.close()
+
+
+def open_explorer(db, export_dir, monkeypatch):
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    explorer.export_dir = str(export_dir)
+    explorer.export_workers = 1
+    written = []
+    write_article = docx_export.write_article
+
+    def counting(article, *args):
+        written.append(article["id_articolo"])
+        return write_article(article, *args)
+
+    monkeypatch.setattr("lib.docx_export.write_article", counting)
+    return explorer, written
+
+
+def test_unchanged_articles_are_not_rendered_again(tmp_path, monkeypatch):
+    db = tmp_path / "manifest.db"
+    create_db(db)
+    out = tmp_path / "out"
+    explorer, written = open_explorer(db, out, monkeypatch)
+
+    assert explorer.export_results() == 5
+    assert sorted(written) == [1, 2, 3, 4, 5]
+    entries = json.loads((out / MANIFEST_NAME).read_text())
+    assert entries["3"]["renderer"] == f"htmldocx/{docx_export.RENDER_VERSION}"
+    assert entries["3"]["size"] == (out / entries["3"]["path"]).stat().st_size
+
+    # Second run: nothing changed, every file is reused
+    written.clear()
+    assert explorer.export_results() == 5
+    assert written == []
+
+    # A changed body and a deleted file are rendered again
+    writer = explorer._writer()
+    writer.execute(
+        "UPDATE t_articoli SET testo_articolo = '<P>nuovo</P>' WHERE id_articolo = 2"
+    )
+    writer.commit()
+    (out / entries["4"]["path"]).unlink()
+    assert explorer.export_results() == 5
+    assert sorted(written) == [2, 4]
+
+    # --force and a different renderer ignore the manifest
+    written.clear()
+    explorer.export_force = True
+    assert explorer.export_results() == 5
+    assert sorted(written) == [1, 2, 3, 4, 5]
+    written.clear()
+    explorer.export_force = False
+    explorer.export_renderer = "native"
+    assert explorer.export_results() == 5
+    assert sorted(written) == [1, 2, 3, 4, 5]
+    explorer.close()
+
+
+def test_single_article_export_uses_manifest(tmp_path, monkeypatch):
+    db = tmp_path / "manifest.db"
+    create_db(db, n=1)
+    explorer, written = open_explorer(db, tmp_path / "out", monkeypatch)
+    article = explorer.get_article_by_id(1)
+
+    first = explorer.export_article(article, interactive=False)
+    assert explorer.export_article(article, interactive=False) == first
+    assert written == [1]
+    explorer.close()
+
+
+def test_digest_covers_template_and_version(tmp_path, monkeypatch):
+    article = {"id_articolo": 1, "titolo_articolo": "T", "testo_articolo": "x"}
+    template = tmp_path / "modello.docx"
+    template.write_bytes(b"v1")
+    digest = article_digest(article, str(template))
+
+    assert article_digest(dict(article), str(template)) == digest
+    assert article_digest(article) != digest
+    assert article_digest(article, str(template), "native") != digest
+    template.write_bytes(b"v2 longer")
+    assert article_digest(article, str(template)) != digest
+    default = article_digest(article)
+    monkeypatch.setattr("lib.export_manifest.RENDER_VERSION", 99)
+    assert article_digest(article) != default
+
+
+def test_unreadable_manifest_renders_everything(tmp_path):
+    (tmp_path / MANIFEST_NAME).write_text("{tronca")
+    manifest = ExportManifest(str(tmp_path))
+    assert manifest.entries == {}
+    assert manifest.unchanged({"id_articolo": 1}) is None
+
+
+def test_saves_of_concurrent_exporters_are_merged(tmp_path):
+    def export(manifest, article_id):
+        assert manifest.unchanged({"id_articolo": article_id}) is None
+        path = tmp_path / f"{article_id}.docx"
+        path.write_bytes(b"x" * article_id)
+        manifest.record(article_id, str(path))
+
+    first = ExportManifest(str(tmp_path))
+    export(first, 1)
+    first.save()
+    # Both loaded the manifest with article 1 only
+    second = ExportManifest(str(tmp_path))
+    third = ExportManifest(str(tmp_path))
+    export(second, 2)
+    export(third, 3)
+    third.discard(1)
+    second.save()
+    third.save()
+
+    entries = json.loads((tmp_path / MANIFEST_NAME).read_text())
+    assert sorted(entries, key=int) == ["2", "3"]
+    index = json.loads((tmp_path / INDEX_NAME).read_text())
+    assert index == {"2": "2.docx", "3": "3.docx"}
+    assert third.entries == entries
@@ -0,0 +1,99 @@
+import sqlite3
+
+from esplora_articoli import ArticoliExplorer
+from import_articoli_to_sqlite import ImportManager
+from lib import fulltext
+
+
+def create_db(path, n=120):
+    manager = ImportManager(str(path))
+    manager.connect()
+    for i in range(1, n + 1):
+        topic = "sindacato" if i % 2 else "notizie"
+        values = (i, f"20{10 + i % 10}-01-01 00:00:00", topic, f"Titolo {i}")
+        text = f"<P>{'carabinieri' if i % 3 == 0 else 'riunione'} {i}</P>"
+        assert manager.insert_article(values + (None, None, text) + (None,) * 9)
+    fulltext.sync_fulltext(manager.conn)
+    manager.close()
+
+
+def open_explorer(db, monkeypatch):
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    explorer.export_workers = 1
+    exported = []
+    monkeypatch.setattr(
+        "lib.docx_export.write_article",
+        lambda article, export_dir, *options: exported.append(article) or "file.docx",
+    )
+    return explorer, exported
+
+
+def test_export_follows_filters_and_search(tmp_path, monkeypatch):
+    db = tmp_path / "bulk.db"
+    create_db(db)
+    explorer, exported = open_explorer(db, monkeypatch)
+
+    explorer.current_filter = "notizie"
+    explorer.current_period = "2012..2015"
+    explorer.current_search = "carabinieri"
+    expected = explorer.get_total_count()
+    assert explorer.export_results() == expected
+    ids = [article["id_articolo"] for article in exported]
+    assert ids and all(i % 6 == 0 and 2 <= i % 10 <= 5 for i in ids)
+    assert exported[0]["testo_articolo"].startswith("<P>carabinieri")
+    explorer.close()
+
+
+def test_export_has_no_fixed_cap(tmp_path, monkeypatch):
+    db = tmp_path / "bulk.db"
+    create_db(db)
+    explorer, exported = open_explorer(db, monkeypatch)
+
+    statements = []
+    explorer.conn.set_trace_callback(statements.append)
+    assert explorer.export_results() == 120  # more than the old limit of 50
+    # One streamed query, not one per article
+    assert sum("testo_articolo" in sql for sql in statements) == 1
+
+    exported.clear()
+    assert explorer.export_results(limit=7) == 7
+    assert [a["id_articolo"] for a in exported] == [
+        a["id_articolo"] for a in explorer.iter_results(limit=7)
+    ]
+    explorer.close()
+
+
+def test_export_only_new_and_marking(tmp_path):
+    db = tmp_path / "bulk.db"
+    create_db(db, n=6)
+    conn = sqlite3.connect(db)
+    conn.execute("UPDATE t_articoli SET esportato = 1 WHERE id_articolo <= 2")
+    conn.commit()
+    conn.close()
+
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    explorer.current_filter = "sindacato"  # articles 1, 3, 5
+    assert explorer.export_results(only_new=True) == 2
+    flags = dict(explorer.conn.execute("SELECT id_articolo, esportato FROM t_articoli"))
+    assert [i for i, flag in sorted(flags.items()) if flag] == [1, 2, 3, 5]
+    explorer.close()
+
+
+def test_all_command_asks_for_optional_limit(tmp_path, monkeypatch):
+    db = tmp_path / "bulk.db"
+    create_db(db, n=60)
+    explorer, exported = open_explorer(db, monkeypatch)
+    explorer.close()
+    explorer.prefetch = False
+    monkeypatch.setattr(explorer, "clear_screen", lambda: None)
+
+    # [a]ll asks for a limit, then for the format (INVIO = one DOCX each)
+    answers = iter(["f", "1", "a", "", "", "", "a", "3", "", "", "a", "0", "q"])
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(answers))
+    explorer.run()
+
+    # Topic 1 in the filter menu has 30 articles: all of them, then 3, then none
+    assert len(exported) == 33
+    assert len({a["argomento"] for a in exported}) == 1
@@ -0,0 +1,120 @@
+import sqlite3
+
+from esplora_articoli import ArticoliExplorer
+from import_articoli_to_sqlite import create_database_and_table
+from lib import fulltext
+from lib.text import html_to_text
+
+ARTICLES = [
+    (
+        1,
+        "2020-01-01",
+        "Sindacato",
+        "Riunione nazionale",
+        "",
+        "<P>Ordine del giorno</P>",
+    ),
+    (
+        2,
+        "2020-02-01",
+        "Attualità",
+        "Notizie dal reparto",
+        "Perché cambiare",
+        "<P align=center>I <B>carabinieri</B> del comando&nbsp;regionale</P>",
+    ),
+    (3, "2020-03-01", "Attualità", "Carabinieri in servizio", "", "<P>Turni</P>"),
+]
+
+
+def create_test_db(path):
+    conn = create_database_and_table(str(path))
+    conn.executemany(
+        "INSERT INTO t_articoli (id_articolo, data, argomento, titolo_articolo, "
+        "sotto_titolo, testo_articolo) VALUES (?, ?, ?, ?, ?, ?)",
+        ARTICLES,
+    )
+    conn.commit()
+    conn.close()
+
+
+def search(explorer, text):
+    explorer.current_search = text
+    explorer.current_page = 0
+    return explorer.get_total_count(), explorer.get_articles_page()
+
+
+def test_html_to_text():
+    html = "<P align=center>Uno&nbsp;<B>due</B></P>\r\n<SCRIPT>x()</SCRIPT><P>tre</P>"
+    assert html_to_text(html) == "Uno due\ntre"
+    assert html_to_text(html, " ") == "Uno due tre"
+    assert html_to_text(None) == ""
+
+
+def test_build_match_query():
+    assert fulltext.build_match_query("carab rep") == '"carab"* "rep"*'
+    assert fulltext.build_match_query('"ordine del" giorno') == (
+        '"ordine del" "giorno"*'
+    )
+    assert fulltext.build_match_query("  ** ") is None
+
+
+def test_search_body_prefix_and_accents(tmp_path):
+    db = tmp_path / "fts.db"
+    create_test_db(db)
+
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    assert explorer.fts_enabled
+
+    # Body text (HTML stripped), not only titles
+    count, rows = search(explorer, "regionale")
+    assert count == 1 and rows[0]["id_articolo"] == 2
+    assert "[regionale]" in rows[0]["snippet"]
+
+    # Prefix query, title matches rank first
+    count, rows = search(explorer, "carab")
+    assert count == 2
+    assert [r["id_articolo"] for r in rows] == [3, 2]
+
+    # Accents folded in both directions
+    assert search(explorer, "perche")[0] == 1
+    assert search(explorer, "attualità reparto")[0] == 0  # topic is not indexed
+
+    # HTML markup is not indexed
+    assert search(explorer, "align")[0] == 0
+    explorer.close()
+
+
+def test_index_follows_changes(tmp_path):
+    db = tmp_path / "fts.db"
+    create_test_db(db)
+
+    conn = sqlite3.connect(db)
+    conn.execute("UPDATE t_articoli SET testo_articolo = '<P>Nuovo testo</P>'")
+    conn.execute("DELETE FROM t_articoli WHERE id_articolo = 3")
+    conn.execute(
+        "INSERT INTO t_articoli (id_articolo, titolo_articolo, testo_articolo) "
+        "VALUES (4, 'Aggiunto dopo', 'testo')"
+    )
+    conn.commit()
+    conn.close()
+
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    assert search(explorer, "regionale")[0] == 0
+    assert search(explorer, "nuovo")[0] == 2
+    assert search(explorer, "carabinieri")[0] == 0
+    assert search(explorer, "aggiunto")[1][0]["id_articolo"] == 4
+    explorer.close()
+
+
+def test_like_fallback_without_fts(tmp_path):
+    db = tmp_path / "fts.db"
+    create_test_db(db)
+
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    explorer.fts_enabled = False
+    count, rows = search(explorer, "Carabinieri")
+    assert count == 1 and rows[0]["id_articolo"] == 3
+    explorer.close()
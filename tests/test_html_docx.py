@@ -0,0 +1,151 @@
+import io
+import os
+import zipfile
+
+import pytest
+
+from lib import docx_export, parser
+
+docx = pytest.importorskip("docx")
+
+from docx.oxml.ns import qn  # noqa: E402
+
+from lib import html_docx  # noqa: E402
+from lib.html_docx import BOLD, ITALIC, UNDERLINE  # noqa: E402
+from lib.text import html_to_text  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DUMPS = [
+    os.path.join(ROOT, "import", name)
+    for name in ("t_articoli.sql", "t_articoli1.sql")
+    if os.path.exists(os.path.join(ROOT, "import", name))
+]
+
+
+def load_bodies(paths):
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            content = f.read()
+        for values in parser.iter_insert_tuples(content, "t_articoli"):
+            if len(values) == 16 and values[6]:
+                yield values[6]
+
+
+def text_of(blocks):
+    for block in blocks:
+        if block[0] == "p":
+            for text, _, _ in block[2]:
+                yield text
+        else:
+            for row in block[1]:
+                for cell in row:
+                    yield from text_of(cell)
+
+
+def test_paragraphs_runs_and_breaks():
+    blocks = html_docx.html_to_blocks(
+        "<P>Uno <B>grassetto</B><B><I> misto</I></B><BR>riga\n  due</P>"
+        "<div>&nbsp;</div><p><u>sotto</u>&amp; fine </p>"
+    )
+    assert blocks == [
+        (
+            "p",
+            None,
+            [
+                ("Uno ", 0, None),
+                ("grassetto", BOLD, None),
+                (" misto", BOLD | ITALIC, None),
+                ("\nriga due", 0, None),
+            ],
+        ),
+        ("p", None, [("sotto", UNDERLINE, None), ("& fine", 0, None)]),
+    ]
+
+
+def test_block_styles_links_and_skipped_content():
+    blocks = html_docx.html_to_blocks(
+        "<h2>Titolo</h2><ul><li>a<ol><li>b</li></ol></li></ul>"
+        "<blockquote>citato</blockquote><hr>"
+        '<p><a href="https://ficiesse.it">sito</a> <a href="javascript:x()">js</a>'
+        "<script>var p = '<p>';</script><img src=x.gif></p>"
+        "<pre>  a\n  b</pre>"
+    )
+    assert blocks == [
+        ("p", "Heading 2", [("Titolo", 0, None)]),
+        ("p", "List Bullet", [("a", 0, None)]),
+        ("p", "List Number 2", [("b", 0, None)]),
+        ("p", "Quote", [("citato", 0, None)]),
+        ("p", None, [("─" * 50, 0, None)]),
+        ("p", None, [("sito", 0, "https://ficiesse.it"), (" js", 0, None)]),
+        ("p", None, [("  a\n  b", 0, None)]),
+    ]
+
+
+def test_tables_nested_and_unclosed():
+    blocks = html_docx.html_to_blocks(
+        "<table><tr><td>a</td><td><table><tr><td>x</td></tr></table></td></tr>"
+        "<tr><th>b<td>c</table><table><tr><td>aperta"
+    )
+    inner = ("table", [[[("p", None, [("x", 0, None)])]]])
+    assert blocks == [
+        (
+            "table",
+            [
+                [[("p", None, [("a", 0, None)])], [inner]],
+                [[("p", None, [("b", 0, None)])], [("p", None, [("c", 0, None)])]],
+            ],
+        ),
+        ("table", [[[("p", None, [("aperta", 0, None)])]]]),
+    ]
+
+
+def test_native_renderer_document():
+    article = {
+        "id_articolo": 1,
+        "data": "2020-01-01 00:00:00",
+        "argomento": "notizie",
+        "titolo_articolo": "Titolo",
+        "testo_articolo": (
+            "<P><B>Forte</B> e <A href='https://ficiesse.it'>link</A></P>"
+            "<UL><LI>voce</LI></UL><TABLE><TR><TD>cella</TD><TD>due</TD></TR></TABLE>"
+        ),
+    }
+    doc = docx_export.render_article(article, renderer="native")
+    paragraphs = {p.text: p for p in doc.paragraphs}
+    assert paragraphs["Forte e link"].runs[0].bold
+    assert paragraphs["voce"].style.name == "List Bullet"
+    assert [c.text for c in doc.tables[0].rows[0].cells] == ["cella", "due"]
+    # The table cell reuses its own empty paragraph
+    assert len(doc.tables[0].rows[0].cells[0].paragraphs) == 1
+    links = doc.element.body.findall(".//" + qn("w:hyperlink"))
+    assert len(links) == 1
+    rel = doc.part.rels[links[0].get(qn("r:id"))]
+    assert rel.is_external and rel.target_ref == "https://ficiesse.it"
+
+    data = io.BytesIO()
+    doc.save(data)
+    assert "word/document.xml" in zipfile.ZipFile(data).namelist()
+
+
+def test_missing_styles_fall_back_to_default(tmp_path):
+    template = docx.Document()
+    for name in ("List Bullet", "Table Grid"):
+        template.styles[name].delete()
+    path = tmp_path / "modello.docx"
+    template.save(path)
+    doc = docx.Document(str(path))
+    html_docx.add_html(doc, "<ul><li>voce</li></ul><table><tr><td>x</td></tr></table>")
+    assert doc.paragraphs[-1].style.name == "Normal"
+    assert doc.tables[0].cell(0, 0).text == "x"
+
+
+@pytest.mark.skipif(not DUMPS, reason="dump SQL di esempio non presenti")
+def test_archive_bodies_keep_their_text():
+    doc = docx.Document()
+    for body in load_bodies(DUMPS):
+        html = docx_export.clean_html_for_docx(body)
+        blocks = html_docx.html_to_blocks(html)
+        got = "".join("".join(text_of(blocks)).split())
+        expected = "".join(html_to_text(html, " ").split())
+        assert got.replace("─" * 50, "") == expected.replace("─" * 50, "")
+        html_docx.add_blocks(doc, blocks)
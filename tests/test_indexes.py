@@ -0,0 +1,137 @@
+import sqlite3
+
+import import_articoli_to_sqlite as importer
+from esplora_articoli import ArticoliExplorer
+from lib import migrations
+
+
+def create_test_db(path, n=30):
+    conn = importer.create_database_and_table(str(path))
+    for i in range(1, n + 1):
+        conn.execute(
+            "INSERT INTO t_articoli (id_articolo, data, argomento, titolo_articolo, "
+            "esportato) VALUES (?, ?, ?, ?, ?)",
+            (i, f"2020-01-{i % 28 + 1:02d} 00:00:00", f"arg{i % 3}", f"t{i}", i % 2),
+        )
+    conn.commit()
+    conn.close()
+
+
+def query_plan(conn, sql, params=()):
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return " | ".join(row[-1] for row in rows)
+
+
+def index_names(conn):
+    rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    return {row[0] for row in rows}
+
+
+def test_migration_creates_indexes(tmp_path):
+    db = tmp_path / "idx.db"
+    create_test_db(db)
+    conn = sqlite3.connect(db)
+    assert set(migrations.SECONDARY_INDEXES) <= index_names(conn)
+    conn.close()
+
+
+def test_explorer_page_uses_data_index(tmp_path):
+    db = tmp_path / "idx.db"
+    create_test_db(db)
+    conn = sqlite3.connect(db)
+
+    plan = query_plan(
+        conn,
+        "SELECT id_articolo FROM t_articoli "
+        "ORDER BY data_epoch DESC, id_articolo DESC LIMIT 10",
+    )
+    assert "idx_articoli_data_epoch" in plan
+    assert "TEMP B-TREE" not in plan
+    conn.close()
+
+
+def test_topic_filter_uses_composite_index(tmp_path):
+    db = tmp_path / "idx.db"
+    create_test_db(db)
+    conn = sqlite3.connect(db)
+
+    plan = query_plan(
+        conn,
+        "SELECT id_articolo FROM t_articoli WHERE argomento = ? "
+        "ORDER BY data_epoch DESC, id_articolo DESC LIMIT 10",
+        ("arg1",),
+    )
+    # The view's topic filter is one lookup in topics, then an integer range
+    assert "sqlite_autoindex_topics_1 (nome=?)" in plan
+    assert "idx_articoli_topic_epoch (id_topic=?)" in plan
+    assert "TEMP B-TREE" not in plan
+
+    plan = query_plan(
+        conn, "SELECT id_topic, COUNT(*) FROM t_articoli_base GROUP BY id_topic"
+    )
+    assert "COVERING INDEX idx_articoli_topic_epoch" in plan
+    conn.close()
+
+
+def test_export_only_new_uses_partial_index(tmp_path):
+    db = tmp_path / "idx.db"
+    create_test_db(db)
+    conn = sqlite3.connect(db)
+
+    plan = query_plan(
+        conn,
+        "SELECT * FROM t_articoli WHERE esportato = 0 "
+        "ORDER BY data_epoch DESC, id_articolo DESC LIMIT 5",
+    )
+    assert "idx_articoli_da_esportare" in plan
+    assert "TEMP B-TREE" not in plan
+    conn.close()
+
+
+def test_bulk_import_rebuilds_indexes(tmp_path, monkeypatch):
+    monkeypatch.setattr(importer, "BULK_INDEX_THRESHOLD", 2)
+    dropped = []
+    real_drop = migrations.drop_secondary_indexes
+
+    def spy_drop(conn):
+        names = real_drop(conn)
+        dropped.extend(names)
+        return names
+
+    monkeypatch.setattr(migrations, "drop_secondary_indexes", spy_drop)
+
+    sql = "INSERT INTO `t_articoli` VALUES " + ", ".join(
+        f"({i},'2020-01-0{i} 00:00:00','arg','t{i}','',NULL,'body',"
+        "0,NULL,NULL,NULL,0,1,0,NULL,NULL)"
+        for i in range(1, 4)
+    )
+    sql_file = tmp_path / "bulk.sql"
+    sql_file.write_text(sql + ";", encoding="utf-8")
+
+    db = tmp_path / "bulk.db"
+    manager = importer.ImportManager(str(db))
+    manager.connect()
+    manager.interactive = False
+    manager.replace_all_duplicates = True
+    assert manager.import_file(str(sql_file))
+    manager.close()
+
+    assert set(dropped) == set(migrations.SECONDARY_INDEXES)
+    conn = sqlite3.connect(db)
+    assert set(migrations.SECONDARY_INDEXES) <= index_names(conn)
+    assert conn.execute("SELECT COUNT(*) FROM t_articoli").fetchone()[0] == 3
+    conn.close()
+
+
+def test_explorer_queries_still_work(tmp_path):
+    db = tmp_path / "idx.db"
+    create_test_db(db)
+
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    explorer.current_filter = "arg1"
+    page = explorer.get_articles_page()
+    assert len(page) == 10
+    dates = [row["data"] for row in page]
+    assert dates == sorted(dates, reverse=True)
+    explorer.close()
@@ -0,0 +1,124 @@
+import sqlite3
+
+from esplora_articoli import ArticoliExplorer
+from import_articoli_to_sqlite import create_database_and_table
+
+
+def create_test_db(path):
+    conn = create_database_and_table(str(path))
+    rows = []
+    for i in range(1, 24):
+        # Several articles share a date; two have no date at all
+        data = None if i in (5, 17) else f"2020-{(i % 6) + 1:02d}-01 00:00:00"
+        rows.append((i, data, "pari" if i % 2 == 0 else "dispari", f"title {i}"))
+    conn.executemany(
+        "INSERT INTO t_articoli (id_articolo, data, argomento, titolo_articolo) "
+        "VALUES (?, ?, ?, ?)",
+        rows,
+    )
+    conn.commit()
+    conn.close()
+
+
+def expected_order(db, where="", params=()):
+    conn = sqlite3.connect(db)
+    rows = conn.execute(
+        f"SELECT id_articolo FROM t_articoli {where} "
+        "ORDER BY data DESC, id_articolo DESC",
+        params,
+    ).fetchall()
+    conn.close()
+    return [r[0] for r in rows]
+
+
+def walk_forward(explorer):
+    pages = []
+    while True:
+        pages.append([r["id_articolo"] for r in explorer.get_articles_page()])
+        if not explorer.next_page():
+            return pages
+
+
+def open_explorer(db, page_size=5):
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    explorer.page_size = page_size
+    return explorer
+
+
+def test_next_and_prev_cover_all_rows(tmp_path):
+    db = tmp_path / "keyset.db"
+    create_test_db(db)
+    explorer = open_explorer(db)
+
+    pages = walk_forward(explorer)
+    assert [i for page in pages for i in page] == expected_order(db)
+    assert explorer.current_page == len(pages) - 1
+
+    # Walk back to the first page, seeing the same pages in reverse
+    back = [[r["id_articolo"] for r in explorer.get_articles_page()]]
+    while explorer.prev_page():
+        back.append([r["id_articolo"] for r in explorer.get_articles_page()])
+    assert back == pages[::-1]
+    assert explorer.current_page == 0
+    explorer.close()
+
+
+def test_pagination_with_topic_filter(tmp_path):
+    db = tmp_path / "keyset.db"
+    create_test_db(db)
+    explorer = open_explorer(db, page_size=4)
+    explorer.current_filter = "pari"
+    explorer.reset_position()
+
+    pages = walk_forward(explorer)
+    flat = [i for page in pages for i in page]
+    assert flat == expected_order(db, "WHERE argomento = ?", ("pari",))
+    explorer.close()
+
+
+def test_jump_to_date_and_id(tmp_path):
+    db = tmp_path / "keyset.db"
+    create_test_db(db)
+    explorer = open_explorer(db)
+    order = expected_order(db)
+
+    assert explorer.jump_to_date("2020-03")
+    page = explorer.get_articles_page()
+    assert page[0]["data"].startswith("2020-03")
+    first = expected_order(db, "WHERE data < ?", ("2020-04",))[0]
+    assert page[0]["id_articolo"] == first
+    assert explorer.current_page == order.index(first) // 5
+    assert not explorer.jump_to_date("1999")
+    assert not explorer.jump_to_date("marzo")
+
+    assert explorer.jump_to_id(17)  # undated article, near the end
+    page = explorer.get_articles_page()
+    assert page[0]["id_articolo"] == 17
+    assert explorer.current_page == order.index(17) // 5
+    assert not explorer.jump_to_id(999)
+
+    # Pages after a jump keep following the global order
+    explorer.jump_to_id(order[3])
+    rest = [i for p in walk_forward(explorer) for i in p]
+    assert rest == order[3:]
+    explorer.close()
+
+
+def test_seek_query_uses_index(tmp_path):
+    db = tmp_path / "keyset.db"
+    create_test_db(db)
+    explorer = open_explorer(db)
+
+    for current_filter in (None, "pari"):
+        explorer.current_filter = current_filter
+        query, params = explorer._seek_query(
+            seek=("<", "2020-03-01 00:00:00", 10), limit=6
+        )
+        plan = " | ".join(
+            row[-1]
+            for row in explorer.conn.execute(f"EXPLAIN QUERY PLAN {query}", params)
+        )
+        assert "USING INDEX" in plan
+        assert "TEMP B-TREE" not in plan
+    explorer.close()
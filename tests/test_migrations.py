@@ -0,0 +1,125 @@
+import sqlite3
+
+import pytest
+
+from esplora_articoli import ArticoliExplorer
+from import_articoli_to_sqlite import create_database_and_table
+from lib import migrations
+
+
+def create_legacy_db(path):
+    """Database created before the 'esportato' column and user_version"""
+    conn = sqlite3.connect(path)
+    conn.execute(
+        """
+        CREATE TABLE t_articoli (
+            id_articolo INTEGER PRIMARY KEY,
+            data TEXT,
+            argomento TEXT,
+            titolo_articolo TEXT,
+            sotto_titolo TEXT,
+            TITLE TEXT,
+            testo_articolo TEXT,
+            nr_attach INTEGER,
+            titolo_foto TEXT,
+            foto_path TEXT,
+            link_esterno TEXT,
+            contatore_visite INTEGER,
+            attivo INTEGER,
+            id_forum INTEGER,
+            ultimo_accesso TEXT,
+            scadenza TEXT
+        )
+    """
+    )
+    conn.execute(
+        "INSERT INTO t_articoli (id_articolo, data, titolo_articolo) "
+        "VALUES (1, '2020-01-01 00:00:00', 'old')"
+    )
+    conn.commit()
+    conn.close()
+
+
+def columns(conn):
+    return [row[1] for row in conn.execute("PRAGMA table_info(t_articoli)")]
+
+
+def test_fresh_database_gets_latest_version(tmp_path):
+    conn = create_database_and_table(str(tmp_path / "new.db"))
+    assert migrations.get_schema_version(conn) == migrations.SCHEMA_VERSION
+    assert "esportato" in columns(conn)
+    conn.close()
+
+
+def test_legacy_database_is_upgraded_once(tmp_path):
+    db = tmp_path / "legacy.db"
+    create_legacy_db(db)
+
+    conn = sqlite3.connect(db)
+    applied = migrations.apply_migrations(conn)
+    assert applied == [v for v, _, _ in migrations.MIGRATIONS]
+    assert "esportato" in columns(conn)
+    assert conn.execute("SELECT esportato FROM t_articoli").fetchone()[0] == 0
+
+    # Second run is a no-op
+    assert migrations.apply_migrations(conn) == []
+    conn.close()
+
+
+def test_failed_step_rolls_back(tmp_path, monkeypatch):
+    db = tmp_path / "legacy.db"
+    create_legacy_db(db)
+
+    def broken(conn):
+        conn.execute("CREATE TABLE half_done (x INTEGER)")
+        raise RuntimeError("boom")
+
+    steps = migrations.MIGRATIONS + [(99, "broken", broken)]
+    monkeypatch.setattr(migrations, "MIGRATIONS", steps)
+    monkeypatch.setattr(migrations, "SCHEMA_VERSION", 99)
+
+    conn = sqlite3.connect(db)
+    with pytest.raises(RuntimeError):
+        migrations.apply_migrations(conn)
+
+    assert migrations.get_schema_version(conn) == 0
+    assert "esportato" not in columns(conn)
+    tables = [r[0] for r in conn.execute("SELECT name FROM sqlite_master")]
+    assert "half_done" not in tables
+    conn.close()
+
+
+def test_explorer_connect_applies_migrations(tmp_path):
+    db = tmp_path / "legacy.db"
+    create_legacy_db(db)
+
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    assert migrations.get_schema_version(explorer.conn) == migrations.SCHEMA_VERSION
+    assert explorer.get_article_by_id(1)["esportato"] == 0
+    explorer.close()
+
+
+def test_stats_follow_each_layout_step_by_step(tmp_path):
+    db = tmp_path / "legacy.db"
+    create_legacy_db(db)
+    conn = sqlite3.connect(db)
+    conn.execute(
+        "INSERT INTO t_articoli (id_articolo, data, argomento) "
+        "VALUES (2, '2021-05-01 00:00:00', 'notizie')"
+    )
+    steps = {version: step for version, _, step in migrations.MIGRATIONS}
+    for version in range(1, 5):
+        steps[version](conn)
+    # v4 as released: statistics keyed by topic name
+    stats = conn.execute("SELECT argomento, articoli FROM argomento_stats ORDER BY 1")
+    assert stats.fetchall() == [("", 1), ("notizie", 1)]
+
+    for version in range(5, migrations.SCHEMA_VERSION + 1):
+        steps[version](conn)
+    stats = conn.execute(
+        "SELECT t.nome, s.articoli FROM argomento_stats s "
+        "LEFT JOIN topics t USING (id_topic) ORDER BY s.id_topic"
+    )
+    assert stats.fetchall() == [(None, 1), ("notizie", 1)]
+    conn.close()
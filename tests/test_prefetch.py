@@ -0,0 +1,117 @@
+import sqlite3
+
+from esplora_articoli import ArticoliExplorer
+from import_articoli_to_sqlite import create_database_and_table
+from lib.prefetch import PageCache
+
+
+def create_test_db(path, n=35):
+    conn = create_database_and_table(str(path))
+    conn.executemany(
+        "INSERT INTO t_articoli (id_articolo, data, argomento, titolo_articolo, "
+        "testo_articolo) VALUES (?, ?, ?, ?, ?)",
+        [
+            (i, f"2020-01-{i % 28 + 1:02d} 00:00:00", "arg", f"title {i}", f"body {i}")
+            for i in range(1, n + 1)
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
+def open_explorer(db):
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    explorer.start_prefetch()
+    return explorer
+
+
+def page_ids(explorer):
+    rows = explorer.get_articles_page()
+    explorer._prefetcher.wait()
+    return [row["id_articolo"] for row in rows]
+
+
+def selects(explorer):
+    seen = []
+    explorer.conn.set_trace_callback(
+        lambda sql: seen.append(sql) if sql.lstrip().startswith("SELECT") else None
+    )
+    return seen
+
+
+def test_page_cache_lru_and_generation():
+    cache = PageCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)  # evicts "b", the least recently used
+    assert "a" in cache and "b" not in cache and len(cache) == 2
+
+    generation = cache.generation
+    cache.clear()
+    assert not cache.put("d", 4, generation)  # computed before the clear
+    assert cache.put("d", 4, cache.generation) and cache.get("d") == 4
+
+
+def test_navigation_served_from_prefetch(tmp_path):
+    db = tmp_path / "prefetch.db"
+    create_test_db(db)
+    reference = ArticoliExplorer(str(db))
+    assert reference.connect()
+    expected = [[r["id_articolo"] for r in reference.get_articles_page()]]
+    reference.next_page()
+    expected.append([r["id_articolo"] for r in reference.get_articles_page()])
+    reference.close()
+
+    explorer = open_explorer(db)
+    assert page_ids(explorer) == expected[0]
+    seen = selects(explorer)
+
+    # Next page, full articles of the page and the way back: no main-thread read
+    assert explorer.next_page()
+    assert page_ids(explorer) == expected[1]
+    article_id = expected[1][0]
+    assert explorer.get_article_by_id(article_id)["testo_articolo"] == (
+        f"body {article_id}"
+    )
+    assert explorer.get_article_detail(article_id)["parole"] == 2
+    assert explorer.prev_page()
+    assert page_ids(explorer) == expected[0]
+    assert seen == []
+    explorer.close()
+
+
+def test_prefetch_invalidated_by_other_connections(tmp_path):
+    db = tmp_path / "prefetch.db"
+    create_test_db(db)
+    explorer = open_explorer(db)
+    first = page_ids(explorer)[0]
+
+    other = sqlite3.connect(db)
+    other.execute(
+        "UPDATE t_articoli SET titolo_articolo = 'nuovo', testo_articolo = 'x' "
+        "WHERE id_articolo = ?",
+        (first,),
+    )
+    other.commit()
+    other.close()
+
+    assert explorer.get_articles_page()[0]["titolo_articolo"] == "nuovo"
+    assert explorer.get_article_by_id(first)["testo_articolo"] == "x"
+    explorer.close()
+
+
+def test_export_page_keeps_prefetched_rows(tmp_path):
+    db = tmp_path / "prefetch.db"
+    create_test_db(db, n=5)
+    explorer = open_explorer(db)
+    explorer.page_size = 5
+    page = explorer.get_articles_page()
+    explorer._prefetcher.wait()
+    seen = selects(explorer)
+
+    assert explorer.export_articles(page, mark_exported=True, limit=5) == 5
+    # Only the exported flags are written: no article is read again
+    assert seen == []
+    explorer.close()
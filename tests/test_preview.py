@@ -0,0 +1,105 @@
+import sqlite3
+
+from esplora_articoli import ArticoliExplorer
+from import_articoli_to_sqlite import ImportManager
+from lib import preview
+
+BODY = "<P>Primo <B>paragrafo</B></P><P>" + "parola " * 200 + "</P>"
+
+
+def article(article_id, text):
+    return (
+        (article_id, "2020-01-01 00:00:00", "arg", f"t{article_id}", None, None)
+        + (text,)
+        + (None,) * 9
+    )
+
+
+def import_articles(db, texts, compress=False):
+    manager = ImportManager(str(db))
+    manager.connect()
+    manager.compress_bodies = compress
+    for i, text in enumerate(texts, 1):
+        assert manager.insert_article(article(i, text))
+    manager.conn.commit()
+    return manager
+
+
+def test_make_preview():
+    anteprima, caratteri, parole = preview.make_preview(BODY)
+    assert anteprima.startswith("Primo paragrafo parola parola")
+    assert len(anteprima) == preview.PREVIEW_CHARS
+    assert parole == 202 and caratteri > preview.PREVIEW_CHARS
+    assert preview.make_preview(None) == ("", 0, 0)
+
+
+def test_preview_recomputed_only_when_body_changes(tmp_path, monkeypatch):
+    db = tmp_path / "preview.db"
+    manager = import_articles(db, [BODY, "<P>corto</P>"], compress=True)
+
+    calls = []
+    real = preview.make_preview
+    monkeypatch.setattr(
+        preview,
+        "make_preview",
+        lambda text, *args: calls.append(text) or real(text, *args),
+    )
+    assert manager.insert_article(article(1, BODY))  # same body: no work
+    assert manager.insert_article(article(2, "<P>cambiato</P>"))
+    manager.close()
+    assert calls == ["<P>cambiato</P>"]
+
+    conn = sqlite3.connect(db)
+    rows = conn.execute(
+        "SELECT id_articolo, anteprima, parole FROM t_articoli_preview "
+        "ORDER BY id_articolo"
+    ).fetchall()
+    assert rows[1] == (2, "cambiato", 1)
+    conn.close()
+
+
+def test_other_writers_invalidate_and_sync(tmp_path):
+    db = tmp_path / "preview.db"
+    import_articles(db, [BODY]).close()
+
+    conn = sqlite3.connect(db)
+    conn.execute("UPDATE t_articoli SET testo_articolo = '<P>a mano</P>'")
+    conn.execute(
+        "INSERT INTO t_articoli (id_articolo, testo_articolo) VALUES (2, 'nuovo')"
+    )
+    conn.commit()
+    assert conn.execute("SELECT COUNT(*) FROM t_articoli_preview").fetchone() == (0,)
+    conn.close()
+
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()  # fills the missing previews
+    detail = explorer.get_article_detail(1)
+    assert (detail["anteprima"], detail["parole"]) == ("a mano", 2)
+    assert explorer.get_article_detail(2)["anteprima"] == "nuovo"
+    explorer.close()
+
+
+def test_detail_reads_no_body(tmp_path, monkeypatch, capsys):
+    db = tmp_path / "preview.db"
+    import_articles(db, [BODY, None]).close()
+
+    explorer = ArticoliExplorer(str(db))
+    assert explorer.connect()
+    monkeypatch.setattr(explorer, "clear_screen", lambda: None)
+    monkeypatch.setattr("builtins.input", lambda prompt="": "b")
+
+    statements = []
+    explorer.conn.set_trace_callback(statements.append)
+    explorer.show_article_detail(explorer.get_article_detail(1))
+    explorer.conn.set_trace_callback(None)
+    out = capsys.readouterr().out
+    assert "Primo paragrafo" in out and "202 parole" in out and "[...]" in out
+
+    # One lookup, and the body table (alias x in the view) is never read
+    assert len(statements) == 1
+    plan = explorer.conn.execute("EXPLAIN QUERY PLAN " + statements[0]).fetchall()
+    assert not any("SEARCH x" in row[-1] for row in plan)
+
+    explorer.show_article_detail(explorer.get_article_detail(2))
+    assert "0 parole" in capsys.readouterr().out
+    explorer.close()
@@ -0,0 +1,108 @@
+import csv
+import io
+import json
+
+import pytest
+
+import esplora_articoli
+from import_articoli_to_sqlite import ImportManager
+from lib import fulltext, query
+from lib.connection import open_readonly
+
+TOPICS = ("sindacato", "notizie")
+
+
+def create_db(path, n=12):
+    manager = ImportManager(str(path))
+    manager.connect()
+    for i in range(1, n + 1):
+        data = None if i == n else f"2020-{i:02d}-10 00:00:00"
+        text = f"<P>riunione {'carabinieri' if i % 3 == 0 else 'regionale'}</P>"
+        values = (i, data, TOPICS[i % 2], f"Titolo {i}", None, None, text)
+        assert manager.insert_article(values + (None,) * 9)
+    manager.conn.execute("UPDATE t_articoli SET esportato = 1 WHERE id_articolo <= 3")
+    fulltext.sync_fulltext(manager.conn)
+    manager.close()
+
+
+def run(capsys, *argv):
+    with pytest.raises(SystemExit) as exit_info:
+        esplora_articoli.main(["query", *argv])
+    assert exit_info.value.code == 0
+    return capsys.readouterr().out
+
+
+def test_filters_combine(tmp_path, capsys):
+    db = tmp_path / "query.db"
+    create_db(db)
+
+    out = run(capsys, str(db), "--topic", "notizie", "--period", "2020-03..2020-09")
+    rows = [json.loads(line) for line in out.splitlines()]
+    assert [r["id_articolo"] for r in rows] == [9, 7, 5, 3]
+    assert set(rows[0]) == set(query.DEFAULT_COLUMNS)
+
+    out = run(capsys, str(db), "--search", "carab", "--not-exported", "--id-max", "9")
+    assert [json.loads(line)["id_articolo"] for line in out.splitlines()] == [9, 6]
+
+    out = run(capsys, str(db), "--exported", "--columns", "id_articolo")
+    assert [json.loads(line)["id_articolo"] for line in out.splitlines()] == [3, 2, 1]
+
+    # The undated article comes last, as in the explorer
+    out = run(capsys, str(db), "--id-min", "11", "--columns", "id_articolo")
+    assert [json.loads(line)["id_articolo"] for line in out.splitlines()] == [11, 12]
+
+
+def test_csv_and_table_output(tmp_path, capsys):
+    db = tmp_path / "query.db"
+    create_db(db)
+
+    out = run(
+        capsys,
+        str(db),
+        "--format",
+        "csv",
+        "--columns",
+        "id_articolo,parole,testo_articolo",
+        "--order",
+        "id",
+        "--limit",
+        "2",
+    )
+    rows = list(csv.reader(io.StringIO(out)))
+    assert rows == [
+        ["id_articolo", "parole", "testo_articolo"],
+        ["1", "2", "<P>riunione regionale</P>"],
+        ["2", "2", "<P>riunione regionale</P>"],
+    ]
+
+    out = run(capsys, str(db), "--format", "table", "--limit", "3")
+    lines = out.splitlines()
+    assert lines[0].split(" | ")[0].strip() == "id_articolo"
+    assert set(lines[1]) <= {"-", "+"}
+    assert len(lines) == 5
+
+
+def test_streams_with_fetchmany(tmp_path):
+    db = tmp_path / "query.db"
+    create_db(db)
+    conn = open_readonly(db)
+    columns = ("id_articolo",)
+    sql, params = query.build_query(columns, order="id")
+
+    rows = query.iter_rows(conn, sql, params, columns, batch_size=5)
+    assert next(rows) == (1,)
+    assert sum(1 for _ in rows) == 11
+    conn.close()
+
+    with pytest.raises(ValueError):
+        query.build_query(("id_articolo", "nessuna"))
+    with pytest.raises(ValueError):
+        query.build_query(columns, order="rilevanza")
+
+
+def test_table_truncates_after_first_batch():
+    rows = iter([(1, "breve"), (2, "x" * 100)])
+    out = io.StringIO()
+    assert query._write_table(rows, ("id", "titolo"), out, first_batch=1) == 2
+    lines = out.getvalue().splitlines()
+    assert lines[3] == "2  | xxxxx…"
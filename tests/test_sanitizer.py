@@ -0,0 +1,63 @@
+import importlib.util
+import os
+
+import pytest
+
+from lib import docx_export
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DUMPS = [
+    os.path.join(ROOT, "import", name)
+    for name in ("t_articoli.sql", "t_articoli1.sql")
+    if os.path.exists(os.path.join(ROOT, "import", name))
+]
+
+
+def load_bench():
+    path = os.path.join(ROOT, "scripts", "bench_sanitizer.py")
+    spec = importlib.util.spec_from_file_location("bench_sanitizer", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+bench = load_bench()
+
+CASES = [
+    "",
+    "testo semplice",
+    "riga\\r\\nriga\r\n\r\n\r\n\r\naltra",
+    '<P align="justify"><FONT face="Verdana" size=2>testo</FONT></P>',
+    "<p><font color=red></font></p><B> </B><BR></B>",
+    "<P><B></B></P>",
+    '<?xml version="1.0"?><P xmlns="urn:x">a</P><?XML ?>',
+    "<p onclick=\"alert('x')\" ONMOUSEOVER='f()'>mention='y' testo</p>",
+    "<FORM action=x><INPUT type=text><SELECT><OPTION>1</SELECT></FORM>dopo",
+    "<script>var a = '<p>';</SCRIPT><style>p {}</style><Input>",
+    "<textarea>non chiuso <p>testo</p>",
+    "<IFRAME src=x></iframe><OBJECT><EMBED src=y></OBJECT><embed/>",
+    "<FORMAT>prefisso</FORMAT><INPUTX>",
+    "</SCRIPT> chiusura orfana <o:p></o:p>",
+]
+
+
+@pytest.mark.parametrize("html", CASES)
+def test_same_output_as_per_tag_passes(html):
+    assert docx_export.clean_html_for_docx(html) == bench.legacy_clean_html_for_docx(
+        html
+    )
+    assert docx_export.is_html_content(html) == bench.legacy_is_html_content(html)
+
+
+@pytest.mark.skipif(not DUMPS, reason="dump di import/ non disponibili")
+def test_same_output_on_archive_bodies():
+    bodies = bench.load_bodies(DUMPS)
+    assert len(bodies) > 100
+    pairs = [
+        (docx_export.clean_text_content, bench.legacy_clean_text_content),
+        (docx_export.clean_html_for_docx, bench.legacy_clean_html_for_docx),
+        (docx_export.is_html_content, bench.legacy_is_html_content),
+    ]
+    for body in bodies:
+        for function, legacy in pairs:
+            assert function(body) == legacy(body), function.__name__
@@ -0,0 +1,95 @@
+import sqlite3
+
+from import_articoli_to_sqlite import ImportManager, create_database_and_table
+from lib import migrations
+
+
+def topics(conn):
+    return dict(conn.execute("SELECT nome, id_topic FROM topics"))
+
+
+def test_legacy_topics_move_to_dictionary(tmp_path):
+    db = tmp_path / "legacy.db"
+    conn = sqlite3.connect(db)
+    migrations._v1_base_schema(conn)
+    conn.executemany(
+        "INSERT INTO t_articoli (id_articolo, argomento, titolo_articolo) "
+        "VALUES (?, ?, ?)",
+        [(1, "Sindacato", "a"), (2, "Sindacato", "b"), (3, None, "c"), (4, "", "d")],
+    )
+    conn.commit()
+    conn.close()
+
+    conn = create_database_and_table(str(db))
+    assert set(topics(conn)) == {"Sindacato", ""}
+    rows = conn.execute(
+        "SELECT id_articolo, argomento, titolo_articolo, esportato FROM t_articoli "
+        "ORDER BY id_articolo"
+    ).fetchall()
+    assert rows == [
+        (1, "Sindacato", "a", 0),
+        (2, "Sindacato", "b", 0),
+        (3, None, "c", 0),
+        (4, "", "d", 0),
+    ]
+    conn.close()
+
+
+def test_writes_through_view(tmp_path):
+    conn = create_database_and_table(str(tmp_path / "view.db"))
+    conn.execute(
+        "INSERT INTO t_articoli (id_articolo, argomento, titolo_articolo) "
+        "VALUES (1, 'Nuovo', 'a')"
+    )
+    conn.execute("UPDATE t_articoli SET argomento = 'Altro' WHERE id_articolo = 1")
+    conn.execute("UPDATE t_articoli SET esportato = 1 WHERE id_articolo = 1")
+    assert conn.execute(
+        "SELECT argomento, esportato FROM t_articoli WHERE id_articolo = 1"
+    ).fetchone() == ("Altro", 1)
+    assert conn.execute("SELECT id_topic FROM t_articoli_base").fetchone() == (
+        topics(conn)["Altro"],
+    )
+
+    conn.execute("DELETE FROM t_articoli WHERE id_articolo = 1")
+    assert conn.execute("SELECT COUNT(*) FROM t_articoli_base").fetchone() == (0,)
+    conn.close()
+
+
+def test_export_marking_does_not_requeue_fulltext(tmp_path):
+    conn = create_database_and_table(str(tmp_path / "fts.db"))
+    conn.execute(
+        "INSERT INTO t_articoli (id_articolo, titolo_articolo) VALUES (1, 'a')"
+    )
+    conn.execute("DELETE FROM t_articoli_fts_pending")
+    conn.execute("UPDATE t_articoli SET esportato = 1")
+    assert conn.execute("SELECT COUNT(*) FROM t_articoli_fts_pending").fetchone() == (
+        0,
+    )
+    conn.execute("UPDATE t_articoli SET titolo_articolo = 'b'")
+    assert conn.execute("SELECT COUNT(*) FROM t_articoli_fts_pending").fetchone() == (
+        1,
+    )
+    conn.close()
+
+
+def test_importer_reuses_topic_ids(tmp_path):
+    db = tmp_path / "import.db"
+    manager = ImportManager(str(db))
+    manager.connect()
+    for i, argomento in enumerate(["Uno", "Due", "Uno", None], 1):
+        assert manager.insert_article((i, None, argomento) + (None,) * 13)
+    manager.close()
+
+    # A new session loads the dictionary instead of adding duplicates
+    manager = ImportManager(str(db))
+    manager.connect()
+    assert manager.topic_ids == {"Uno": 1, "Due": 2}
+    assert manager.insert_article((5, None, "Due") + (None,) * 13)
+    manager.close()
+
+    conn = sqlite3.connect(db)
+    assert conn.execute("SELECT COUNT(*) FROM topics").fetchone() == (2,)
+    assert conn.execute(
+        "SELECT argomento FROM t_articoli ORDER BY id_articolo"
+    ).fetchall() == [("Uno",), ("Due",), ("Uno",), (None,), ("Due",)]
+    conn.close()